@@ -7,11 +7,16 @@ import logging
 from app.db.database import get_db, PropertyDB
 from app.models.property import Property, PropertySearchFilters
 from app.services.supabase_property_service import SupabasePropertyService
+from app.services.similar_listings import SimilarListingsService
+from app.core.circuit_breaker import CircuitOpenError
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Shared by every request - keeps its Supabase client and lazily connected Pinecone index
+similar_listings_service = SimilarListingsService()
+
 def add_cors_headers(response: Response):
     """Add CORS headers to response"""
     response.headers["Access-Control-Allow-Credentials"] = "true"
@@ -104,6 +109,69 @@ async def get_property(
         )
         return add_cors_headers(error_response)
 
+@router.get("/{listing_number}/similar")
+async def get_similar_properties(
+    listing_number: str,
+    limit: int = Query(10, ge=1, le=50, description="Number of similar properties to return"),
+    property_type: Optional[str] = Query(None, description="Filter by property type"),
+    min_price: Optional[int] = Query(None, description="Minimum price filter"),
+    max_price: Optional[int] = Query(None, description="Maximum price filter"),
+    bedrooms: Optional[int] = Query(None, description="Number of bedrooms")
+):
+    """
+    "More like this": nearest neighbours of a listing by its stored embedding
+    """
+    try:
+        int(listing_number)
+        filters = PropertySearchFilters(
+            property_type=property_type,
+            min_price=min_price,
+            max_price=max_price,
+            bedrooms=bedrooms
+        )
+    except ValueError:
+        error_response = JSONResponse(
+            status_code=400,
+            content={"detail": "Invalid listing number or filter"}
+        )
+        return add_cors_headers(error_response)
+
+    try:
+        has_filters = any(value is not None for value in (property_type, min_price, max_price, bedrooms))
+        result = await similar_listings_service.find_similar(
+            listing_number, limit=limit, filters=filters if has_filters else None
+        )
+
+        if result is None:
+            error_response = JSONResponse(
+                status_code=404,
+                content={"detail": "Property not found in vector index"}
+            )
+            return add_cors_headers(error_response)
+
+        properties, source = result
+        response = JSONResponse(content={
+            "listingNumber": listing_number,
+            "properties": [prop.model_dump() for prop in properties],
+            "source": source
+        })
+        return add_cors_headers(response)
+
+    except CircuitOpenError as e:
+        error_response = JSONResponse(
+            status_code=503,
+            content={"detail": "Similar listings temporarily unavailable"},
+            headers={"Retry-After": str(max(1, int(e.retry_in)))}
+        )
+        return add_cors_headers(error_response)
+    except Exception as e:
+        logger.error(f"Error finding properties similar to {listing_number}: {e}")
+        error_response = JSONResponse(
+            status_code=500,
+            content={"detail": "Internal server error"}
+        )
+        return add_cors_headers(error_response)
+
 @router.get("/listing/{listing_number}", response_model=Property)
 async def get_property_by_listing(
     listing_number: str
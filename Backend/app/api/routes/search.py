@@ -1,13 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request, Response
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 import logging
 import time
+from typing import Optional
 
 from app.db.database import get_db
-from app.models.property import PropertySearchRequest, PropertySearchResponse, PropertyExplanationResponse
+from app.models.property import (
+    PropertySearchRequest, PropertySearchResponse, PropertyExplanationResponse,
+    BatchSearchRequest, BatchSearchResponse
+)
 from app.services.enhanced_search_service import EnhancedSearchService
+from app.services.bm25_hybrid_service import BM25HybridService
 from app.services.search_service import SearchService  # Keep for fallback
+from app.services.search_orchestrator import SearchOrchestrator
+from app.services.ai_rerank_service import rerank_hedger
+from app.services.local_rerank_service import local_rerank_service
+from app.services.explanation_prefetch import explanation_prefetcher
+from app.services.semantic_explanation_cache import semantic_explanation_cache
+from app.core.llm_accounting import endpoint_usage
+from app.core.metrics import stage_timer
+from app.core.search_cache import search_cache
+from app.core.circuit_breaker import circuit_states
 from app.core.security import (
     rate_limit_search,
     rate_limit_general,
@@ -25,6 +39,10 @@ router = APIRouter()
 # Initialize services - Phase 2 enhanced service with fallback
 enhanced_search_service = EnhancedSearchService()
 fallback_search_service = SearchService()
+# Shared so the BM25 corpus is built once, not per streamed search
+hybrid_search_service = BM25HybridService()
+# Shared so rerank latency history carries across requests
+search_orchestrator = SearchOrchestrator(hybrid_search_service)
 
 def add_cors_headers(response: Response):
     """Add CORS headers to response"""
@@ -57,12 +75,19 @@ async def search_properties(
         sanitized_query = validate_search_input(search_request.query)
         search_request.query = sanitized_query
         
+        # A cursor from a previous page pins page and page_size to that search's ranked list
+        if search_request.cursor:
+            try:
+                search_request = search_cache.apply_cursor(search_request)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+        
         search_logger.info(f"🔍 SEARCH: '{search_request.query}' (AI={use_ai})")
         
         if use_ai:
-            # Use Phase 2 enhanced search with vector similarity - create fresh instance
-            fresh_enhanced_service = EnhancedSearchService()
-            results = await fresh_enhanced_service.search_properties(search_request)
+            # Phase 2 enhanced search - an open OpenAI/Pinecone circuit makes its vector
+            # stage fail fast onto the Supabase fallback instead of waiting out a timeout
+            results = await enhanced_search_service.search_properties(search_request)
         else:
             # Fallback to Phase 1 basic search
             results = await fallback_search_service.search_properties(
@@ -75,7 +100,12 @@ async def search_properties(
         avg_score = sum(getattr(prop, 'searchScore', 0) for prop in results.properties) / len(results.properties) if results.properties else 0
         search_logger.info(f"✅ RESULTS: {results.totalResults} properties found in {duration:.2f}s (avg score: {avg_score:.1f}%)")
         
-        return results
+        # Explanations for the top results are generated in the background, ahead of the click
+        explanation_prefetcher.schedule(search_request.query, results.properties)
+        
+        with stage_timer("serialization"):
+            response = JSONResponse(content=results.model_dump())
+        return response
         
     except HTTPException:
         # Re-raise HTTP exceptions (like validation errors)
@@ -96,6 +126,100 @@ async def search_properties(
         
         raise HTTPException(status_code=500, detail="Search service temporarily unavailable")
 
+@router.post("/batch", response_model=BatchSearchResponse)
+@rate_limit_search
+async def batch_search(request: Request, batch_request: BatchSearchRequest):
+    """
+    Run up to 100 searches in one call
+    
+    All uncached queries share one embedding request, their vector queries run
+    concurrently, and the union of candidates is hydrated with a single Supabase
+    fetch; each search is then scored and paginated independently.
+    
+    Security: Rate limited to 5 requests/minute per IP
+    """
+    start_time = time.time()
+    search_requests = []
+    for search_request in batch_request.searches:
+        search_request.query = validate_search_input(search_request.query)
+        if search_request.cursor:
+            try:
+                search_request = search_cache.apply_cursor(search_request)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+        search_requests.append(search_request)
+    
+    try:
+        results = await enhanced_search_service.search_properties_batch(search_requests)
+    except Exception as e:
+        search_logger.error(f"❌ BATCH SEARCH ERROR: {e}")
+        raise HTTPException(status_code=500, detail="Search service temporarily unavailable")
+    
+    search_logger.info(f"✅ BATCH: {len(results)} searches in {time.time() - start_time:.2f}s")
+    with stage_timer("serialization"):
+        response = JSONResponse(content=BatchSearchResponse(results=results).model_dump())
+    return response
+
+@router.post("/stream")
+@rate_limit_search
+async def stream_search(request: Request, search_request: PropertySearchRequest):
+    """
+    Progressive search over Server-Sent Events
+    
+    Events (JSON in `data:` frames, same framing as explanation streaming):
+    - `results` (stage `vector`): first page in vector order, as soon as it is hydrated
+    - `update` (stage `hybrid`, then `rerank`): new page order with scores, plus any properties not sent yet
+    - `complete` / `error`
+    
+    Security: Rate limited to 5 requests/minute per IP
+    """
+    sanitized_query = validate_search_input(search_request.query)
+    search_request.query = sanitized_query
+    search_logger.info(f"🔍 STREAM SEARCH: '{search_request.query}'")
+    
+    return StreamingResponse(
+        hybrid_search_service.stream_hybrid_search(search_request),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+@router.post("/adaptive", response_model=PropertySearchResponse)
+@rate_limit_search
+async def adaptive_search(
+    request: Request,
+    search_request: PropertySearchRequest,
+    deadline_ms: Optional[int] = Query(None, ge=200, le=30000, description="Latency budget for this search (default SEARCH_DEADLINE_MS)")
+):
+    """
+    Hybrid search (vector + BM25 + AI rerank) under a latency budget
+    
+    AI rerank is skipped when the vector scores already separate the first page
+    from the rest, trimmed to fewer candidates when the budget is tight, and
+    abandoned for hybrid-only scores if it would overrun. Every decision is
+    listed in `metadata.decisions`.
+    
+    Security: Rate limited to 5 requests/minute per IP
+    """
+    search_request.query = validate_search_input(search_request.query)
+    search_logger.info(f"🔍 ADAPTIVE SEARCH: '{search_request.query}' (deadline={deadline_ms or 'default'})")
+    
+    try:
+        results = await search_orchestrator.search(search_request, deadline_ms=deadline_ms)
+    except Exception as e:
+        search_logger.error(f"❌ ADAPTIVE SEARCH ERROR: {e}")
+        raise HTTPException(status_code=500, detail="Search service temporarily unavailable")
+    
+    actions = ', '.join(f"{d['stage']}:{d['action']}" for d in results.metadata['decisions'])
+    search_logger.info(f"✅ ADAPTIVE: {results.totalResults} properties in {results.metadata['elapsedMs']}ms ({actions})")
+    explanation_prefetcher.schedule(search_request.query, results.properties)
+    with stage_timer("serialization"):
+        response = JSONResponse(content=results.model_dump())
+    return response
+
 @router.post("/simple")
 @rate_limit_search
 async def simple_search(
@@ -131,7 +255,8 @@ async def simple_search(
                 f"Results: {len(search_results.properties)}"
             )
             
-            response = JSONResponse(content=search_results.model_dump())
+            with stage_timer("serialization"):
+                response = JSONResponse(content=search_results.model_dump())
             return add_cors_headers(response)
             
         # Fallback to basic search
@@ -267,7 +392,13 @@ async def search_health_check(request: Request):
             },
             "enhanced_search": {
                 "available": vector_service.initialized and supabase_service.supabase is not None
-            }
+            },
+            "circuit_breakers": circuit_states(),
+            "llm_hedging": rerank_hedger.latency_summary(),
+            "local_ranker": local_rerank_service.summary(),
+            "llm_usage": endpoint_usage.summary(),
+            "explanation_prefetch": explanation_prefetcher.summary(),
+            "semantic_explanation_cache": semantic_explanation_cache.summary()
         }
         
         return health_status
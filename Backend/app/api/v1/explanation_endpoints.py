@@ -5,13 +5,14 @@ AI-powered property match explanations with caching and streaming
 
 from fastapi import APIRouter, HTTPException, status, Query, Request
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, Any, List, Optional
 import logging
 import json
 
-from app.services.explanation_service import explanation_service, PropertyExplanation
+from app.services.explanation_service import explanation_service, build_property_data, PropertyExplanation
 from app.core.redis_cache import explanation_cache
+from app.core.config import settings
 from app.services.supabase_property_service import SupabasePropertyService
 from app.core.security import (
     rate_limit_explanation,
@@ -49,6 +50,17 @@ class StreamingExplanationRequest(BaseModel):
         min_anystr_length = 1
         max_anystr_length = 500
 
+class CachedExplanationsRequest(BaseModel):
+    """Request model for a results page's cached explanations"""
+    search_query: str
+    listing_numbers: List[str] = Field(..., min_length=1, max_length=50)
+    
+    class Config:
+        # Add validation
+        str_strip_whitespace = True
+        min_anystr_length = 1
+        max_anystr_length = 500
+
 @router.get("/health/")
 @rate_limit_general
 async def explanation_health(request: Request):
@@ -57,7 +69,7 @@ async def explanation_health(request: Request):
     
     Security: General rate limiting (100 requests/minute per IP)
     """
-    cache_stats = explanation_cache.get_cache_stats()
+    cache_stats = await explanation_cache.get_cache_stats()
     
     return {
         "status": "healthy",
@@ -67,7 +79,8 @@ async def explanation_health(request: Request):
             "openai_client": explanation_service.openai_client is not None,
             "streaming_llm": explanation_service.streaming_llm is not None,
             "redis_cache": cache_stats["redis_connected"],
-            "langchain_cache": cache_stats["langchain_cache_enabled"]
+            "langchain_cache": cache_stats["langchain_cache_enabled"],
+            "rerank_prefill": settings.RERANK_EXPLANATIONS_ENABLED
         },
         "cache_stats": cache_stats
     }
@@ -181,6 +194,38 @@ async def stream_property_explanation(
             detail="Failed to stream explanation"
         )
 
+@router.post("/cached/")
+@rate_limit_general
+async def get_cached_explanations(request: Request, cached_request: CachedExplanationsRequest):
+    """
+    Cached explanations for every listing on a results page, in one cache round-trip
+    
+    Listings without a cached explanation map to null - nothing is generated here.
+    
+    Security: General rate limiting (100 requests/minute per IP), input validation
+    """
+    sanitized_query = validate_search_input(cached_request.search_query)
+    listing_numbers = [listing_number.strip() for listing_number in cached_request.listing_numbers]
+    if any(not listing_number or len(listing_number) > 50 for listing_number in listing_numbers):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid listing number"
+        )
+    
+    cached = await explanation_cache.get_explanations(sanitized_query, listing_numbers)
+    explanations = {}
+    for listing_number, entry in cached.items():
+        explanation = entry.get('explanation') if entry else None
+        if explanation:
+            explanation['cached'] = True
+        explanations[listing_number] = explanation
+    
+    return {
+        "search_query": sanitized_query,
+        "explanations": explanations,
+        "cached_count": sum(1 for explanation in explanations.values() if explanation)
+    }
+
 @router.get("/cache/stats/")
 @rate_limit_general
 async def get_cache_statistics(request: Request):
@@ -190,7 +235,7 @@ async def get_cache_statistics(request: Request):
     Security: General rate limiting (100 requests/minute per IP)
     """
     return {
-        "cache_statistics": explanation_cache.get_cache_stats(),
+        "cache_statistics": await explanation_cache.get_cache_stats(),
         "service_status": {
             "explanation_service_initialized": explanation_service.openai_client is not None,
             "streaming_enabled": explanation_service.streaming_llm is not None
@@ -298,68 +343,7 @@ async def _get_property_data(listing_number: str) -> Optional[Dict[str, Any]]:
         if not property_obj:
             return None
         
-        # Convert property object to dict with all fields
-        property_data = {
-            # Core identification
-            "id": getattr(property_obj, 'id', None),
-            "listing_number": getattr(property_obj, 'listing_number', None),
-            "url": getattr(property_obj, 'url', None),
-            
-            # Basic information
-            "title": getattr(property_obj, 'title', ''),
-            "description": getattr(property_obj, 'description', ''),
-            "price": getattr(property_obj, 'price', 0),
-            "currency": getattr(property_obj, 'currency', 'ZAR'),
-            "type": str(getattr(property_obj, 'type', 'APARTMENT')),
-            "status": str(getattr(property_obj, 'status', 'FOR_SALE')),
-            
-            # Specifications
-            "bedrooms": getattr(property_obj, 'bedrooms', 0),
-            "bathrooms": getattr(property_obj, 'bathrooms', 0),
-            "area": getattr(property_obj, 'area', 0),
-            "areaUnit": getattr(property_obj, 'areaUnit', 'm²'),
-            "garages": getattr(property_obj, 'garages', None),
-            "parking": getattr(property_obj, 'parking', None),
-            
-            # Features
-            "features": getattr(property_obj, 'features', []) or [],
-            "garden": getattr(property_obj, 'garden', None),
-            "pools": getattr(property_obj, 'pools', None),
-            "security": getattr(property_obj, 'security', None),
-            
-            # Location
-            "location": {},
-            
-            # Points of interest
-            "points_of_interest": [],
-            
-            # Search score if available
-            "searchScore": getattr(property_obj, 'searchScore', 0)
-        }
-        
-        # Handle location object
-        if hasattr(property_obj, 'location') and property_obj.location:
-            loc = property_obj.location
-            property_data["location"] = {
-                "address": getattr(loc, 'address', ''),
-                "neighborhood": getattr(loc, 'neighborhood', ''),
-                "city": getattr(loc, 'city', ''),
-                "postalCode": getattr(loc, 'postalCode', None),
-                "country": getattr(loc, 'country', 'South Africa')
-            }
-        
-        # Handle points of interest
-        if hasattr(property_obj, 'points_of_interest') and property_obj.points_of_interest:
-            for poi in property_obj.points_of_interest:
-                poi_data = {
-                    "name": getattr(poi, 'name', ''),
-                    "category": getattr(poi, 'category', ''),
-                    "distance": getattr(poi, 'distance', 0.0),
-                    "distance_str": getattr(poi, 'distance_str', '')
-                }
-                property_data["points_of_interest"].append(poi_data)
-        
-        return property_data
+        return build_property_data(property_obj)
         
     except Exception as e:
         logger.error(f"Error retrieving property data for {listing_number}: {e}")
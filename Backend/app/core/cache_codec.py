@@ -0,0 +1,175 @@
+"""
+Cache Value Codecs for PropMatch
+Redis values of the explanation and search caches are msgpack, zstd-compressed
+with a dictionary trained on that cache's own entries
+(scripts/train_cache_dictionary.py). Encoded values start with a format byte;
+anything else is a JSON entry written before the codecs existed, so old and
+new entries read transparently while the cache turns over.
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+import msgpack
+import zstandard
+
+from app.core.config import settings
+from app.core.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+FORMAT_MSGPACK = 0x01
+FORMAT_MSGPACK_ZSTD = 0x02
+CODECS = ("json", "msgpack", "msgpack-zstd")
+
+CACHE_VALUES = metrics_registry.counter(
+    "propmatch_cache_codec_values_total",
+    "Cache values encoded and decoded by cache, operation (encode, decode) and format (json, msgpack, "
+    "msgpack-zstd, msgpack-zstd-dict)",
+    ["cache", "op", "format"]
+)
+CACHE_VALUE_BYTES = metrics_registry.counter(
+    "propmatch_cache_codec_bytes_total",
+    "Encoded bytes written by cache and format",
+    ["cache", "format"]
+)
+
+
+class CacheCodecError(ValueError):
+    """A cached value that can't be decoded - corrupt, or compressed with a dictionary this process lacks"""
+
+
+def dictionary_path(cache: str, directory: Optional[str] = None) -> Path:
+    """Active dictionary of a cache - retired ones are kept beside it as <cache>-<dict id>.zdict"""
+    return Path(directory or settings.CACHE_DICTIONARY_DIR) / f"{cache}.zdict"
+
+
+def load_dictionaries(cache: str, directory: Optional[str] = None) -> Dict[int, zstandard.ZstdCompressionDict]:
+    """Every dictionary of a cache, active and retired, by zstd dictionary id"""
+    dictionaries = {}
+    folder = Path(directory or settings.CACHE_DICTIONARY_DIR)
+    for path in sorted(folder.glob(f"{cache}*.zdict")) if folder.is_dir() else []:
+        dictionary = zstandard.ZstdCompressionDict(path.read_bytes())
+        dictionaries[dictionary.dict_id()] = dictionary
+    return dictionaries
+
+
+def train_dictionary(samples: Iterable[Any], size: int = 16384) -> zstandard.ZstdCompressionDict:
+    """Train a zstd dictionary on the msgpack encoding of sample cache values"""
+    encoded = [msgpack.packb(sample, use_bin_type=True, default=str) for sample in samples]
+    return zstandard.train_dictionary(size, encoded)
+
+
+def save_dictionary(cache: str, dictionary: zstandard.ZstdCompressionDict, directory: Optional[str] = None) -> Path:
+    """Make a dictionary the cache's active one, keeping the previous one so its entries still decode"""
+    path = dictionary_path(cache, directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        previous = zstandard.ZstdCompressionDict(path.read_bytes())
+        path.rename(path.with_name(f"{cache}-{previous.dict_id()}.zdict"))
+    path.write_bytes(dictionary.as_bytes())
+    return path
+
+
+class CacheCodec:
+    """
+    Encodes with the configured format; decodes every format, whatever is
+    configured, so switching codecs (or back to JSON) never strands entries
+    """
+
+    def __init__(
+        self,
+        cache: str,
+        codec: str = "msgpack-zstd",
+        dictionaries: Optional[Dict[int, zstandard.ZstdCompressionDict]] = None,
+        active_dict_id: Optional[int] = None,
+        level: int = 3
+    ):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown cache codec '{codec}' - expected one of {', '.join(CODECS)}")
+        self.cache = cache
+        self.codec = codec
+        self.level = level
+        self.dictionaries = dictionaries or {}
+        self.dictionary = self.dictionaries.get(active_dict_id) if active_dict_id is not None else None
+        self.format_name = codec if codec != "msgpack-zstd" or self.dictionary is None else "msgpack-zstd-dict"
+        if self.dictionary is not None:
+            self.dictionary.precompute_compress(level=level)
+        # zstd contexts aren't thread-safe, and the search cache decodes in worker threads
+        self._local = threading.local()
+
+    def _compressor(self) -> zstandard.ZstdCompressor:
+        compressor = getattr(self._local, 'compressor', None)
+        if compressor is None:
+            compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self.dictionary)
+            self._local.compressor = compressor
+        return compressor
+
+    def _decompressor(self, dict_id: int) -> zstandard.ZstdDecompressor:
+        decompressors = getattr(self._local, 'decompressors', None)
+        if decompressors is None:
+            decompressors = self._local.decompressors = {}
+        decompressor = decompressors.get(dict_id)
+        if decompressor is None:
+            if dict_id and dict_id not in self.dictionaries:
+                raise CacheCodecError(f"{self.cache} cache value uses unknown zstd dictionary {dict_id}")
+            decompressor = zstandard.ZstdDecompressor(dict_data=self.dictionaries.get(dict_id))
+            decompressors[dict_id] = decompressor
+        return decompressor
+
+    def encode(self, value: Any) -> bytes:
+        if self.codec == "json":
+            encoded = json.dumps(value).encode()
+        else:
+            packed = msgpack.packb(value, use_bin_type=True, default=str)
+            if self.codec == "msgpack":
+                encoded = bytes([FORMAT_MSGPACK]) + packed
+            else:
+                encoded = bytes([FORMAT_MSGPACK_ZSTD]) + self._compressor().compress(packed)
+        CACHE_VALUES.inc(cache=self.cache, op="encode", format=self.format_name)
+        CACHE_VALUE_BYTES.inc(len(encoded), cache=self.cache, format=self.format_name)
+        return encoded
+
+    def decode(self, raw: Any) -> Any:
+        """Decode a value of any format - raises CacheCodecError for values that can't be read"""
+        if not raw:
+            raise CacheCodecError(f"empty {self.cache} cache value")
+        try:
+            if isinstance(raw, str) or raw[0] not in (FORMAT_MSGPACK, FORMAT_MSGPACK_ZSTD):
+                # Entries from before the codecs - always JSON text
+                value, format_name = json.loads(raw), "json"
+            elif raw[0] == FORMAT_MSGPACK:
+                value, format_name = msgpack.unpackb(raw[1:], raw=False), "msgpack"
+            else:
+                body = raw[1:]
+                dict_id = zstandard.get_frame_parameters(body).dict_id
+                value = msgpack.unpackb(self._decompressor(dict_id).decompress(body), raw=False)
+                format_name = "msgpack-zstd-dict" if dict_id else "msgpack-zstd"
+        except CacheCodecError:
+            raise
+        except Exception as e:
+            raise CacheCodecError(f"undecodable {self.cache} cache value: {e}") from e
+        CACHE_VALUES.inc(cache=self.cache, op="decode", format=format_name)
+        return value
+
+
+_codecs: Dict[str, CacheCodec] = {}
+
+
+def get_cache_codec(cache: str) -> CacheCodec:
+    """Process-wide codec for a cache (explanation, search), configured from CACHE_CODEC"""
+    codec = _codecs.get(cache)
+    if codec is None:
+        dictionaries = load_dictionaries(cache)
+        active_dict_id = None
+        active_path = dictionary_path(cache)
+        if active_path.exists():
+            active_dict_id = zstandard.ZstdCompressionDict(active_path.read_bytes()).dict_id()
+        codec = CacheCodec(cache, settings.CACHE_CODEC, dictionaries, active_dict_id, settings.CACHE_ZSTD_LEVEL)
+        _codecs[cache] = codec
+        logger.info(f"🗜️ {cache} cache codec: {codec.format_name}"
+                    + (f" (dictionary {active_dict_id})" if codec.dictionary is not None else ""))
+    return codec
@@ -0,0 +1,215 @@
+"""
+Circuit Breakers for PropMatch
+One breaker per external dependency (OpenAI, Pinecone, Supabase) with rolling
+error-rate and slow-call windows and half-open probing. An open circuit rejects
+calls immediately so searches take the local fallback path without paying a
+client timeout, and a brownout can't tie up the worker pool
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from app.core.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+CIRCUIT_TRANSITIONS = metrics_registry.counter(
+    "propmatch_circuit_transitions_total",
+    "Circuit breaker state changes by dependency and new state",
+    ["dependency", "state"]
+)
+CIRCUIT_REJECTIONS = metrics_registry.counter(
+    "propmatch_circuit_rejections_total",
+    "Calls rejected without reaching the dependency because its circuit was open",
+    ["dependency"]
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+    def __init__(self, dependency: str, retry_in: float):
+        super().__init__(f"{dependency} circuit open (retry in {retry_in:.1f}s)")
+        self.dependency = dependency
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Trips when, over the last `window_seconds` and at least `min_calls` calls,
+    the error rate or the share of calls slower than `slow_call_ms` crosses its
+    threshold. After `open_seconds` up to `half_open_probes` calls are let
+    through; all succeeding closes the circuit, any failing reopens it.
+    Thread-safe - guarded calls run both on the event loop and in worker threads.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        slow_call_ms: float,
+        failure_rate_threshold: float = 0.5,
+        slow_call_rate_threshold: float = 0.8,
+        window_seconds: float = 30.0,
+        min_calls: int = 10,
+        open_seconds: float = 15.0,
+        half_open_probes: int = 2
+    ):
+        self.name = name
+        self.slow_call_ms = slow_call_ms
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.last_trip_reason: Optional[str] = None
+        self._calls: Deque[Tuple[float, bool, bool]] = deque()  # (finished_at, failed, slow)
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+
+    def guard(self) -> "_GuardedCall":
+        """`with breaker.guard(): ...` - raises CircuitOpenError when the call isn't allowed"""
+        return _GuardedCall(self)
+
+    def _acquire(self) -> bool:
+        """Admit a call; returns whether it is a half-open probe"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now - self.opened_at < self.open_seconds:
+                    CIRCUIT_REJECTIONS.inc(dependency=self.name)
+                    raise CircuitOpenError(self.name, self.open_seconds - (now - self.opened_at))
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probes_in_flight + self._probe_successes >= self.half_open_probes:
+                    CIRCUIT_REJECTIONS.inc(dependency=self.name)
+                    raise CircuitOpenError(self.name, 0.0)
+                self._probes_in_flight += 1
+                return True
+            return False
+
+    def _release(self, probe: bool, failed: bool, elapsed_ms: float):
+        slow = elapsed_ms >= self.slow_call_ms
+        with self._lock:
+            now = time.monotonic()
+            if probe:
+                self._probes_in_flight -= 1
+                if self.state != HALF_OPEN:
+                    return
+                if failed or slow:
+                    self._trip(now, "probe slow" if slow and not failed else "probe failed")
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_probes:
+                        self._calls.clear()
+                        self._transition(CLOSED)
+                return
+
+            self._calls.append((now, failed, slow))
+            self._prune(now)
+            if self.state != CLOSED or len(self._calls) < self.min_calls:
+                return
+            failure_rate = sum(1 for _, call_failed, _ in self._calls if call_failed) / len(self._calls)
+            slow_rate = sum(1 for _, _, call_slow in self._calls if call_slow) / len(self._calls)
+            if failure_rate >= self.failure_rate_threshold:
+                self._trip(now, f"error rate {failure_rate:.0%}")
+            elif slow_rate >= self.slow_call_rate_threshold:
+                self._trip(now, f"slow call rate {slow_rate:.0%} over {self.slow_call_ms:.0f}ms")
+
+    def _prune(self, now: float):
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+    def _trip(self, now: float, reason: str):
+        self.opened_at = now
+        self.last_trip_reason = reason
+        self._calls.clear()
+        self._transition(OPEN)
+        logger.warning(f"🔌 {self.name} circuit opened: {reason} - failing fast for {self.open_seconds:.0f}s")
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        self.state = state
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        CIRCUIT_TRANSITIONS.inc(dependency=self.name, state=state)
+        if state == CLOSED:
+            logger.info(f"🔌 {self.name} circuit closed")
+
+    @property
+    def is_open(self) -> bool:
+        """Open and still cooling down - callers can skip straight to their fallback"""
+        return self.state == OPEN and time.monotonic() - self.opened_at < self.open_seconds
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets probes through, 0 when calls are admitted"""
+        return max(0.0, self.open_seconds - (time.monotonic() - self.opened_at)) if self.is_open else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            calls = len(self._calls)
+            snapshot = {
+                "state": self.state,
+                "window_calls": calls,
+                "error_rate": round(sum(1 for _, failed, _ in self._calls if failed) / calls, 3) if calls else 0.0,
+                "slow_call_rate": round(sum(1 for _, _, slow in self._calls if slow) / calls, 3) if calls else 0.0,
+                "slow_call_ms": self.slow_call_ms
+            }
+            if self.state != CLOSED:
+                snapshot["last_trip_reason"] = self.last_trip_reason
+                snapshot["retry_in_seconds"] = round(max(0.0, self.open_seconds - (now - self.opened_at)), 1)
+            return snapshot
+
+
+class _GuardedCall:
+    """Context manager for one call through a breaker - works in sync and async code"""
+
+    __slots__ = ('breaker', 'probe', 'start')
+
+    def __init__(self, breaker: CircuitBreaker):
+        self.breaker = breaker
+
+    def __enter__(self) -> "_GuardedCall":
+        self.probe = self.breaker._acquire()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed_ms = (time.perf_counter() - self.start) * 1000
+        if exc_type is not None and not issubclass(exc_type, Exception):
+            # Cancelled (client went away, deadline hit) - says nothing about the dependency
+            if self.probe:
+                with self.breaker._lock:
+                    self.breaker._probes_in_flight -= 1
+            return False
+        self.breaker._release(self.probe, exc_type is not None, elapsed_ms)
+        return False
+
+
+# Global breakers, one per external dependency
+openai_embeddings_breaker = CircuitBreaker("openai_embeddings", slow_call_ms=3000)
+openai_chat_breaker = CircuitBreaker("openai_chat", slow_call_ms=15000, min_calls=5)
+pinecone_breaker = CircuitBreaker("pinecone", slow_call_ms=2000)
+supabase_breaker = CircuitBreaker("supabase", slow_call_ms=3000)
+
+CIRCUIT_BREAKERS = (openai_embeddings_breaker, openai_chat_breaker, pinecone_breaker, supabase_breaker)
+
+
+def circuit_states() -> Dict[str, Dict[str, Any]]:
+    """Breaker state per dependency for health endpoints"""
+    return {breaker.name: breaker.snapshot() for breaker in CIRCUIT_BREAKERS}
@@ -0,0 +1,190 @@
+"""
+Shared HTTP Clients for PropMatch
+One keep-alive, HTTP/2-capable connection pool per upstream, shared by every
+service instance, so TLS handshakes happen once per connection instead of once
+per service. Pools have explicit limits and timeouts, and their utilization is
+exported as Prometheus gauges.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+import httpx
+from langsmith.wrappers import wrap_openai
+from openai import AsyncOpenAI
+
+from app.core.config import settings
+from app.core.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+HttpClient = Union[httpx.Client, httpx.AsyncClient]
+
+_clients: Dict[str, HttpClient] = {}
+_clients_lock = threading.Lock()
+_openai_client: Optional[AsyncOpenAI] = None
+
+
+def http_timeout(read_seconds: float) -> httpx.Timeout:
+    """Upstream-specific read timeout; connect and pool-wait timeouts are shared"""
+    return httpx.Timeout(
+        read_seconds,
+        connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+        pool=settings.HTTP_POOL_TIMEOUT_SECONDS
+    )
+
+
+HTTP_CONNECTIONS_OPENED = metrics_registry.counter(
+    "propmatch_http_connections_opened_total",
+    "New TCP connections opened by each shared HTTP client - should flatten once pools are warm",
+    ["client"]
+)
+
+
+def _pool_state(client: HttpClient) -> Dict[str, int]:
+    """Active, idle and waiting counts from the client's httpcore pool"""
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    if pool is None:
+        return {"active": 0, "idle": 0, "waiting": 0}
+    connections = [connection for connection in list(pool.connections) if not connection.is_closed()]
+    idle = sum(1 for connection in connections if connection.is_idle())
+    return {
+        "active": len(connections) - idle,
+        "idle": idle,
+        "waiting": sum(1 for request in list(pool._requests) if request.is_queued())
+    }
+
+
+def _collect_pool_connections() -> Iterable[Tuple[Tuple[str, ...], float]]:
+    for name, client in list(_clients.items()):
+        for state, count in _pool_state(client).items():
+            yield (name, state), count
+
+
+metrics_registry.gauge(
+    "propmatch_http_pool_connections",
+    "Shared HTTP pool connections by client and state (active, idle) plus requests waiting for one",
+    ["client", "state"],
+    _collect_pool_connections
+)
+metrics_registry.gauge(
+    "propmatch_http_pool_max_connections",
+    "Connection limit of each shared HTTP pool",
+    ["client"],
+    lambda: [((name,), settings.HTTP_MAX_CONNECTIONS) for name in list(_clients)]
+)
+
+
+def _get_or_create(name: str, factory: Callable[[], HttpClient]) -> HttpClient:
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = factory()
+                logger.info(f"🔗 Shared HTTP pool '{name}' created (http2={settings.HTTP2_ENABLED})")
+    return client
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS
+    )
+
+
+def _build_sync(name: str, read_seconds: float) -> httpx.Client:
+    def trace(event: str, info: Dict[str, Any]):
+        if event == "connection.connect_tcp.complete":
+            HTTP_CONNECTIONS_OPENED.inc(client=name)
+
+    def attach_trace(request: httpx.Request):
+        request.extensions["trace"] = trace
+
+    return httpx.Client(
+        http2=settings.HTTP2_ENABLED,
+        limits=_limits(),
+        timeout=http_timeout(read_seconds),
+        event_hooks={"request": [attach_trace]}
+    )
+
+
+def _build_async(name: str, read_seconds: float) -> httpx.AsyncClient:
+    async def trace(event: str, info: Dict[str, Any]):
+        if event == "connection.connect_tcp.complete":
+            HTTP_CONNECTIONS_OPENED.inc(client=name)
+
+    async def attach_trace(request: httpx.Request):
+        request.extensions["trace"] = trace
+
+    return httpx.AsyncClient(
+        http2=settings.HTTP2_ENABLED,
+        limits=_limits(),
+        timeout=http_timeout(read_seconds),
+        event_hooks={"request": [attach_trace]}
+    )
+
+
+def openai_chat_http_client() -> httpx.AsyncClient:
+    """Async pool for chat completions - AI rerank and the LangChain explanation clients"""
+    return _get_or_create(
+        "openai_chat", lambda: _build_async("openai_chat", settings.OPENAI_CHAT_READ_TIMEOUT_SECONDS)
+    )
+
+
+def openai_embeddings_http_client() -> httpx.Client:
+    """Sync pool for embeddings - LangChain embeds on worker threads"""
+    return _get_or_create(
+        "openai_embeddings", lambda: _build_sync("openai_embeddings", settings.OPENAI_EMBEDDING_READ_TIMEOUT_SECONDS)
+    )
+
+
+def supabase_http_client() -> httpx.Client:
+    """Sync pool for the Supabase REST client - postgrest rebinds its base URL, so this one is not shared further"""
+    return _get_or_create(
+        "supabase", lambda: _build_sync("supabase", settings.SUPABASE_READ_TIMEOUT_SECONDS)
+    )
+
+
+def get_openai_client() -> Optional[AsyncOpenAI]:
+    """Shared AsyncOpenAI on the chat pool, LangSmith-wrapped once when tracing is on"""
+    global _openai_client
+    if not settings.OPENAI_API_KEY:
+        return None
+    if _openai_client is None:
+        # Retries are left to the caller's hedging (app/core/hedged_requests.py) so they aren't stacked
+        client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+            timeout=http_timeout(settings.OPENAI_CHAT_READ_TIMEOUT_SECONDS),
+            max_retries=0,
+            http_client=openai_chat_http_client()
+        )
+        if settings.LANGSMITH_TRACING and settings.LANGSMITH_API_KEY:
+            client = wrap_openai(client)
+        _openai_client = client
+    return _openai_client
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """Connection counts per shared pool for health endpoints"""
+    return {
+        name: {**_pool_state(client), "max": settings.HTTP_MAX_CONNECTIONS}
+        for name, client in list(_clients.items())
+    }
+
+
+async def close_clients():
+    """Close every shared pool - called on application shutdown"""
+    global _openai_client
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        _openai_client = None
+    for client in clients:
+        if isinstance(client, httpx.AsyncClient):
+            await client.aclose()
+        else:
+            client.close()
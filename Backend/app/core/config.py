@@ -31,6 +31,25 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     OPENAI_MODEL: str = "gpt-4o-mini"  # Cost-effective for explanations
     EMBEDDING_MODEL: str = "text-embedding-3-small"  # Cost-effective for embeddings
+    # Optional OpenAI-compatible endpoint (e.g. the local stand-in servers used for load testing)
+    OPENAI_BASE_URL: Optional[str] = os.getenv("OPENAI_BASE_URL") or None
+    # Hedged rerank calls: a backup request fires once the primary outlives this percentile of recent latency
+    LLM_HEDGE_ENABLED: bool = os.getenv("LLM_HEDGE_ENABLED", "true").lower() == "true"
+    LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+    LLM_HEDGE_MIN_DELAY_MS: float = float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "500"))
+    LLM_HEDGE_INITIAL_DELAY_MS: float = float(os.getenv("LLM_HEDGE_INITIAL_DELAY_MS", "4000"))  # Until latency history exists
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "2"))  # Jittered retries on rate limits, timeouts and 5xx
+    
+    # Shared HTTP connection pools for OpenAI and Supabase (app/core/clients.py)
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))  # Per pool
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "60"))
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+    HTTP_POOL_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_POOL_TIMEOUT_SECONDS", "5"))  # Waiting for a free connection
+    OPENAI_CHAT_READ_TIMEOUT_SECONDS: float = float(os.getenv("OPENAI_CHAT_READ_TIMEOUT_SECONDS", "60"))
+    OPENAI_EMBEDDING_READ_TIMEOUT_SECONDS: float = float(os.getenv("OPENAI_EMBEDDING_READ_TIMEOUT_SECONDS", "20"))
+    SUPABASE_READ_TIMEOUT_SECONDS: float = float(os.getenv("SUPABASE_READ_TIMEOUT_SECONDS", "10"))
     
     # LangSmith settings for tracing
     LANGSMITH_API_KEY: str = os.getenv("LANGSMITH_API_KEY", "")
@@ -43,10 +62,22 @@ class Settings(BaseSettings):
     # Environment is optional when using LangChain with Pinecone
     PINECONE_ENVIRONMENT: Optional[str] = os.getenv("PINECONE_ENVIRONMENT", None)
     PINECONE_INDEX_NAME: str = "propmatch-properties"
+    # Optional index host - connects directly and skips index discovery/creation
+    PINECONE_HOST: Optional[str] = os.getenv("PINECONE_HOST") or None
     
     # Redis settings (for caching) - Using Redis Cloud
     # TODO: Get your Redis URL from Redis Cloud
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    # Shared async pool (app/core/redis_pool.py) - a slow Redis costs at most these timeouts, never the event loop
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+    REDIS_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("REDIS_CONNECT_TIMEOUT_SECONDS", "2"))
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = float(os.getenv("REDIS_SOCKET_TIMEOUT_SECONDS", "2"))
+    REDIS_RETRY_AFTER_SECONDS: float = float(os.getenv("REDIS_RETRY_AFTER_SECONDS", "30"))  # Local fallback only until then
+    EXPLANATION_LOCAL_CACHE_SIZE: int = int(os.getenv("EXPLANATION_LOCAL_CACHE_SIZE", "1000"))  # Fallback entries per process
+    # Redis value encoding for the explanation and search caches (app/core/cache_codec.py): json | msgpack | msgpack-zstd
+    CACHE_CODEC: str = os.getenv("CACHE_CODEC", "msgpack-zstd")
+    CACHE_ZSTD_LEVEL: int = int(os.getenv("CACHE_ZSTD_LEVEL", "3"))
+    CACHE_DICTIONARY_DIR: str = os.getenv("CACHE_DICTIONARY_DIR", "models/cache_dictionaries")  # <cache>.zdict, trained per cache
     
     # Security settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
@@ -64,6 +95,43 @@ class Settings(BaseSettings):
     MAX_SEARCH_RESULTS: int = 50
     DEFAULT_PAGE_SIZE: int = 20
     CACHE_TTL_SECONDS: int = 3600  # 1 hour
+    SEARCH_CACHE_TTL_SECONDS: int = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", "600"))  # Ranked lists for paging
+    SEARCH_CACHE_PREFETCH: bool = os.getenv("SEARCH_CACHE_PREFETCH", "true").lower() == "true"
+    SEARCH_DEADLINE_MS: int = int(os.getenv("SEARCH_DEADLINE_MS", "3000"))  # Default budget for adaptive search
+    
+    # Local CPU ranker distilled from LLM rerank scores
+    RERANK_FEATURE_LOG_PATH: Optional[str] = os.getenv("RERANK_FEATURE_LOG_PATH") or None  # JSONL training log, off when unset
+    RERANK_FEATURE_LOG_SAMPLE_RATE: float = float(os.getenv("RERANK_FEATURE_LOG_SAMPLE_RATE", "1.0"))
+    LOCAL_RANKER_PATH: str = os.getenv("LOCAL_RANKER_PATH", "models/local_ranker.json")
+    # off | local (never call the LLM) | gate (LLM only for low-confidence queries) | head (LLM rescores the top few)
+    LOCAL_RERANK_MODE: str = os.getenv("LOCAL_RERANK_MODE", "off")
+    LOCAL_RERANK_LLM_HEAD: int = int(os.getenv("LOCAL_RERANK_LLM_HEAD", "6"))
+    LOCAL_RERANK_CONFIDENT_MARGIN: float = float(os.getenv("LOCAL_RERANK_CONFIDENT_MARGIN", "1.0"))  # In units of the ranker's held-out RMSE
+    
+    # POI gazetteer built by scripts/build_poi_gazetteer.py - proximity boosts are off until it loads
+    POI_GAZETTEER_PATH: str = os.getenv("POI_GAZETTEER_PATH", "models/poi_gazetteer.npz")
+    # Score factor when a listing with POI data doesn't list the place the query names (1.0 = neutral)
+    POI_UNLISTED_TARGET_FACTOR: float = float(os.getenv("POI_UNLISTED_TARGET_FACTOR", "1.0"))
+    
+    # Rerank call also writes short explanations for the top results into the explanation cache
+    RERANK_EXPLANATIONS_ENABLED: bool = os.getenv("RERANK_EXPLANATIONS_ENABLED", "false").lower() == "true"
+    RERANK_EXPLANATIONS_TOP_N: int = int(os.getenv("RERANK_EXPLANATIONS_TOP_N", "3"))  # Per search (and per rerank batch)
+    
+    # Background pre-generation of explanations for the top results of each search
+    EXPLANATION_PREFETCH_ENABLED: bool = os.getenv("EXPLANATION_PREFETCH_ENABLED", "false").lower() == "true"
+    EXPLANATION_PREFETCH_TOP_N: int = int(os.getenv("EXPLANATION_PREFETCH_TOP_N", "3"))
+    EXPLANATION_PREFETCH_WORKERS: int = int(os.getenv("EXPLANATION_PREFETCH_WORKERS", "2"))  # Concurrent LLM calls
+    EXPLANATION_PREFETCH_QUEUE_SIZE: int = int(os.getenv("EXPLANATION_PREFETCH_QUEUE_SIZE", "30"))  # Oldest jobs dropped beyond this
+    EXPLANATION_PREFETCH_MAX_AGE_SECONDS: float = float(os.getenv("EXPLANATION_PREFETCH_MAX_AGE_SECONDS", "60"))
+    EXPLANATION_PREFETCH_TOKENS_PER_MINUTE: int = int(os.getenv("EXPLANATION_PREFETCH_TOKENS_PER_MINUTE", "60000"))
+    
+    # Near-duplicate queries reuse a listing's cached explanation (app/services/semantic_explanation_cache.py)
+    SEMANTIC_EXPLANATION_CACHE_ENABLED: bool = os.getenv("SEMANTIC_EXPLANATION_CACHE_ENABLED", "false").lower() == "true"
+    SEMANTIC_EXPLANATION_THRESHOLD: float = float(os.getenv("SEMANTIC_EXPLANATION_THRESHOLD", "0.9"))  # Query cosine similarity
+    SEMANTIC_EXPLANATION_DIMENSIONS: int = int(os.getenv("SEMANTIC_EXPLANATION_DIMENSIONS", "256"))  # Shortened text-embedding-3 vectors
+    SEMANTIC_EXPLANATION_MAX_QUERIES_PER_LISTING: int = int(os.getenv("SEMANTIC_EXPLANATION_MAX_QUERIES_PER_LISTING", "200"))
+    SEMANTIC_EXPLANATION_AUDIT_RATE: float = float(os.getenv("SEMANTIC_EXPLANATION_AUDIT_RATE", "0.05"))  # Reuses regenerated to check
+    SEMANTIC_EXPLANATION_AUDIT_AGREEMENT: float = float(os.getenv("SEMANTIC_EXPLANATION_AUDIT_AGREEMENT", "0.9"))  # Below = false reuse
     
     model_config = ConfigDict(
         env_file=".env",
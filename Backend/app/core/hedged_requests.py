@@ -0,0 +1,138 @@
+"""
+Hedged LLM Requests for PropMatch
+Races a backup request against a slow primary once it outlives a high
+percentile of that model's recent latency, starts the next fallback model as
+soon as an attempt fails instead of after the chain ahead of it, and retries
+transient errors with jittered backoff. First answer wins; the rest are cancelled
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Sequence, Tuple, TypeVar
+
+import openai
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+from app.core.config import settings
+from app.core.metrics import LatencyWindow, metrics_registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Worth retrying the same model; anything else (bad request, unknown model) moves down the chain
+TRANSIENT_ERRORS = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+
+LLM_CALL_LATENCY = metrics_registry.histogram(
+    "propmatch_llm_call_duration_seconds",
+    "Latency of successful LLM completions by model",
+    ["model"]
+)
+LLM_CANCELLED_ATTEMPT_LATENCY = metrics_registry.histogram(
+    "propmatch_llm_cancelled_attempt_duration_seconds",
+    "How long LLM attempts had run when cancelled (lost the race or the caller gave up) - a lower bound on their latency",
+    ["model"]
+)
+LLM_ATTEMPTS = metrics_registry.counter(
+    "propmatch_llm_attempts_total",
+    "LLM attempts by model, role (primary, hedge, fallback) and outcome (won, failed, cancelled)",
+    ["model", "role", "outcome"]
+)
+
+
+class HedgedCaller:
+    """Runs one logical LLM call across a model chain with hedging, parallel fallback and retries"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latency: Dict[str, LatencyWindow] = {}
+
+    def _window(self, model: str) -> LatencyWindow:
+        window = self.latency.get(model)
+        if window is None:
+            window = self.latency[model] = LatencyWindow(seed_ms=settings.LLM_HEDGE_INITIAL_DELAY_MS)
+        return window
+
+    def hedge_delay_ms(self, model: str) -> float:
+        """How long the primary gets before a backup is fired"""
+        return max(settings.LLM_HEDGE_MIN_DELAY_MS, self._window(model).percentile(settings.LLM_HEDGE_PERCENTILE))
+
+    async def call(self, models: Sequence[str], make_request: Callable[[str], Awaitable[T]]) -> Tuple[T, str]:
+        """
+        Returns (response, model that answered). `models` is the fallback chain,
+        primary first; `make_request(model)` issues one request. Raises the last
+        error when every attempt fails.
+        """
+        chain = list(dict.fromkeys(models))
+        primary = chain[0]
+        attempts: Dict[asyncio.Future, Tuple[str, str]] = {}
+        next_fallback = 1
+        last_error: BaseException = RuntimeError(f"{self.name}: no attempts made")
+
+        def launch(model: str, role: str):
+            attempts[asyncio.ensure_future(self._attempt(model, make_request))] = (model, role)
+
+        loop = asyncio.get_running_loop()
+        launch(primary, "primary")
+        hedge_at = loop.time() + self.hedge_delay_ms(primary) / 1000 if settings.LLM_HEDGE_ENABLED else None
+
+        try:
+            while attempts:
+                timeout = max(0.0, hedge_at - loop.time()) if hedge_at is not None else None
+                done, _ = await asyncio.wait(attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    hedge_at = None
+                    logger.info(f"⏱️ {self.name}: {primary} slower than {self.hedge_delay_ms(primary):.0f}ms, hedging")
+                    launch(primary, "hedge")
+                    continue
+
+                for task in done:
+                    model, role = attempts.pop(task)
+                    if task.exception() is None:
+                        LLM_ATTEMPTS.inc(model=model, role=role, outcome="won")
+                        return task.result(), model
+
+                    last_error = task.exception()
+                    LLM_ATTEMPTS.inc(model=model, role=role, outcome="failed")
+                    logger.warning(f"{self.name}: {role} attempt on {model} failed: {last_error}")
+                    # The primary is out - hedging it no longer makes sense, start the next model now
+                    hedge_at = None
+                    if next_fallback < len(chain):
+                        launch(chain[next_fallback], "fallback")
+                        next_fallback += 1
+            raise last_error
+        finally:
+            for task, (model, role) in attempts.items():
+                task.cancel()
+                LLM_ATTEMPTS.inc(model=model, role=role, outcome="cancelled")
+
+    async def _attempt(self, model: str, make_request: Callable[[str], Awaitable[T]]) -> T:
+        async for attempt in AsyncRetrying(
+            retry=retry_if_exception_type(TRANSIENT_ERRORS),
+            wait=wait_random_exponential(multiplier=0.25, max=2),
+            stop=stop_after_attempt(settings.LLM_MAX_RETRIES + 1),
+            reraise=True
+        ):
+            with attempt:
+                start = time.perf_counter()
+                try:
+                    response = await make_request(model)
+                except asyncio.CancelledError:
+                    # Lost the race - how long it ran is a lower bound on this model's latency. Leaving it
+                    # out would fill the window with winners only and talk the hedge delay down
+                    elapsed = time.perf_counter() - start
+                    self._window(model).observe(elapsed * 1000)
+                    LLM_CANCELLED_ATTEMPT_LATENCY.observe(elapsed, model=model)
+                    raise
+                elapsed = time.perf_counter() - start
+                self._window(model).observe(elapsed * 1000)
+                LLM_CALL_LATENCY.observe(elapsed, model=model)
+                return response
+
+    def latency_summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            model: {"samples": len(window), "hedge_delay_ms": round(self.hedge_delay_ms(model), 1)}
+            for model, window in self.latency.items()
+        }
@@ -0,0 +1,209 @@
+"""
+LLM Usage Accounting for PropMatch
+Request-scoped ledger (a ContextVar, so concurrent requests never share one) of
+every chat and embedding call - model, tokens, latency, cache status and cost.
+Services open nested scopes for their own totals; the request middleware rolls
+each finished request up into per-endpoint metrics and a rolling window.
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from app.core.metrics import metrics_registry, record_llm_tokens
+
+# USD per 1M tokens (prompt, completion) - list prices, for relative cost tracking
+MODEL_PRICES_PER_MILLION = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+
+ROLLING_WINDOW_REQUESTS = 500  # Per endpoint
+
+ENDPOINT_LLM_CALLS = metrics_registry.counter(
+    "propmatch_endpoint_llm_calls_total",
+    "LLM and embedding calls by endpoint, kind (chat, embedding), purpose and cache status (miss = called upstream)",
+    ["endpoint", "kind", "purpose", "cache"]
+)
+ENDPOINT_LLM_TOKENS = metrics_registry.counter(
+    "propmatch_endpoint_llm_tokens_total",
+    "Tokens by endpoint and kind (prompt, completion, embedding)",
+    ["endpoint", "kind"]
+)
+ENDPOINT_LLM_COST = metrics_registry.counter(
+    "propmatch_endpoint_llm_cost_usd_total",
+    "Estimated LLM and embedding spend by endpoint at list prices",
+    ["endpoint"]
+)
+ENDPOINT_LLM_LATENCY = metrics_registry.histogram(
+    "propmatch_endpoint_llm_seconds",
+    "Time spent in LLM and embedding calls per request, by endpoint",
+    ["endpoint"]
+)
+
+
+@dataclass
+class LLMCall:
+    """One chat or embedding call, or one answered from a cache instead"""
+    kind: str  # chat | embedding
+    model: str
+    purpose: str  # rerank, explanation, query_embedding, ...
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_ms: float = 0.0
+    cache: str = "miss"  # miss (called upstream) | hit
+    label: Optional[str] = None  # e.g. rerank batch
+
+    @property
+    def cost_usd(self) -> float:
+        prompt_price, completion_price = MODEL_PRICES_PER_MILLION.get(self.model, (0.0, 0.0))
+        return (self.prompt_tokens * prompt_price + self.completion_tokens * completion_price) / 1_000_000
+
+
+@dataclass
+class UsageLedger:
+    """Calls made within one scope - each call is also recorded on every enclosing scope"""
+    endpoint: str
+    parent: Optional["UsageLedger"] = None
+    calls: List[LLMCall] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+
+    def record(self, call: LLMCall):
+        self.calls.append(call)
+        if self.parent is not None:
+            self.parent.record(call)
+
+    def totals(self) -> Dict[str, Any]:
+        upstream = [call for call in self.calls if call.cache == "miss"]
+        return {
+            'calls': len(upstream),
+            'cacheHits': len(self.calls) - len(upstream),
+            'promptTokens': sum(call.prompt_tokens for call in upstream if call.kind == "chat"),
+            'completionTokens': sum(call.completion_tokens for call in upstream),
+            'embeddingTokens': sum(call.prompt_tokens for call in upstream if call.kind == "embedding"),
+            'llmMs': round(sum(call.latency_ms for call in upstream), 1),
+            'costUsd': round(sum(call.cost_usd for call in upstream), 6)
+        }
+
+    def token_usage(self) -> Dict[str, Dict[str, Any]]:
+        """Per-batch chat usage in the shape search responses have always reported"""
+        usage = {}
+        for call in self.calls:
+            if call.kind != "chat" or call.cache != "miss":
+                continue
+            usage[f"{call.model}_{call.label or call.purpose}"] = {
+                "model": call.model,
+                "prompt_tokens": call.prompt_tokens,
+                "completion_tokens": call.completion_tokens,
+                "total_tokens": call.prompt_tokens + call.completion_tokens,
+                "latency_ms": round(call.latency_ms, 1)
+            }
+        return usage
+
+
+current_usage: ContextVar[Optional[UsageLedger]] = ContextVar('current_usage', default=None)
+
+
+@contextmanager
+def usage_scope(endpoint: Optional[str] = None) -> Iterator[UsageLedger]:
+    """`with usage_scope() as usage:` - collects the calls made inside, nested in any enclosing scope"""
+    parent = current_usage.get()
+    ledger = UsageLedger(endpoint or (parent.endpoint if parent else "background"), parent)
+    token = current_usage.set(ledger)
+    try:
+        yield ledger
+    finally:
+        current_usage.reset(token)
+
+
+def record_llm_call(
+    kind: str,
+    model: str,
+    purpose: str,
+    prompt_tokens: Optional[int] = 0,
+    completion_tokens: Optional[int] = 0,
+    latency_ms: float = 0.0,
+    cache: str = "miss",
+    label: Optional[str] = None
+):
+    """Record a call on the current request's ledger (if any) and the global token counters"""
+    call = LLMCall(kind, model, purpose, prompt_tokens or 0, completion_tokens or 0, latency_ms, cache, label)
+    if kind == "chat" and cache == "miss":
+        record_llm_tokens(model, call.prompt_tokens, call.completion_tokens)
+    ledger = current_usage.get()
+    if ledger is not None:
+        ledger.record(call)
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough token count (~4 characters each) for calls whose client doesn't report usage"""
+    return sum(max(1, len(text) // 4) for text in texts if text)
+
+
+class EndpointUsageWindow:
+    """Last ROLLING_WINDOW_REQUESTS finished requests per endpoint, for rates and shares"""
+
+    def __init__(self, size: int = ROLLING_WINDOW_REQUESTS):
+        self.size = size
+        self._requests: Dict[str, Deque[Tuple[Dict[str, Any], float]]] = defaultdict(lambda: deque(maxlen=self.size))
+        self._lock = threading.Lock()
+
+    def add(self, endpoint: str, totals: Dict[str, Any], request_ms: float):
+        with self._lock:
+            self._requests[endpoint].append((totals, request_ms))
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            snapshot = {endpoint: list(requests) for endpoint, requests in self._requests.items()}
+
+        summary = {}
+        for endpoint, requests in snapshot.items():
+            count = len(requests)
+            llm_ms = sorted(totals['llmMs'] for totals, _ in requests)
+            request_ms = sum(ms for _, ms in requests)
+            calls = sum(totals['calls'] for totals, _ in requests)
+            hits = sum(totals['cacheHits'] for totals, _ in requests)
+            summary[endpoint] = {
+                'requests': count,
+                'tokens_per_request': round(sum(
+                    totals['promptTokens'] + totals['completionTokens'] + totals['embeddingTokens']
+                    for totals, _ in requests
+                ) / count, 1),
+                'llm_calls_per_request': round(calls / count, 2),
+                'llm_ms_p50': llm_ms[count // 2],
+                'llm_ms_p95': llm_ms[min(count - 1, int(count * 0.95))],
+                'llm_share_of_request_time': round(sum(llm_ms) / request_ms, 3) if request_ms else 0.0,
+                'cache_hit_rate': round(hits / (calls + hits), 3) if calls + hits else 0.0,
+                'cost_usd_per_1k_requests': round(sum(totals['costUsd'] for totals, _ in requests) / count * 1000, 4)
+            }
+        return summary
+
+
+# Global rolling window, fed by the accounting middleware
+endpoint_usage = EndpointUsageWindow()
+
+
+def finish_request(ledger: UsageLedger, endpoint: str):
+    """Roll a finished request's ledger into the per-endpoint metrics and window"""
+    for call in ledger.calls:
+        ENDPOINT_LLM_CALLS.inc(endpoint=endpoint, kind=call.kind, purpose=call.purpose, cache=call.cache)
+        if call.cache != "miss":
+            continue
+        if call.kind == "embedding":
+            ENDPOINT_LLM_TOKENS.inc(call.prompt_tokens, endpoint=endpoint, kind="embedding")
+        else:
+            ENDPOINT_LLM_TOKENS.inc(call.prompt_tokens, endpoint=endpoint, kind="prompt")
+            ENDPOINT_LLM_TOKENS.inc(call.completion_tokens, endpoint=endpoint, kind="completion")
+        ENDPOINT_LLM_COST.inc(call.cost_usd, endpoint=endpoint)
+
+    totals = ledger.totals()
+    if ledger.calls:
+        ENDPOINT_LLM_LATENCY.observe(totals['llmMs'] / 1000, endpoint=endpoint)
+    endpoint_usage.add(endpoint, totals, (time.perf_counter() - ledger.started) * 1000)
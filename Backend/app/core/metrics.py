@@ -0,0 +1,259 @@
+"""
+Request Instrumentation for PropMatch
+In-process Prometheus-compatible counters and histograms for per-stage search
+latency, cache lookups and LLM token usage, rendered by the /metrics endpoint
+"""
+
+import bisect
+import math
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Latency buckets (seconds) - fine-grained at the low end where scoring and cache lookups live
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Pipeline the current request is running, so shared services label their stages correctly
+current_pipeline: ContextVar[str] = ContextVar('current_pipeline', default='search')
+
+
+def _format_labels(label_names: Sequence[str], label_values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.label_names), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(str(labels[name]) for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def render(self) -> List[str]:
+        lines = []
+        with self._lock:
+            series = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._series.items())
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Point-in-time value with labels, read from `collect` at scrape time - for state owned elsewhere
+    (connection pools, queues) that would otherwise need updating on every change"""
+
+    metric_type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str],
+        collect: Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(self.collect())
+        ]
+
+
+class MetricsRegistry:
+    """Holds every metric and renders the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, label_names, buckets))
+
+    def gauge(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str],
+        collect: Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]
+    ) -> Gauge:
+        return self._register(Gauge(name, help_text, label_names, collect))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry and the metrics every pipeline shares
+metrics_registry = MetricsRegistry()
+
+STAGE_LATENCY = metrics_registry.histogram(
+    "propmatch_stage_duration_seconds",
+    "Latency of each search pipeline stage",
+    ["pipeline", "stage"]
+)
+CACHE_LOOKUPS = metrics_registry.counter(
+    "propmatch_cache_lookups_total",
+    "Cache lookups by cache and result (hit, miss, error)",
+    ["cache", "result"]
+)
+LLM_TOKENS = metrics_registry.counter(
+    "propmatch_llm_tokens_total",
+    "LLM tokens consumed by model and kind (prompt, completion)",
+    ["model", "kind"]
+)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class stage_timer:
+    """Time a pipeline stage: `with stage_timer("vector_query"):` - works in sync and async code"""
+
+    __slots__ = ('stage', 'pipeline', 'start', 'elapsed')
+
+    def __init__(self, stage: str, pipeline: Optional[str] = None):
+        self.stage = stage
+        self.pipeline = pipeline
+        self.elapsed = 0.0
+
+    def __enter__(self) -> "stage_timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self.start
+        STAGE_LATENCY.observe(self.elapsed, pipeline=self.pipeline or current_pipeline.get(), stage=self.stage)
+        return False
+
+    @property
+    def elapsed_ms(self) -> float:
+        return round(self.elapsed * 1000, 1)
+
+
+class LatencyWindow:
+    """Recent latencies (ms) for budgeting decisions - until `min_samples` arrive the seed stands in,
+    so one fast call can't talk a budget down"""
+
+    def __init__(self, seed_ms: float, window: int = 100, min_samples: int = 5):
+        self.seed_ms = seed_ms
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+
+    def observe(self, elapsed_ms: float):
+        self._samples.append(elapsed_ms)
+
+    def percentile(self, q: float) -> float:
+        samples = sorted(self._samples)
+        if len(samples) < self.min_samples:
+            return max([self.seed_ms, *samples])
+        return samples[min(len(samples) - 1, max(0, math.ceil(q / 100 * len(samples)) - 1))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+def record_cache_lookup(cache: str, result: str):
+    """Count a cache lookup - result is 'hit', 'miss' or 'error'"""
+    CACHE_LOOKUPS.inc(cache=cache, result=result)
+
+
+def record_llm_tokens(model: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+    """Count LLM tokens for one completion"""
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, model=model, kind="completion")
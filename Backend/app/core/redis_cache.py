@@ -6,81 +6,115 @@ Integrates with LangChain for intelligent caching of property explanations
 import logging
 import redis
 import hashlib
-import json
-from typing import Optional, Dict, Any
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Iterable, List, Tuple
 from langchain_community.cache import RedisCache
 from langchain.globals import set_llm_cache
 
+from app.core.cache_codec import CacheCodecError, get_cache_codec
 from app.core.config import settings
+from app.core.metrics import metrics_registry, stage_timer, record_cache_lookup
+from app.core.redis_pool import REDIS_UNAVAILABLE_ERRORS, fix_redis_url, get_async_redis, redis_pool_stats
 
 logger = logging.getLogger(__name__)
 
+KEY_BATCH_SIZE = 500  # Keys per DEL/UNLINK command and per SCAN step
+
 class PropertyExplanationCache:
-    """Redis-based cache service for AI property explanations"""
+    """
+    Explanation cache on the shared async Redis pool - lookups and writes never
+    block the event loop, and a page of explanations is one round-trip. While
+    Redis is unreachable a bounded in-process LRU stands in, and Redis is
+    retried after REDIS_RETRY_AFTER_SECONDS.
+    """
     
     def __init__(self):
-        self.redis_client = None
+        self.redis_client = get_async_redis()
+        self.codec = get_cache_codec("explanation")
         self.langchain_cache = None
         self.cache_hits = 0
         self.cache_misses = 0
         self.cache_prefix = "propmatch:explanation:"
+        # Per-listing set of its explanation keys - entry keys are prefix + md5 hex, so these never collide
+        self.index_prefix = f"{self.cache_prefix}listing:"
+        # Per-listing hash of cache key -> query embedding, for near-duplicate lookups (semantic_explanation_cache)
+        self.vectors_prefix = f"{self.cache_prefix}vectors:"
         self.ttl_seconds = 86400 * 7  # 7 days cache TTL
+        self.max_local_entries = settings.EXPLANATION_LOCAL_CACHE_SIZE
+        self._local: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._retry_redis_at = 0.0
         
-        self._initialize_redis()
-        
-    def _fix_redis_url(self, url: str) -> str:
-        """Fix Redis URL to ensure proper scheme"""
-        if not url:
-            return "redis://localhost:6379/0"
-        
-        # If URL doesn't start with a scheme, add redis://
-        if not url.startswith(('redis://', 'rediss://', 'unix://')):
-            # If it looks like it has auth info, use rediss:// for security
-            if '@' in url:
-                return f"rediss://{url}"
-            else:
-                return f"redis://{url}"
-        
-        return url
+        self._initialize_langchain_cache()
         
-    def _initialize_redis(self):
-        """Initialize Redis connection and LangChain cache"""
+    def _initialize_langchain_cache(self):
+        """LangChain's LLM cache is synchronous - enabled only if Redis answers at startup"""
         try:
             if not settings.REDIS_URL:
-                logger.warning("Redis URL not configured - caching disabled")
+                logger.warning("Redis URL not configured - explanations cached in-process only")
                 return
             
             # Fix the Redis URL format
-            fixed_redis_url = self._fix_redis_url(settings.REDIS_URL)
+            fixed_redis_url = fix_redis_url(settings.REDIS_URL)
             logger.info(f"Attempting Redis connection to: {fixed_redis_url.split('@')[0]}@***" if '@' in fixed_redis_url else fixed_redis_url)
             
-            # Initialize Redis client
-            self.redis_client = redis.from_url(
+            langchain_redis = redis.from_url(
                 fixed_redis_url,
-                decode_responses=True,
-                socket_connect_timeout=5,
-                socket_timeout=5,
-                retry_on_timeout=True,
-                health_check_interval=30
+                decode_responses=False,  # LangChain needs binary mode
+                socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS
             )
-            
-            # Test connection
-            self.redis_client.ping()
+            langchain_redis.ping()
             logger.info("Redis connected successfully!")
             
             # Initialize LangChain Redis cache
-            self.langchain_cache = RedisCache(
-                redis_=redis.from_url(fixed_redis_url, decode_responses=False)  # LangChain needs binary mode
-            )
+            self.langchain_cache = RedisCache(redis_=langchain_redis)
             set_llm_cache(self.langchain_cache)
             logger.info("LangChain Redis cache initialized")
             
         except Exception as e:
             logger.warning(f"Redis initialization failed: {e}")
-            logger.info("Explanation service will run without caching")
-            self.redis_client = None
+            logger.info("LangChain LLM cache disabled - explanations use the in-process fallback until Redis answers")
             self.langchain_cache = None
     
+    # ---- Redis availability and local fallback --------------------------
+    
+    def _redis(self):
+        """The async client, or None while Redis is unconfigured or marked down"""
+        if self.redis_client is None or time.monotonic() < self._retry_redis_at:
+            return None
+        return self.redis_client
+    
+    @property
+    def redis_available(self) -> bool:
+        return self._redis() is not None
+    
+    def _mark_redis_down(self, error: Exception):
+        if time.monotonic() >= self._retry_redis_at:
+            logger.warning(f"Explanation cache Redis unavailable ({error}) - using in-process fallback "
+                           f"for {settings.REDIS_RETRY_AFTER_SECONDS:.0f}s")
+        self._retry_redis_at = time.monotonic() + settings.REDIS_RETRY_AFTER_SECONDS
+    
+    def _local_get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        entry = self._local.get(cache_key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._local[cache_key]
+            return None
+        self._local.move_to_end(cache_key)
+        return value
+    
+    def _local_set(self, cache_key: str, value: Dict[str, Any], overwrite: bool = True) -> bool:
+        if not overwrite and self._local_get(cache_key) is not None:
+            return False
+        self._local[cache_key] = (time.monotonic() + self.ttl_seconds, value)
+        self._local.move_to_end(cache_key)
+        while len(self._local) > self.max_local_entries:
+            self._local.popitem(last=False)
+        return True
+    
     def _generate_cache_key(self, search_query: str, listing_number: str) -> str:
         """Generate unique cache key for query + property combination"""
         
@@ -90,96 +124,310 @@ class PropertyExplanationCache:
         
         return f"{self.cache_prefix}{cache_hash}"
     
-    async def get_explanation(self, search_query: str, listing_number: str) -> Optional[Dict[str, Any]]:
-        """Get cached explanation for query + property combination"""
-        
-        if not self.redis_client:
+    def _listing_index_key(self, listing_number: str) -> str:
+        return f"{self.index_prefix}{listing_number}"
+    
+    def _query_vectors_key(self, listing_number: str) -> str:
+        return f"{self.vectors_prefix}{listing_number}"
+    
+    def _is_entry_key(self, key: str) -> bool:
+        return not key.startswith((self.index_prefix, self.vectors_prefix))
+    
+    def _decode(self, raw: Optional[bytes]) -> Optional[Dict[str, Any]]:
+        """A stored entry (any codec format, or legacy JSON), or None if absent or unreadable"""
+        if not raw:
             return None
-        
         try:
-            cache_key = self._generate_cache_key(search_query, listing_number)
-            cached_data = self.redis_client.get(cache_key)
-            
-            if cached_data:
-                self.cache_hits += 1
-                logger.info(f"Cache HIT for property {listing_number} (query: {search_query[:50]}...)")
-                return json.loads(cached_data)
-            else:
-                self.cache_misses += 1
-                logger.info(f"Cache MISS for property {listing_number} (query: {search_query[:50]}...)")
-                return None
-                
-        except Exception as e:
-            logger.error(f"Error retrieving from cache: {e}")
+            return self.codec.decode(raw)
+        except CacheCodecError as e:
+            logger.warning(f"Ignoring unreadable explanation cache entry: {e}")
             return None
     
-    async def set_explanation(self, search_query: str, listing_number: str, explanation: Dict[str, Any]) -> bool:
-        """Cache explanation for query + property combination"""
+    def _record_lookup(self, search_query: str, listing_number: str, cached: Optional[Dict[str, Any]]):
+        if cached:
+            self.cache_hits += 1
+            record_cache_lookup("explanation", "hit")
+            logger.info(f"Cache HIT for property {listing_number} (query: {search_query[:50]}...)")
+        else:
+            self.cache_misses += 1
+            record_cache_lookup("explanation", "miss")
+            logger.info(f"Cache MISS for property {listing_number} (query: {search_query[:50]}...)")
+    
+    async def get_explanation(self, search_query: str, listing_number: str) -> Optional[Dict[str, Any]]:
+        """Get cached explanation for query + property combination"""
+        return (await self.get_explanations(search_query, [listing_number]))[listing_number]
+    
+    async def get_explanations(self, search_query: str, listing_numbers: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Cached explanations for several listings of one search in a single MGET"""
+        listing_numbers = list(dict.fromkeys(listing_numbers))
+        keys = [self._generate_cache_key(search_query, listing_number) for listing_number in listing_numbers]
+        if not keys:
+            return {}
         
-        if not self.redis_client:
-            return False
+        client = self._redis()
+        with stage_timer("cache_lookup"):
+            if client is not None:
+                try:
+                    raw_values = await client.mget(keys)
+                    values = [self._decode(raw) for raw in raw_values]
+                except REDIS_UNAVAILABLE_ERRORS as e:
+                    self._mark_redis_down(e)
+                    record_cache_lookup("explanation", "error")
+                    values = [self._local_get(key) for key in keys]
+                except redis.RedisError as e:
+                    logger.error(f"Error retrieving from cache: {e}")
+                    record_cache_lookup("explanation", "error")
+                    values = [None] * len(keys)
+            else:
+                values = [self._local_get(key) for key in keys]
         
+        results = {}
+        for listing_number, value in zip(listing_numbers, values):
+            self._record_lookup(search_query, listing_number, value)
+            results[listing_number] = value
+        return results
+    
+    async def has_explanation(self, search_query: str, listing_number: str) -> bool:
+        """Whether an explanation is cached - a plain EXISTS, not counted as a lookup"""
+        cache_key = self._generate_cache_key(search_query, listing_number)
+        client = self._redis()
+        if client is None:
+            return self._local_get(cache_key) is not None
         try:
+            return bool(await client.exists(cache_key))
+        except REDIS_UNAVAILABLE_ERRORS as e:
+            self._mark_redis_down(e)
+            return self._local_get(cache_key) is not None
+        except redis.RedisError as e:
+            logger.error(f"Error checking explanation cache: {e}")
+            return False
+    
+    async def set_explanation(
+        self,
+        search_query: str,
+        listing_number: str,
+        explanation: Dict[str, Any],
+        source: str = "explanation",
+        overwrite: bool = True
+    ) -> bool:
+        """
+        Cache explanation for query + property combination. `source` records what
+        wrote it (explanation service, rerank or prefetch); with overwrite=False
+        an existing entry is kept
+        """
+        written = await self.set_explanations(search_query, {listing_number: explanation}, source, overwrite)
+        return written[listing_number]
+    
+    async def set_explanations(
+        self,
+        search_query: str,
+        explanations: Dict[str, Dict[str, Any]],
+        source: str = "explanation",
+        overwrite: bool = True
+    ) -> Dict[str, bool]:
+        """
+        Cache explanations for several listings of one search in one pipelined
+        round-trip, adding each key to its listing's index set for invalidation
+        """
+        entries = {}
+        for listing_number, explanation in explanations.items():
             cache_key = self._generate_cache_key(search_query, listing_number)
-            
-            # Add metadata
-            cache_data = {
+            # Add metadata - the query and key are already inside the explanation and the key name
+            entries[listing_number] = (cache_key, {
                 "explanation": explanation,
-                "search_query": search_query,
                 "listing_number": listing_number,
-                "cached_at": json.dumps(None),  # Will be handled by Redis
-                "cache_key": cache_key
+                "cached_at": time.time(),
+                "source": source
+            })
+        
+        client = self._redis()
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for listing_number, (cache_key, cache_data) in entries.items():
+                    # Store with TTL - the index outlives every key it holds, and SADD is idempotent
+                    index_key = self._listing_index_key(listing_number)
+                    pipe.set(cache_key, self.codec.encode(cache_data), ex=self.ttl_seconds, nx=not overwrite)
+                    pipe.sadd(index_key, cache_key)
+                    pipe.expire(index_key, self.ttl_seconds)
+                results = await pipe.execute()
+                # SET results are every third reply
+                written = {listing_number: bool(result) for listing_number, result in zip(entries, results[::3])}
+            except REDIS_UNAVAILABLE_ERRORS as e:
+                self._mark_redis_down(e)
+                client = None
+            except redis.RedisError as e:
+                logger.error(f"Error caching explanation: {e}")
+                return {listing_number: False for listing_number in entries}
+        if client is None:
+            written = {
+                listing_number: self._local_set(cache_key, cache_data, overwrite)
+                for listing_number, (cache_key, cache_data) in entries.items()
             }
-            
-            # Store with TTL
-            success = self.redis_client.setex(
-                cache_key,
-                self.ttl_seconds,
-                json.dumps(cache_data)
-            )
-            
+        
+        for listing_number, success in written.items():
             if success:
-                logger.info(f"Cached explanation for property {listing_number} (TTL: {self.ttl_seconds}s)")
-                return True
+                logger.info(f"Cached explanation for property {listing_number} (TTL: {self.ttl_seconds}s, source: {source})")
+            elif not overwrite:
+                logger.info(f"Kept existing cached explanation for property {listing_number}")
             else:
                 logger.warning(f"Failed to cache explanation for property {listing_number}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error caching explanation: {e}")
+        return written
+    
+    async def add_query_vector(self, search_query: str, listing_number: str, vector: bytes) -> bool:
+        """
+        Remember the query embedding of a cached explanation under its listing.
+        Beyond SEMANTIC_EXPLANATION_MAX_QUERIES_PER_LISTING random entries are
+        evicted, so a listing's near-duplicate lookup stays one bounded HGETALL
+        """
+        client = self._redis()
+        if client is None:
+            return False
+        
+        vectors_key = self._query_vectors_key(listing_number)
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.hset(vectors_key, self._generate_cache_key(search_query, listing_number), vector)
+            pipe.expire(vectors_key, self.ttl_seconds)
+            pipe.hlen(vectors_key)
+            _, _, size = await pipe.execute()
+            
+            excess = size - settings.SEMANTIC_EXPLANATION_MAX_QUERIES_PER_LISTING
+            if excess > 0:
+                evicted = await client.hrandfield(vectors_key, excess)
+                if evicted:
+                    await client.hdel(vectors_key, *evicted)
+            return True
+        except REDIS_UNAVAILABLE_ERRORS as e:
+            self._mark_redis_down(e)
             return False
+        except redis.RedisError as e:
+            logger.error(f"Error storing query embedding for property {listing_number}: {e}")
+            return False
+    
+    async def get_query_vectors(self, listing_number: str) -> Dict[str, bytes]:
+        """Cache key -> query embedding for every remembered query of a listing"""
+        client = self._redis()
+        if client is None:
+            return {}
+        try:
+            vectors = await client.hgetall(self._query_vectors_key(listing_number))
+            return {key.decode(): vector for key, vector in vectors.items()}
+        except REDIS_UNAVAILABLE_ERRORS as e:
+            self._mark_redis_down(e)
+            return {}
+        except redis.RedisError as e:
+            logger.error(f"Error reading query embeddings for property {listing_number}: {e}")
+            return {}
+    
+    async def get_entry(self, listing_number: str, cache_key: str) -> Optional[Dict[str, Any]]:
+        """
+        An entry by its cache key (a near-duplicate match) - not counted as a
+        lookup. An expired entry's embedding is dropped from the listing
+        """
+        client = self._redis()
+        if client is None:
+            return None
+        try:
+            entry = self._decode(await client.get(cache_key))
+            if entry is None:
+                await client.hdel(self._query_vectors_key(listing_number), cache_key)
+            return entry
+        except REDIS_UNAVAILABLE_ERRORS as e:
+            self._mark_redis_down(e)
+            return None
+        except redis.RedisError as e:
+            logger.error(f"Error retrieving from cache: {e}")
+            return None
     
     async def invalidate_property_explanations(self, listing_number: str) -> int:
-        """Invalidate all cached explanations for a specific property"""
+        """
+        Invalidate all cached explanations for a specific property - reads and
+        drops its index set and query embeddings atomically, then deletes the
+        keys it held, so the cost depends on that listing's entries and not on
+        the cache size
+        """
         
-        if not self.redis_client:
-            return 0
+        deleted_count = 0
+        for cache_key, (_, data) in list(self._local.items()):
+            if data.get("listing_number") == listing_number:
+                del self._local[cache_key]
+                deleted_count += 1
+        
+        client = self._redis()
+        if client is None:
+            return deleted_count
         
+        index_key = self._listing_index_key(listing_number)
         try:
-            # Find all keys containing this listing number
-            pattern = f"{self.cache_prefix}*"
-            keys = self.redis_client.keys(pattern)
+            # MULTI/EXEC - a key written meanwhile lands in a fresh index set instead of being lost
+            pipe = client.pipeline(transaction=True)
+            pipe.smembers(index_key)
+            pipe.delete(index_key, self._query_vectors_key(listing_number))
+            cache_keys, _ = await pipe.execute()
             
-            deleted_count = 0
-            for key in keys:
-                try:
-                    cached_data = self.redis_client.get(key)
-                    if cached_data:
-                        data = json.loads(cached_data)
-                        if data.get("listing_number") == listing_number:
-                            self.redis_client.delete(key)
-                            deleted_count += 1
-                except:
-                    continue
+            cache_keys = list(cache_keys)
+            if cache_keys:
+                pipe = client.pipeline(transaction=False)
+                for start in range(0, len(cache_keys), KEY_BATCH_SIZE):
+                    pipe.delete(*cache_keys[start:start + KEY_BATCH_SIZE])
+                deleted_count += sum(await pipe.execute())
             
             logger.info(f"Invalidated {deleted_count} cached explanations for property {listing_number}")
             return deleted_count
             
-        except Exception as e:
+        except REDIS_UNAVAILABLE_ERRORS as e:
+            self._mark_redis_down(e)
+            logger.error(f"Error invalidating cache for property {listing_number}: {e}")
+            return deleted_count
+        except redis.RedisError as e:
             logger.error(f"Error invalidating cache for property {listing_number}: {e}")
+            return deleted_count
+    
+    async def rebuild_listing_index(self) -> int:
+        """
+        Index entries written before the per-listing sets existed - walks the
+        cache with SCAN, so Redis keeps serving while it runs. Returns keys indexed
+        """
+        
+        client = self._redis()
+        if client is None:
             return 0
+        
+        indexed = 0
+        batch: List[str] = []
+        
+        async def index_batch(keys: List[str]) -> int:
+            pipe = client.pipeline(transaction=False)
+            count = 0
+            for key, raw in zip(keys, await client.mget(keys)):
+                data = self._decode(raw)
+                listing_number = data.get("listing_number") if isinstance(data, dict) else None
+                if not listing_number:
+                    continue
+                index_key = self._listing_index_key(str(listing_number))
+                pipe.sadd(index_key, key)
+                pipe.expire(index_key, self.ttl_seconds)
+                count += 1
+            if count:
+                await pipe.execute()
+            return count
+        
+        async for key in client.scan_iter(match=f"{self.cache_prefix}*", count=KEY_BATCH_SIZE):
+            key = key.decode()
+            if not self._is_entry_key(key):
+                continue
+            batch.append(key)
+            if len(batch) >= KEY_BATCH_SIZE:
+                indexed += await index_batch(batch)
+                batch = []
+        if batch:
+            indexed += await index_batch(batch)
+        
+        logger.info(f"Indexed {indexed} cached explanations by listing")
+        return indexed
     
-    def get_cache_stats(self) -> Dict[str, Any]:
+    async def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache performance statistics"""
         
         total_requests = self.cache_hits + self.cache_misses
@@ -190,45 +438,81 @@ class PropertyExplanationCache:
             "cache_misses": self.cache_misses,
             "total_requests": total_requests,
             "hit_rate_percentage": round(hit_rate, 2),
-            "redis_connected": self.redis_client is not None,
-            "langchain_cache_enabled": self.langchain_cache is not None
+            "redis_connected": self.redis_available,
+            "langchain_cache_enabled": self.langchain_cache is not None,
+            "local_fallback_entries": len(self._local),
+            "redis_pool": redis_pool_stats()
         }
         
         # Get Redis info if available
-        if self.redis_client:
+        client = self._redis()
+        if client is not None:
             try:
-                redis_info = self.redis_client.info()
+                redis_info = await client.info()
                 stats["redis_info"] = {
                     "used_memory_human": redis_info.get("used_memory_human"),
                     "connected_clients": redis_info.get("connected_clients"),
                     "total_commands_processed": redis_info.get("total_commands_processed")
                 }
-            except:
+            except REDIS_UNAVAILABLE_ERRORS as e:
+                self._mark_redis_down(e)
+                stats["redis_connected"] = False
+                stats["redis_info"] = "unavailable"
+            except redis.RedisError:
                 stats["redis_info"] = "unavailable"
         
         return stats
     
     async def clear_all_explanations(self) -> int:
-        """Clear all explanation cache entries (for maintenance)"""
+        """
+        Clear all explanation cache entries and listing indexes (for maintenance) -
+        SCAN in batches with UNLINK, so Redis never blocks on one huge command
+        """
         
-        if not self.redis_client:
-            return 0
+        local_count = len(self._local)
+        self._local.clear()
+        
+        client = self._redis()
+        if client is None:
+            return local_count
         
         try:
-            pattern = f"{self.cache_prefix}*"
-            keys = self.redis_client.keys(pattern)
+            deleted_count = 0
+            batch: List[str] = []
+            async for key in client.scan_iter(match=f"{self.cache_prefix}*", count=KEY_BATCH_SIZE):
+                batch.append(key.decode())
+                if len(batch) >= KEY_BATCH_SIZE:
+                    deleted_count += await self._unlink_entries(client, batch)
+                    batch = []
+            if batch:
+                deleted_count += await self._unlink_entries(client, batch)
             
-            if keys:
-                deleted_count = self.redis_client.delete(*keys)
+            if deleted_count:
                 logger.info(f"Cleared {deleted_count} explanation cache entries")
-                return deleted_count
             else:
                 logger.info("No explanation cache entries to clear")
-                return 0
+            return deleted_count
                 
-        except Exception as e:
+        except REDIS_UNAVAILABLE_ERRORS as e:
+            self._mark_redis_down(e)
+            logger.error(f"Error clearing explanation cache: {e}")
+            return 0
+        except redis.RedisError as e:
             logger.error(f"Error clearing explanation cache: {e}")
             return 0
+    
+    async def _unlink_entries(self, client, keys: List[str]) -> int:
+        """UNLINK a batch of keys (memory is freed off Redis' main thread), counting explanations only"""
+        await client.unlink(*keys)
+        return sum(1 for key in keys if self._is_entry_key(key))
 
 # Global instance
-explanation_cache = PropertyExplanationCache() 
\ No newline at end of file
+explanation_cache = PropertyExplanationCache()
+
+metrics_registry.gauge(
+    "propmatch_explanation_cache_hit_ratio",
+    "Share of explanation requests answered from cache since startup",
+    [],
+    lambda: [((), explanation_cache.cache_hits / max(explanation_cache.cache_hits + explanation_cache.cache_misses, 1))]
+)
+ 
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""
+Shared Async Redis Pool for PropMatch
+One redis.asyncio connection pool per process, so cache reads and writes wait
+on the network without blocking the event loop, and connections are reused
+across requests. Values come back as bytes for the cache codecs to decode.
+Pool utilization is exported as Prometheus gauges.
+"""
+
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.core.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean Redis itself is unreachable - others (bad reply, missing command) affect one call only
+REDIS_UNAVAILABLE_ERRORS = (redis.ConnectionError, redis.TimeoutError, OSError)
+
+_pool: Optional[aioredis.ConnectionPool] = None
+
+
+def fix_redis_url(url: str) -> str:
+    """Fix Redis URL to ensure proper scheme"""
+    if not url:
+        return "redis://localhost:6379/0"
+
+    # If URL doesn't start with a scheme, add redis://
+    if not url.startswith(('redis://', 'rediss://', 'unix://')):
+        # If it looks like it has auth info, use rediss:// for security
+        if '@' in url:
+            return f"rediss://{url}"
+        else:
+            return f"redis://{url}"
+
+    return url
+
+
+def get_async_redis() -> Optional[aioredis.Redis]:
+    """Client on the shared pool, or None when Redis is not configured - connects on first command"""
+    global _pool
+    if not settings.REDIS_URL:
+        return None
+    if _pool is None:
+        _pool = aioredis.ConnectionPool.from_url(
+            fix_redis_url(settings.REDIS_URL),
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            health_check_interval=30,
+            decode_responses=False  # Binary cache values (app/core/cache_codec.py)
+        )
+        logger.info(f"🔗 Shared async Redis pool created (max {settings.REDIS_MAX_CONNECTIONS} connections)")
+    return aioredis.Redis(connection_pool=_pool)
+
+
+def redis_pool_stats() -> Dict[str, int]:
+    """In-use and idle connection counts for health endpoints"""
+    if _pool is None:
+        return {"in_use": 0, "idle": 0, "max": settings.REDIS_MAX_CONNECTIONS}
+    return {
+        "in_use": len(_pool._in_use_connections),
+        "idle": len(_pool._available_connections),
+        "max": settings.REDIS_MAX_CONNECTIONS
+    }
+
+
+def _collect_pool_connections() -> Iterable[Tuple[Tuple[str, ...], float]]:
+    if _pool is None:
+        return []
+    stats = redis_pool_stats()
+    return [(("in_use",), stats["in_use"]), (("idle",), stats["idle"])]
+
+
+metrics_registry.gauge(
+    "propmatch_redis_pool_connections",
+    "Shared async Redis pool connections by state (in_use, idle)",
+    ["state"],
+    _collect_pool_connections
+)
+
+
+async def close_redis():
+    """Disconnect the shared pool - called on application shutdown"""
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.disconnect()
@@ -0,0 +1,269 @@
+"""
+Ranked Search Result Cache for PropMatch
+Caches the full ranked list for a (query, filters, sort) search so every page
+after the first is a cache read, addressed by signed opaque cursors
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.cache_codec import get_cache_codec
+from app.core.config import settings
+from app.core.metrics import stage_timer, record_cache_lookup
+from app.core.redis_pool import REDIS_UNAVAILABLE_ERRORS, get_async_redis
+from app.models.property import PropertySearchRequest
+from app.services.query_parser import normalize_query
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 10  # Properties per cache entry - a page reads only the chunks it overlaps
+
+
+def ranked_list_key(search_request: PropertySearchRequest) -> str:
+    """Identity of a ranked list: everything that shapes the ordering, nothing about the page"""
+    filters = search_request.filters.model_dump(exclude_none=True) if search_request.filters else {}
+    identity = json.dumps(
+        [normalize_query(search_request.query), filters, search_request.sort_by, search_request.sort_order],
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(identity.encode()).hexdigest()[:32]
+
+
+class SearchResultCache:
+    """
+    Ranked lists in Redis (meta + fixed-size chunks) with an in-process LRU tier
+    in front, on the shared async Redis pool. Writes run as background tasks
+    after the page has been served. While Redis is unreachable only the local
+    tier is used, and Redis is retried after REDIS_RETRY_AFTER_SECONDS.
+    """
+
+    def __init__(self, max_local_entries: int = 2048):
+        self.redis_client = get_async_redis()
+        self.codec = get_cache_codec("search")
+        self.cache_prefix = "propmatch:search:"
+        self.ttl_seconds = settings.SEARCH_CACHE_TTL_SECONDS
+        self.prefetch_enabled = settings.SEARCH_CACHE_PREFETCH
+        self.max_local_entries = max_local_entries
+        self._local: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._local_lock = threading.Lock()  # Background stores fill the local tier from a worker thread
+        self._prefetching: set = set()
+        self._pending_stores: Set[asyncio.Task] = set()
+        self._retry_redis_at = 0.0
+
+        if self.redis_client is None:
+            logger.info("Redis URL not configured - search cache is in-memory only")
+
+    def _redis(self):
+        """The async client, or None while Redis is unconfigured or marked down"""
+        if self.redis_client is None or time.monotonic() < self._retry_redis_at:
+            return None
+        return self.redis_client
+
+    def _mark_redis_down(self, error: Exception):
+        if time.monotonic() >= self._retry_redis_at:
+            logger.warning(f"Search cache Redis unavailable ({error}) - using in-memory cache "
+                           f"for {settings.REDIS_RETRY_AFTER_SECONDS:.0f}s")
+        self._retry_redis_at = time.monotonic() + settings.REDIS_RETRY_AFTER_SECONDS
+
+    # ---- local tier -----------------------------------------------------
+
+    def _local_get(self, key: str) -> Optional[Any]:
+        with self._local_lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return value
+
+    def _local_set(self, key: str, value: Any, ttl_seconds: float):
+        with self._local_lock:
+            self._local[key] = (time.monotonic() + ttl_seconds, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_local_entries:
+                self._local.popitem(last=False)
+
+    # ---- ranked lists ---------------------------------------------------
+
+    def _meta_key(self, list_key: str) -> str:
+        return f"{self.cache_prefix}{list_key}:meta"
+
+    def _chunk_key(self, list_key: str, chunk: int) -> str:
+        return f"{self.cache_prefix}{list_key}:chunk:{chunk}"
+
+    def _prepare_entries(self, list_key: str, serialize: Callable[[], List[Dict[str, Any]]]) -> Dict[str, bytes]:
+        """Serialize a ranked list into the local tier and return its encoded Redis entries"""
+        properties = serialize()
+        entries = {self._meta_key(list_key): {"total": len(properties), "stored_at": time.time()}}
+        for chunk in range(0, (len(properties) + CHUNK_SIZE - 1) // CHUNK_SIZE):
+            entries[self._chunk_key(list_key, chunk)] = properties[chunk * CHUNK_SIZE:(chunk + 1) * CHUNK_SIZE]
+
+        for key, value in entries.items():
+            self._local_set(key, value, self.ttl_seconds)
+        if self._redis() is None:
+            return {}
+        return {key: self.codec.encode(value) for key, value in entries.items()}
+
+    async def store(self, list_key: str, serialize: Callable[[], List[Dict[str, Any]]]):
+        """Cache a full ranked list; serialize returns it as JSON-ready dicts and runs off the event loop"""
+        with stage_timer("cache_store"):
+            encoded = await asyncio.to_thread(self._prepare_entries, list_key, serialize)
+            client = self._redis()
+            if not encoded or client is None:
+                return
+            try:
+                pipe = client.pipeline(transaction=False)
+                # Chunks first, meta last - a reader that sees the meta finds every chunk
+                for key, value in sorted(encoded.items(), key=lambda item: item[0].endswith(':meta')):
+                    pipe.setex(key, self.ttl_seconds, value)
+                await pipe.execute()
+            except REDIS_UNAVAILABLE_ERRORS as e:
+                self._mark_redis_down(e)
+            except Exception as e:
+                logger.warning(f"Failed to cache ranked list in Redis: {e}")
+
+    def store_in_background(self, list_key: str, serialize: Callable[[], List[Dict[str, Any]]]):
+        """Schedule store() after the response is built - the serving request never waits on it"""
+        task = asyncio.create_task(self.store(list_key, serialize))
+        self._pending_stores.add(task)
+        task.add_done_callback(self._pending_stores.discard)
+
+    async def drain(self):
+        """Wait for scheduled stores to finish (shutdown, benchmarks)"""
+        if self._pending_stores:
+            await asyncio.gather(*self._pending_stores, return_exceptions=True)
+
+    async def read_page(self, list_key: str, offset: int, limit: int) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        """Return (page of serialized properties, total) or None on a miss"""
+        try:
+            with stage_timer("cache_lookup"):
+                page = await self._read_page(list_key, offset, limit)
+        except REDIS_UNAVAILABLE_ERRORS as e:
+            self._mark_redis_down(e)
+            record_cache_lookup("search", "error")
+            return None
+        except Exception as e:
+            logger.warning(f"Search cache read failed: {e}")
+            record_cache_lookup("search", "error")
+            return None
+        record_cache_lookup("search", "hit" if page is not None else "miss")
+        return page
+
+    async def _read_page(self, list_key: str, offset: int, limit: int) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        meta_key = self._meta_key(list_key)
+        meta = self._local_get(meta_key)
+        first_chunk = offset // CHUNK_SIZE
+
+        if meta is not None:
+            total = meta["total"]
+            last_chunk = (min(offset + limit, total) - 1) // CHUNK_SIZE if offset < total else first_chunk - 1
+            keys = [self._chunk_key(list_key, chunk) for chunk in range(first_chunk, last_chunk + 1)]
+            chunks = [self._local_get(key) for key in keys]
+            if all(chunk is not None for chunk in chunks):
+                return self._slice(chunks, offset, limit, first_chunk), total
+
+        client = self._redis()
+        if client is None:
+            return None
+
+        # Chunks past the end of the list simply come back empty
+        last_chunk = (offset + limit - 1) // CHUNK_SIZE
+        keys = [meta_key] + [self._chunk_key(list_key, chunk) for chunk in range(first_chunk, last_chunk + 1)]
+        values = await client.mget(keys)
+
+        if values[0] is None:
+            return None
+        meta = self.codec.decode(values[0])
+        self._local_set(meta_key, meta, self.ttl_seconds)
+
+        chunks = []
+        for chunk, raw in zip(range(first_chunk, last_chunk + 1), values[1:]):
+            if chunk * CHUNK_SIZE >= meta["total"]:
+                break
+            if raw is None:
+                return None
+            value = self.codec.decode(raw)
+            self._local_set(self._chunk_key(list_key, chunk), value, self.ttl_seconds)
+            chunks.append(value)
+        return self._slice(chunks, offset, limit, first_chunk), meta["total"]
+
+    def _slice(self, chunks: List[List[Dict[str, Any]]], offset: int, limit: int, first_chunk: int) -> List[Dict[str, Any]]:
+        start = offset - first_chunk * CHUNK_SIZE
+        return [item for chunk in chunks for item in chunk][start:start + limit]
+
+    def prefetch(self, list_key: str, offset: int, limit: int):
+        """Warm the local tier with the next page in the background"""
+        if not self.prefetch_enabled or self._redis() is None:
+            return
+        marker = (list_key, offset, limit)
+        if marker in self._prefetching:
+            return
+        self._prefetching.add(marker)
+
+        async def run():
+            try:
+                await self._read_page(list_key, offset, limit)
+            except REDIS_UNAVAILABLE_ERRORS as e:
+                self._mark_redis_down(e)
+            except Exception as e:
+                logger.debug(f"Search cache prefetch failed: {e}")
+            finally:
+                self._prefetching.discard(marker)
+
+        asyncio.get_running_loop().create_task(run())
+
+    def clear_local(self):
+        """Drop the in-process tier (Redis entries expire on their own)"""
+        with self._local_lock:
+            self._local.clear()
+
+    # ---- cursors --------------------------------------------------------
+
+    def _sign(self, payload: bytes) -> str:
+        digest = hmac.new(settings.SECRET_KEY.encode(), payload, hashlib.sha256).digest()[:16]
+        return base64.urlsafe_b64encode(digest).decode().rstrip('=')
+
+    def encode_cursor(self, list_key: str, offset: int, page_size: int) -> str:
+        payload = base64.urlsafe_b64encode(json.dumps([list_key, offset, page_size]).encode()).decode().rstrip('=')
+        return f"{payload}.{self._sign(payload.encode())}"
+
+    def decode_cursor(self, cursor: str) -> Tuple[str, int, int]:
+        """Return (list_key, offset, page_size); raises ValueError for tampered or malformed cursors"""
+        try:
+            payload, signature = cursor.split('.', 1)
+            if not hmac.compare_digest(signature, self._sign(payload.encode())):
+                raise ValueError("bad signature")
+            list_key, offset, page_size = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+            return str(list_key), int(offset), int(page_size)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"malformed cursor: {e}")
+
+    def apply_cursor(self, search_request: PropertySearchRequest) -> PropertySearchRequest:
+        """Resolve a request's cursor into page/page_size; the cursor must belong to the same search"""
+        list_key, offset, page_size = self.decode_cursor(search_request.cursor)
+        if list_key != ranked_list_key(search_request):
+            raise ValueError("cursor belongs to a different search")
+        if page_size < 1 or offset < 0 or offset % page_size:
+            raise ValueError("cursor offset out of range")
+        return search_request.model_copy(update={
+            'page': offset // page_size + 1,
+            'page_size': page_size,
+            'cursor': None
+        })
+
+
+# Global instance
+search_cache = SearchResultCache()
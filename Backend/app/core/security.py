@@ -46,15 +46,20 @@ except Exception as e:
     logger.info(f"Redis not available ({e}), using memory storage for security features")
     redis_client = None
 
+# Per-IP rate limiting can be switched off for load tests that drive the API from one host
+RATE_LIMITING_ENABLED = os.getenv('RATE_LIMITING_ENABLED', 'true').lower() == 'true'
+if not RATE_LIMITING_ENABLED:
+    logger.warning("⚠️ Per-IP rate limiting and DDoS blocking are DISABLED (RATE_LIMITING_ENABLED=false)")
+
 # Rate limiter - use Redis URL or memory storage if Redis is not available
 if redis_client and os.getenv('REDIS_URL'):
     # Use the Redis URL directly (cloud providers typically only support db 0)
-    limiter = Limiter(key_func=get_remote_address, storage_uri=os.getenv('REDIS_URL'))
+    limiter = Limiter(key_func=get_remote_address, storage_uri=os.getenv('REDIS_URL'), enabled=RATE_LIMITING_ENABLED)
 elif redis_client:
-    limiter = Limiter(key_func=get_remote_address, storage_uri="redis://localhost:6379/1")
+    limiter = Limiter(key_func=get_remote_address, storage_uri="redis://localhost:6379/1", enabled=RATE_LIMITING_ENABLED)
 else:
     # Fallback to memory storage when Redis is not available
-    limiter = Limiter(key_func=get_remote_address, storage_uri="memory://")
+    limiter = Limiter(key_func=get_remote_address, storage_uri="memory://", enabled=RATE_LIMITING_ENABLED)
     logger.info("Using memory storage for rate limiting")
 
 class SecurityConfig:
@@ -272,7 +277,7 @@ class SecurityMiddleware:
             )
         
         # Check for DDoS patterns
-        if self.is_ddos_attack(client_ip):
+        if RATE_LIMITING_ENABLED and self.is_ddos_attack(client_ip):
             self.blocked_ips.add(client_ip)
             security_monitor.block_ip(client_ip, "DDoS attack detected", 24)
             log_attack(
@@ -288,7 +293,7 @@ class SecurityMiddleware:
             )
         
         # Check request count limits
-        if not self.track_request_counts(client_ip):
+        if RATE_LIMITING_ENABLED and not self.track_request_counts(client_ip):
             log_attack(
                 ip=client_ip,
                 attack_type=AttackType.RATE_LIMIT_EXCEEDED,
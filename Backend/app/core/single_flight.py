@@ -0,0 +1,52 @@
+"""
+Request Coalescing for PropMatch
+Single-flight groups: concurrent callers with the same key share one in-flight
+computation instead of each hitting embeddings, Pinecone and Supabase
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from app.core.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+SINGLE_FLIGHT_CALLS = metrics_registry.counter(
+    "propmatch_single_flight_calls_total",
+    "Calls into a single-flight group by role (leader runs the work, follower joins it)",
+    ["group", "role"]
+)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls by key. Only calls that overlap in time share a
+    result - the key is dropped as soon as the computation settles, so nothing
+    is ever served stale. Results are shared objects and must be treated as read-only.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, work: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_flight.get(key)
+        if task is None:
+            SINGLE_FLIGHT_CALLS.inc(group=self.name, role="leader")
+            # Own task so a disconnecting leader doesn't cancel the work its followers wait on
+            task = asyncio.ensure_future(work())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            SINGLE_FLIGHT_CALLS.inc(group=self.name, role="follower")
+            logger.debug(f"Coalesced {self.name} call onto in-flight request")
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
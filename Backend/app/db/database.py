@@ -102,11 +102,17 @@ def test_connection():
         logger.error(f"Database connection failed: {e}")
         return False
 
-# Supabase client for direct API access
+# Supabase client for direct API access - one per process, on the shared connection pool
+_supabase_client = None
+
 def get_supabase_client():
-    """Get Supabase client for API access"""
+    """Get the shared Supabase client for API access"""
+    global _supabase_client
+    if _supabase_client is not None:
+        return _supabase_client
     try:
-        from supabase import create_client, Client
+        from supabase import create_client, Client, ClientOptions
+        from app.core.clients import supabase_http_client
         
         supabase_url = settings.SUPABASE_URL
         supabase_key = settings.SUPABASE_ANON_KEY
@@ -115,7 +121,12 @@ def get_supabase_client():
             logger.error("Missing Supabase credentials")
             return None
         
-        return create_client(supabase_url, supabase_key)
+        _supabase_client = create_client(
+            supabase_url,
+            supabase_key,
+            options=ClientOptions(httpx_client=supabase_http_client())
+        )
+        return _supabase_client
     except ImportError:
         logger.error("Supabase client not installed")
         return None
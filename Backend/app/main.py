@@ -1,4 +1,4 @@
-from fastapi import FastAPI, Request, Depends
+from fastapi import FastAPI, Request, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from slowapi import Limiter, _rate_limit_exceeded_handler
@@ -12,6 +12,14 @@ from app.api.routes import properties, search
 from app.api.v1 import test_endpoints, hybrid_test_endpoints, explanation_endpoints, security_endpoints
 from app.core.config import settings
 from app.core.langsmith_config import initialize_langsmith, get_langsmith_status
+from app.core.metrics import metrics_registry, PROMETHEUS_CONTENT_TYPE
+from app.core.circuit_breaker import circuit_states
+from app.core.clients import pool_stats, close_clients
+from app.core.redis_pool import close_redis
+from app.core.search_cache import search_cache
+from app.core.llm_accounting import UsageLedger, current_usage, finish_request
+from app.services.explanation_prefetch import explanation_prefetcher
+from app.services.poi_index import poi_gazetteer
 from app.core.security import (
     limiter, 
     security_middleware, 
@@ -63,7 +71,7 @@ app.add_exception_handler(RateLimitExceeded, custom_rate_limit_handler)
 async def security_middleware_handler(request: Request, call_next):
     """Apply security checks to all requests"""
     # Skip security checks for health endpoints and docs
-    if request.url.path in ["/", "/health", "/docs", "/redoc", "/openapi.json"]:
+    if request.url.path in ["/", "/health", "/metrics", "/docs", "/redoc", "/openapi.json"]:
         response = await call_next(request)
         return response
     
@@ -75,6 +83,35 @@ async def security_middleware_handler(request: Request, call_next):
     response = await call_next(request)
     return response
 
+# LLM usage accounting - one ledger per API request, rolled up per endpoint once the body is sent
+@app.middleware("http")
+async def llm_accounting_middleware(request: Request, call_next):
+    if not request.url.path.startswith("/api/"):
+        return await call_next(request)
+    
+    ledger = UsageLedger(endpoint=request.url.path)
+    token = current_usage.set(ledger)
+    try:
+        response = await call_next(request)
+    finally:
+        current_usage.reset(token)
+    
+    # Route template, not the raw path, so listing numbers don't become metric labels
+    route = request.scope.get("route")
+    endpoint = f"{request.method} {getattr(route, 'path', 'unmatched')}"
+    body = response.body_iterator
+    
+    async def finish_after_body():
+        # Streaming endpoints keep calling the LLM after the headers go out
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            finish_request(ledger, endpoint)
+    
+    response.body_iterator = finish_after_body()
+    return response
+
 # Security middleware
 app.add_middleware(
     TrustedHostMiddleware, 
@@ -134,11 +171,15 @@ async def root(request: Request):
 @app.get("/health")
 async def health_check():
     langsmith_status = get_langsmith_status()
+    circuits = circuit_states()
     
     return {
-        "status": "healthy", 
+        # Degraded: some upstream is failing fast and searches are on their fallback path
+        "status": "healthy" if all(circuit["state"] == "closed" for circuit in circuits.values()) else "degraded",
         "security": "active",
         "langsmith_tracing": langsmith_status,
+        "circuit_breakers": circuits,
+        "http_pools": pool_stats(),
         "protection": {
             "rate_limiting": True,
             "ddos_protection": True,
@@ -148,6 +189,32 @@ async def health_check():
         }
     }
 
+@app.on_event("startup")
+async def load_poi_gazetteer():
+    """Load the prebuilt POI gazetteer - searches skip proximity boosts until it exists"""
+    poi_gazetteer.load()
+
+@app.on_event("shutdown")
+async def shutdown_explanation_prefetch():
+    """Cancel background explanation generation before its HTTP pool closes"""
+    await explanation_prefetcher.stop()
+
+@app.on_event("shutdown")
+async def shutdown_http_pools():
+    """Close the shared OpenAI and Supabase connection pools"""
+    await close_clients()
+
+@app.on_event("shutdown")
+async def shutdown_redis_pool():
+    """Finish pending search cache writes, then disconnect the shared async Redis pool"""
+    await search_cache.drain()
+    await close_redis()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint - per-stage latency, cache lookups and LLM token counters"""
+    return Response(content=metrics_registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
@@ -31,6 +31,19 @@ class PointOfInterest(BaseModel):
     distance: float  # in kilometers
     distance_str: str  # e.g., "1.2km"
 
+class PoiFeatures(BaseModel):
+    """Precomputed POI distance features for a listing, built once at ingest"""
+    poi_count: int = 0
+    nearest_by_category: Dict[str, float] = Field(default_factory=dict)  # category -> nearest km
+    uct_km: Optional[float] = None  # Nearest UCT campus
+    waterfront_km: Optional[float] = None  # Nearest V&A Waterfront
+    cbd_km: Optional[float] = None  # Nearest CBD / city centre POI
+    in_cbd: bool = False  # Listing neighbourhood is in the CBD
+    within_walking_count: int = 0  # POIs within 800m
+    short_drive_count: int = 0  # POIs within 0.8-3km
+    accessible_count: int = 0  # POIs within 3-10km
+    nearby_context: Dict[str, List[str]] = Field(default_factory=dict)  # Categorized POIs for rerank prompts
+
 class Property(BaseModel):
     """Property model matching the frontend interface"""
     id: str
@@ -81,6 +94,7 @@ class Property(BaseModel):
     external_features: Optional[Dict[str, Any]] = None
     building_features: Optional[Dict[str, Any]] = None
     points_of_interest: Optional[List[PointOfInterest]] = None
+    poi_features: Optional[PoiFeatures] = Field(default=None, exclude=True)  # Internal scoring features
     
     class Config:
         extra = "allow"  # Allow dynamic attributes for scoring components
@@ -143,6 +157,7 @@ class PropertySearchRequest(BaseModel):
     page_size: int = Field(20, ge=1, le=100, description="Number of results per page")
     sort_by: Optional[str] = Field("relevance", description="Sort field: relevance, price, date")
     sort_order: Optional[str] = Field("desc", description="Sort order: asc, desc")
+    cursor: Optional[str] = Field(None, description="Opaque cursor from a previous response's nextCursor")
 
 class PropertySearchResponse(BaseModel):
     """Search response model"""
@@ -154,6 +169,16 @@ class PropertySearchResponse(BaseModel):
     totalPages: int
     hasNext: bool
     hasPrevious: bool
+    nextCursor: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None  # Pipeline diagnostics, e.g. adaptive stage decisions
+
+class BatchSearchRequest(BaseModel):
+    """Many searches in one call (saved-search alerts, landing page builds)"""
+    searches: List[PropertySearchRequest] = Field(..., min_length=1, max_length=100)
+
+class BatchSearchResponse(BaseModel):
+    """One search response per request, in request order"""
+    results: List[PropertySearchResponse]
 
 class MatchExplanation(BaseModel):
     """AI match explanation structure"""
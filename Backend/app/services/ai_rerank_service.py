@@ -9,19 +9,31 @@ import time
 from typing import List, Dict, Any, Tuple
 import json
 import math
-from openai import AsyncOpenAI
 
 # LangSmith imports
 from langsmith import traceable
-from langsmith.wrappers import wrap_openai
 
 from app.models.property import Property, PropertySearchRequest
 from app.services.supabase_property_service import SupabasePropertyService
 from app.services.vector_service import VectorService
+from app.services.poi_features import get_poi_features
+from app.services.score_record import ScoreRecord, attach_scores
+from app.services.rerank_features import rerank_feature_log
+from app.services.explanation_service import explanation_service
+from app.core.metrics import stage_timer, current_pipeline
+from app.core.llm_accounting import record_llm_call, usage_scope
+from app.core.circuit_breaker import openai_chat_breaker
+from app.core.hedged_requests import HedgedCaller
+from app.core.clients import get_openai_client
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Shared so per-model latency history (which sets the hedge delay) spans every request
+rerank_hedger = HedgedCaller("ai_rerank")
+
+RATIONALE_MAX_TOKENS = 220  # Completion budget per requested rationale
+
 class AIRerankService:
     """Enhanced AI-powered property re-ranking with deep semantic understanding"""
     
@@ -29,20 +41,12 @@ class AIRerankService:
         self.property_service = SupabasePropertyService()
         self.vector_service = VectorService()
         
-        # Initialize OpenAI client with LangSmith wrapper if API key is available
-        if settings.OPENAI_API_KEY:
-            base_client = AsyncOpenAI(
-                api_key=settings.OPENAI_API_KEY,
-                http_client=None  # Explicitly set http_client to None to avoid proxy issues
-            )
-            self.openai_client = wrap_openai(base_client) if settings.LANGSMITH_TRACING and settings.LANGSMITH_API_KEY else base_client
-        else:
-            self.openai_client = None
+        # Shared pooled OpenAI client (LangSmith-wrapped when tracing is on), None without an API key
+        self.openai_client = get_openai_client()
             
         self.max_context_properties = 12  # Reduced for richer property profiles
         self.primary_model = "gpt-4o-mini"  # Reverted to gpt-4o-mini for evaluation
         self.fallback_model = "gpt-3.5-turbo"  # Changed fallback since we're using gpt-4o-mini as primary
-        self.token_usage = {}  # Track token usage
         
     @traceable(name="ai_search_and_rerank")
     async def search_and_rerank(self, search_request: PropertySearchRequest) -> Tuple[List[Property], Dict[str, float]]:
@@ -53,9 +57,7 @@ class AIRerankService:
         
         timing = {}
         start_time = time.time()
-        
-        # Reset token tracking for this search
-        self.token_usage = {}
+        current_pipeline.set("ai_rerank")
         
         # Step 1: Get initial vector search results directly
         logger.info(f"Starting enhanced AI re-rank search for: {search_request.query}")
@@ -72,176 +74,148 @@ class AIRerankService:
         if not vector_results:
             timing['vector_search_ms'] = round((time.time() - vector_start) * 1000, 1)
             timing['total_ms'] = round((time.time() - start_time) * 1000, 1)
-            timing['token_usage'] = self.token_usage
+            timing['token_usage'] = {}
             return [], timing
         
         # Get property IDs and fetch properties
         property_ids = [int(prop_id) for prop_id, _, _ in vector_results]
         candidate_properties = await self.property_service.get_properties_batch(property_ids)
         
-        # Apply original vector scores to properties
+        # Carry original vector scores in score records - the fetched properties stay untouched
         vector_scores = {str(prop_id): score for prop_id, score, _ in vector_results}
-        for prop in candidate_properties:
-            prop.searchScore = vector_scores.get(str(prop.listing_number), 50.0)
+        candidate_records = [
+            ScoreRecord(prop, vector_scores.get(str(prop.listing_number), 50.0)) for prop in candidate_properties
+        ]
         
         timing['vector_search_ms'] = round((time.time() - vector_start) * 1000, 1)
         
         if not candidate_properties:
             timing['total_ms'] = round((time.time() - start_time) * 1000, 1)
-            timing['token_usage'] = self.token_usage
+            timing['token_usage'] = {}
             return [], timing
         
-        # Step 2: Enhanced AI re-ranking with batching
-        ai_start = time.time()
-        
-        if self.openai_client and len(candidate_properties) > 0:
-            ranked_properties = await self._intelligent_rerank_with_batching(
-                candidate_properties, 
-                search_request.query
-            )
-            
-            # Take only the requested number from AI ranking
-            final_properties = ranked_properties[:search_request.page_size]
-            
-        else:
-            # Fallback to vector scores if AI unavailable
-            logger.warning("OpenAI not available, falling back to vector scores")
-            final_properties = candidate_properties[:search_request.page_size]
+        # Step 2: Enhanced AI re-ranking with batching - token usage scoped to this search, not the shared service
+        with stage_timer("rerank") as rerank_timer, usage_scope() as usage:
+            if self.openai_client and len(candidate_properties) > 0:
+                ranked_records = await self._intelligent_rerank_with_batching(
+                    candidate_records, 
+                    search_request.query
+                )
+                
+                # Take only the requested number from AI ranking
+                final_properties = attach_scores(ranked_records[:search_request.page_size])
+                await explanation_service.cache_rerank_rationales(search_request.query, ranked_records)
+                
+            else:
+                # Fallback to vector scores if AI unavailable
+                logger.warning("OpenAI not available, falling back to vector scores")
+                final_properties = attach_scores(candidate_records[:search_request.page_size])
         
-        timing['ai_rerank_ms'] = round((time.time() - ai_start) * 1000, 1)
+        timing['ai_rerank_ms'] = rerank_timer.elapsed_ms
         timing['total_ms'] = round((time.time() - start_time) * 1000, 1)
-        timing['token_usage'] = self.token_usage
+        timing['token_usage'] = usage.token_usage()
         timing['model_used'] = self.primary_model
         
         logger.info(f"Enhanced AI re-rank completed in {timing['total_ms']}ms (Vector: {timing['vector_search_ms']}ms, AI: {timing['ai_rerank_ms']}ms)")
-        logger.info(f"Token usage: {self.token_usage}")
+        logger.info(f"Token usage: {timing['token_usage']}")
         
         return final_properties, timing
     
     @traceable(name="ai_intelligent_rerank_with_batching")
-    async def _intelligent_rerank_with_batching(self, properties: List[Property], query: str) -> List[Property]:
+    async def _intelligent_rerank_with_batching(self, records: List[ScoreRecord], query: str) -> List[ScoreRecord]:
         """Enhanced AI re-ranking with smart batching and context management"""
         
         try:
             # Smart batching: try to fit all properties in one call if possible
-            all_properties = []
+            all_records = []
             
-            if len(properties) <= self.max_context_properties:
+            if len(records) <= self.max_context_properties:
                 # Single batch - optimal case
-                ranked_batch = await self._enhanced_ai_rerank_batch(properties, query, batch_info="single")
-                all_properties.extend(ranked_batch)
+                ranked_batch = await self._enhanced_ai_rerank_batch(records, query, batch_info="single")
+                all_records.extend(ranked_batch)
             else:
                 # Multiple batches needed
-                logger.info(f"Batching {len(properties)} properties into multiple AI calls")
+                logger.info(f"Batching {len(records)} properties into multiple AI calls")
                 
-                batches = [properties[i:i + self.max_context_properties] 
-                          for i in range(0, len(properties), self.max_context_properties)]
+                batches = [records[i:i + self.max_context_properties] 
+                          for i in range(0, len(records), self.max_context_properties)]
                 
                 for i, batch in enumerate(batches):
                     batch_info = f"batch {i+1}/{len(batches)}"
                     ranked_batch = await self._enhanced_ai_rerank_batch(batch, query, batch_info)
-                    all_properties.extend(ranked_batch)
+                    all_records.extend(ranked_batch)
             
             # Final sort by AI scores
-            all_properties.sort(key=lambda x: x.searchScore, reverse=True)
+            all_records.sort(key=lambda x: x.score, reverse=True)
             
-            return all_properties
+            return all_records
             
         except Exception as e:
             logger.error(f"Enhanced AI re-ranking failed: {e}")
             # Fallback to original order with vector scores
-            return properties
+            return records
     
     @traceable(name="ai_enhanced_rerank_batch")
-    async def _enhanced_ai_rerank_batch(self, properties: List[Property], query: str, batch_info: str) -> List[Property]:
+    async def _enhanced_ai_rerank_batch(self, records: List[ScoreRecord], query: str, batch_info: str) -> List[ScoreRecord]:
         """Enhanced AI re-ranking for a batch of properties with detailed token tracking"""
         
         try:
             # Create ultra-rich property summaries for AI context
             property_summaries = []
-            for i, prop in enumerate(properties):
-                summary = self._create_ultra_rich_property_summary(prop, i)
+            for i, record in enumerate(records):
+                summary = self._create_ultra_rich_property_summary(record.property, i)
                 property_summaries.append(summary)
             
-            # Create enhanced prompt with impossible query detection
-            prompt = self._create_enhanced_rerank_prompt_v2(query, property_summaries, batch_info)
+            # Create enhanced prompt with impossible query detection - plus rationales for the
+            # batch's top few when they pre-fill the explanation cache
+            explain_top = min(settings.RERANK_EXPLANATIONS_TOP_N, len(records)) if settings.RERANK_EXPLANATIONS_ENABLED else 0
+            prompt = self._create_enhanced_rerank_prompt_v2(query, property_summaries, batch_info, explain_top)
             
-            # Call GPT-4.1-mini for superior understanding with detailed fallback chain
-            model_used = None
-            try:
-                logger.info(f"Attempting {self.primary_model} for batch: {batch_info}")
-                response = await self.openai_client.chat.completions.create(
-                    model=self.primary_model,  # Try enhanced model first
-                    messages=[
-                        {
-                            "role": "system", 
-                            "content": "You are an expert Cape Town property analyst with deep understanding of South African real estate, geography, and user needs. You excel at detecting impossible queries and providing nuanced, realistic scoring."
-                        },
-                        {"role": "user", "content": prompt}
-                    ],
+            messages = [
+                {
+                    "role": "system", 
+                    "content": "You are an expert Cape Town property analyst with deep understanding of South African real estate, geography, and user needs. You excel at detecting impossible queries and providing nuanced, realistic scoring."
+                },
+                {"role": "user", "content": prompt}
+            ]
+            
+            async def request(model: str):
+                return await self.openai_client.chat.completions.create(
+                    model=model,
+                    messages=messages,
                     temperature=0.05,  # Very low temperature for consistent scoring
-                    max_tokens=1000    # Increased for detailed reasoning
+                    max_tokens=1000 + explain_top * RATIONALE_MAX_TOKENS    # Increased for detailed reasoning
                 )
-                model_used = self.primary_model
-                
-            except Exception as e:
-                if "model not found" in str(e).lower() or "not exist" in str(e).lower():
-                    # Fallback to GPT-4o-mini
-                    logger.warning(f"{self.primary_model} not available, falling back to {self.fallback_model}")
-                    try:
-                        response = await self.openai_client.chat.completions.create(
-                            model=self.fallback_model,
-                            messages=[
-                                {
-                                    "role": "system", 
-                                    "content": "You are an expert Cape Town property analyst with deep understanding of South African real estate, geography, and user needs. You excel at detecting impossible queries and providing nuanced, realistic scoring."
-                                },
-                                {"role": "user", "content": prompt}
-                            ],
-                            temperature=0.05,
-                            max_tokens=1000
-                        )
-                        model_used = self.fallback_model
-                    except Exception as e2:
-                        # Final fallback to GPT-3.5-turbo
-                        logger.warning(f"{self.fallback_model} not available, falling back to gpt-3.5-turbo")
-                        response = await self.openai_client.chat.completions.create(
-                            model="gpt-3.5-turbo",
-                            messages=[
-                                {
-                                    "role": "system", 
-                                    "content": "You are an expert Cape Town property analyst."
-                                },
-                                {"role": "user", "content": prompt}
-                            ],
-                            temperature=0.05,
-                            max_tokens=1000
-                        )
-                        model_used = "gpt-3.5-turbo"
-                else:
-                    raise e
             
-            # Track token usage
+            # Primary model with a hedged backup once it runs past its p95, and the
+            # fallback model started the moment an attempt fails
+            logger.info(f"Attempting {self.primary_model} for batch: {batch_info}")
+            call_start = time.perf_counter()
+            with openai_chat_breaker.guard():
+                response, model_used = await rerank_hedger.call([self.primary_model, self.fallback_model], request)
+            
+            # Track token usage on the request's ledger
             usage = response.usage
-            batch_key = f"{model_used}_{batch_info}"
-            self.token_usage[batch_key] = {
-                "model": model_used,
-                "prompt_tokens": usage.prompt_tokens,
-                "completion_tokens": usage.completion_tokens,
-                "total_tokens": usage.total_tokens
-            }
+            record_llm_call(
+                "chat", model_used, "rerank", usage.prompt_tokens, usage.completion_tokens,
+                latency_ms=(time.perf_counter() - call_start) * 1000, label=batch_info
+            )
             
             logger.info(f"AI call completed with {model_used}: {usage.total_tokens} tokens ({usage.prompt_tokens} prompt + {usage.completion_tokens} completion)")
             
             # Parse AI response and apply realistic scores
             ai_ranking = self._parse_ai_ranking(response.choices[0].message.content)
-            ranked_properties = self._apply_enhanced_ai_scores(properties, ai_ranking)
-            
-            return ranked_properties
+            rerank_feature_log.record(
+                query, records,
+                {item['id']: item['score'] for item in ai_ranking if 'id' in item and 'score' in item},
+                model_used
+            )
+            self._attach_rationales(records, ai_ranking)
+            return self._apply_enhanced_ai_scores(records, ai_ranking)
             
         except Exception as e:
             logger.error(f"Enhanced AI re-ranking batch failed: {e}")
-            return properties
+            return records
     
     def _create_ultra_rich_property_summary(self, prop: Property, index: int) -> Dict[str, Any]:
         """Create ultra-rich property summary with comprehensive context for AI understanding"""
@@ -375,76 +349,27 @@ class AIRerankService:
         return context
     
     def _analyze_pois_for_enhanced_context(self, prop: Property) -> Dict[str, List[str]]:
-        """Analyze POIs to provide ultra-rich context for AI understanding"""
+        """Provide ultra-rich POI context for AI understanding from the listing's precomputed features"""
         
-        if not prop.points_of_interest:
+        poi_features = get_poi_features(prop)
+        if not poi_features.poi_count:
             return {"summary": "No nearby amenities listed"}
         
-        context = {
-            "major_shopping": [],     # Major malls and shopping centers
-            "local_shopping": [],     # Local shops and markets  
-            "education": [],
-            "transport": [],
-            "health": [],
-            "entertainment": [],
-            "beaches_waterfront": [],
-            "within_walking": [],     # Within 800m (realistic walking)
-            "short_drive": [],        # 1-3km
-            "accessible": []          # 3-10km
-        }
-        
-        # Enhanced categorization with Cape Town specific landmarks
-        major_shopping_keywords = ['cavendish square', 'canal walk', 'v&a waterfront', 'tyger valley', 'century city', 'kenilworth centre', 'blue route mall', 'bayside mall']
-        local_shopping_keywords = ['spar', 'pick n pay', 'woolworths', 'checkers', 'market', 'centre', 'plaza']
-        education_keywords = ['school', 'university', 'uct', 'college', 'academy', 'campus', 'stellenbosch']
-        transport_keywords = ['station', 'airport', 'taxi', 'bus', 'train', 'transport', 'myCiti']
-        health_keywords = ['hospital', 'clinic', 'medical', 'doctor', 'health', 'groote schuur', 'red cross']
-        entertainment_keywords = ['restaurant', 'bar', 'cafe', 'park', 'gym', 'pool', 'theatre', 'museum']
-        beach_keywords = ['beach', 'promenade', 'waterfront', 'seapoint', 'camps bay', 'clifton', 'muizenberg']
-        
-        for poi in prop.points_of_interest[:20]:  # More POIs for richer context
-            poi_name = poi.name.lower()
-            distance = poi.distance
-            poi_str = f"{poi.name} ({distance:.1f}km)"
-            
-            # Categorize by type with more granular classification
-            if any(keyword in poi_name for keyword in major_shopping_keywords):
-                context["major_shopping"].append(poi_str)
-            elif any(keyword in poi_name for keyword in local_shopping_keywords):
-                context["local_shopping"].append(poi_str)
-            elif any(keyword in poi_name for keyword in education_keywords):
-                context["education"].append(poi_str)
-            elif any(keyword in poi_name for keyword in transport_keywords):
-                context["transport"].append(poi_str)
-            elif any(keyword in poi_name for keyword in health_keywords):
-                context["health"].append(poi_str)
-            elif any(keyword in poi_name for keyword in beach_keywords):
-                context["beaches_waterfront"].append(poi_str)
-            elif any(keyword in poi_name for keyword in entertainment_keywords):
-                context["entertainment"].append(poi_str)
-            
-            # Enhanced distance categorization (more realistic for Cape Town)
-            if distance <= 0.8:  # Real walking distance
-                context["within_walking"].append(poi_str)
-            elif distance <= 3.0:
-                context["short_drive"].append(poi_str)
-            elif distance <= 10.0:
-                context["accessible"].append(poi_str)
-        
-        # Clean up empty categories and provide summary
-        cleaned_context = {k: v for k, v in context.items() if v}
+        # Categorized at ingest - copy so the prompt formatting can't mutate the shared features
+        context = dict(poi_features.nearby_context)
         
         # Add accessibility summary
-        if context["within_walking"]:
-            cleaned_context["walkability_score"] = f"High - {len(context['within_walking'])} amenities within walking distance"
-        elif context["short_drive"]:
-            cleaned_context["walkability_score"] = f"Moderate - {len(context['short_drive'])} amenities within short drive"
+        if poi_features.within_walking_count:
+            context["walkability_score"] = f"High - {poi_features.within_walking_count} amenities within walking distance"
+        elif poi_features.short_drive_count:
+            context["walkability_score"] = f"Moderate - {poi_features.short_drive_count} amenities within short drive"
         else:
-            cleaned_context["walkability_score"] = "Low - limited nearby amenities"
+            context["walkability_score"] = "Low - limited nearby amenities"
         
-        return cleaned_context
+        return context
     
-    def _create_enhanced_rerank_prompt_v2(self, query: str, property_summaries: List[Dict], batch_info: str) -> str:
+    def _create_enhanced_rerank_prompt_v2(self, query: str, property_summaries: List[Dict], batch_info: str,
+                                          explain_top: int = 0) -> str:
         """Create ultra-sophisticated prompt with enhanced impossible query detection"""
         
         properties_text = ""
@@ -465,6 +390,15 @@ Property {prop['id']}: {prop['type']}, {prop['bedrooms']} bed, {prop['bathrooms'
 📋 Listing: #{prop['listing_details']['listing_number']}
 """
         
+        if explain_top:
+            response_format = f"""RESPOND WITH ONLY JSON - every property gets a score; the {explain_top} highest-scoring ones also get a "why":
+[{{"id": 0, "score": 89, "why": {{"positive_points": [{{"point": "Brief positive aspect", "details": "How it meets the user's needs"}}], "negative_points": [{{"point": "Concern or missing feature", "details": "What may not fully meet the requirements"}}], "overall_summary": "1-2 sentence summary of the match"}}}}, {{"id": 1, "score": 67}}, {{"id": 2, "score": 43}}]
+
+"why" rules: 2-3 positive points, 0-2 negative points, specific to THIS user query and THIS property's listed details."""
+        else:
+            response_format = """RESPOND WITH ONLY JSON:
+[{"id": 0, "score": 89}, {"id": 1, "score": 67}, {"id": 2, "score": 43}]"""
+        
         prompt = f"""
 🔍 USER QUERY ANALYSIS: "{query}"
 📍 DATASET: Cape Town properties only (Western Cape, South Africa)
@@ -547,8 +481,7 @@ You are the PRIMARY INTELLIGENCE LAYER with comprehensive reasoning power. Your
 
 🎯 CRITICAL: Use NATURAL, REALISTIC scores like: 67, 82, 91, 44, 76, 88 (avoid multiples of 5/10)
 
-RESPOND WITH ONLY JSON:
-[{{"id": 0, "score": 89}}, {{"id": 1, "score": 67}}, {{"id": 2, "score": 43}}]
+{response_format}
 
 Be the SMARTEST property matching intelligence - objective, comprehensive, and unafraid to give high scores when deserved!
 """
@@ -628,29 +561,32 @@ Be the SMARTEST property matching intelligence - objective, comprehensive, and u
             logger.warning(f"Failed to parse AI ranking JSON: {e}")
             return []
     
-    def _apply_enhanced_ai_scores(self, properties: List[Property], ai_ranking: List[Dict]) -> List[Property]:
+    def _attach_rationales(self, records: List[ScoreRecord], ai_ranking: List[Dict]):
+        """Keep the "why" the model returned with each record, for the explanation cache"""
+        for item in ai_ranking:
+            index = item.get('id') if isinstance(item, dict) else None
+            if isinstance(index, int) and 0 <= index < len(records) and isinstance(item.get('why'), dict):
+                records[index].rationale = item['why']
+    
+    def _apply_enhanced_ai_scores(self, records: List[ScoreRecord], ai_ranking: List[Dict]) -> List[ScoreRecord]:
         """Apply enhanced AI scores with realistic variance"""
         
-        logger.info(f"Applying enhanced AI scores to {len(properties)} properties")
+        logger.info(f"Applying enhanced AI scores to {len(records)} properties")
         
         if not ai_ranking:
             logger.warning("No AI ranking provided, using vector scores with realistic adjustment")
             # Add slight realistic variance to vector scores
-            for i, prop in enumerate(properties):
-                base_score = getattr(prop, 'searchScore', 50.0)
+            for i, record in enumerate(records):
                 # Add small realistic variance
                 variance = (i * 2.3) % 7  # Creates: 0, 2.3, 4.6, 6.9, 2.2, 4.5, etc.
-                prop.searchScore = min(100.0, max(15.0, base_score + variance - 3))
-            return properties
+                record.score = min(100.0, max(15.0, record.score + variance - 3))
+            return records
         
         # Create mapping of AI scores
         ai_scores = {item['id']: item['score'] for item in ai_ranking if 'id' in item and 'score' in item}
         
-        # Apply AI scores to properties
-        scored_properties = []
-        for i, prop in enumerate(properties):
-            prop_copy = prop.model_copy(deep=True)
-            
+        # Apply AI scores to the records - properties are shared, only scores change
+        for i, record in enumerate(records):
             if i in ai_scores:
                 # Apply AI score with minor realistic adjustment if too synthetic
                 ai_score = float(ai_scores[i])
@@ -661,19 +597,16 @@ Be the SMARTEST property matching intelligence - objective, comprehensive, and u
                     variance = ((i * 7) % 6) - 2  # Creates: -2, 1, 3, 0, -1, 2, etc.
                     ai_score = max(15.0, min(100.0, ai_score + variance))
                 
-                prop_copy.searchScore = ai_score
+                record.score = ai_score
                 logger.info(f"Property {i} AI score: {ai_score}")
             else:
                 # Fallback score if AI didn't rank this property
-                prop_copy.searchScore = getattr(prop_copy, 'searchScore', 50.0)
-                logger.info(f"Property {i} fallback score: {prop_copy.searchScore}")
-            
-            scored_properties.append(prop_copy)
+                logger.info(f"Property {i} fallback score: {record.score}")
         
         # Sort by AI-assigned scores (highest first)
-        scored_properties.sort(key=lambda x: x.searchScore, reverse=True)
+        scored_records = sorted(records, key=lambda x: x.score, reverse=True)
         
-        final_scores = [prop.searchScore for prop in scored_properties]
+        final_scores = [record.score for record in scored_records]
         logger.info(f"Final enhanced scores: {final_scores}")
         
-        return scored_properties 
\ No newline at end of file
+        return scored_records
\ No newline at end of file
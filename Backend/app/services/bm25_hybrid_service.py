@@ -5,9 +5,10 @@ Combines BM25 keyword matching with vector search and AI re-ranking for maximum
 
 import logging
 import asyncio
+import json
 import time
 import math
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
 from collections import Counter, defaultdict
 import re
 
@@ -15,6 +16,13 @@ from app.models.property import Property, PropertySearchRequest
 from app.services.supabase_property_service import SupabasePropertyService
 from app.services.vector_service import VectorService
 from app.services.ai_rerank_service import AIRerankService
+from app.services.explanation_service import explanation_service
+from app.services.score_record import ScoreRecord, attach_scores
+from app.services.local_rerank_service import LOCAL_RERANK_DECISIONS, local_rerank_service
+from app.core.metrics import stage_timer, current_pipeline
+from app.core.llm_accounting import usage_scope
+from app.core.circuit_breaker import openai_chat_breaker
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +63,7 @@ class BM25HybridService:
         
         timing = {}
         start_time = time.time()
+        current_pipeline.set("hybrid")
         
         logger.info(f"Starting BM25 Hybrid search for: {search_request.query}")
         
@@ -88,47 +97,29 @@ class BM25HybridService:
             timing['corpus_build_ms'] = round((time.time() - corpus_start) * 1000, 1)
             
             # Step 3: Calculate BM25 scores
-            bm25_start = time.time()
-            bm25_scores = self._calculate_bm25_scores(search_request.query, candidate_properties)
-            timing['bm25_calculation_ms'] = round((time.time() - bm25_start) * 1000, 1)
+            with stage_timer("bm25_scoring") as bm25_timer:
+                bm25_scores = self._calculate_bm25_scores(search_request.query, candidate_properties)
+            timing['bm25_calculation_ms'] = bm25_timer.elapsed_ms
             
             # Step 4: Apply hybrid scoring (Vector + BM25)
-            hybrid_start = time.time()
-            hybrid_scored_properties = self._apply_hybrid_scoring(
-                candidate_properties, vector_scores, bm25_scores
-            )
-            timing['hybrid_scoring_ms'] = round((time.time() - hybrid_start) * 1000, 1)
-            logger.info(f"Hybrid scoring completed, got {len(hybrid_scored_properties)} properties")
-            
-            # Step 5: AI re-ranking for final intelligence layer
-            ai_start = time.time()
-            if self.ai_rerank_service.openai_client:  # Re-enable AI
-                # Take top candidates for AI re-ranking
-                top_candidates = hybrid_scored_properties[:search_request.page_size * 2]
-                logger.info(f"Sending {len(top_candidates)} properties to AI re-ranking")
-                
-                # Use AI service but preserve our hybrid base scores
-                ai_ranked_properties = await self.ai_rerank_service._intelligent_rerank_with_batching(
-                    top_candidates, search_request.query
+            with stage_timer("scoring") as hybrid_timer:
+                hybrid_scored_records = self._apply_hybrid_scoring(
+                    candidate_properties, vector_scores, bm25_scores
                 )
-                
-                # Combine hybrid scores with AI scores using weighted approach
-                final_properties = self._combine_hybrid_and_ai_scores(
-                    ai_ranked_properties, hybrid_scored_properties
-                )
-                logger.info(f"AI re-ranking completed, got {len(final_properties)} final properties")
-            else:
-                logger.info("AI not available - using hybrid scores only")
-                final_properties = hybrid_scored_properties
+            timing['hybrid_scoring_ms'] = hybrid_timer.elapsed_ms
+            logger.info(f"Hybrid scoring completed, got {len(hybrid_scored_records)} properties")
             
-            timing['ai_rerank_ms'] = round((time.time() - ai_start) * 1000, 1)
+            # Step 5: AI re-ranking for final intelligence layer - token usage scoped to this search
+            with stage_timer("rerank") as rerank_timer, usage_scope() as usage:
+                final_records = await self._rerank_records(hybrid_scored_records, search_request)
+            timing['ai_rerank_ms'] = rerank_timer.elapsed_ms
             
-            # Final selection
-            result_properties = final_properties[:search_request.page_size]
+            # Final selection - scores are attached to the served page only
+            result_properties = attach_scores(final_records[:search_request.page_size])
             
             # Compile detailed metrics
             timing['total_ms'] = round((time.time() - start_time) * 1000, 1)
-            timing['token_usage'] = getattr(self.ai_rerank_service, 'token_usage', {})
+            timing['token_usage'] = usage.token_usage()
             
             # Add scoring breakdown for analysis (this might be where the error occurs)
             try:
@@ -150,6 +141,160 @@ class BM25HybridService:
             logger.error(f"Traceback: {traceback.format_exc()}")
             raise e
     
+    async def _rerank_records(
+        self,
+        hybrid_records: List[ScoreRecord],
+        search_request: PropertySearchRequest,
+        candidate_count: Optional[int] = None
+    ) -> List[ScoreRecord]:
+        """AI re-ranking of the top hybrid candidates - hybrid order stands when AI is unavailable"""
+        if local_rerank_service.enabled:
+            final_records = await self._local_rerank_records(hybrid_records, search_request, candidate_count)
+        elif not self.ai_rerank_service.openai_client:
+            logger.info("AI not available - using hybrid scores only")
+            return hybrid_records
+        else:
+            # Take top candidates for AI re-ranking
+            top_candidates = hybrid_records[:candidate_count or search_request.page_size * 2]
+            logger.info(f"Sending {len(top_candidates)} properties to AI re-ranking")
+            
+            # Use AI service but preserve our hybrid base scores
+            ai_ranked_records = await self.ai_rerank_service._intelligent_rerank_with_batching(
+                top_candidates, search_request.query
+            )
+            
+            # Combine hybrid scores with AI scores using weighted approach
+            final_records = self._combine_hybrid_and_ai_scores(ai_ranked_records)
+            logger.info(f"AI re-ranking completed, got {len(final_records)} final properties")
+        
+        # Rationales from the rerank call become cached explanations for the final top few
+        await explanation_service.cache_rerank_rationales(search_request.query, final_records)
+        return final_records
+    
+    async def _local_rerank_records(
+        self,
+        hybrid_records: List[ScoreRecord],
+        search_request: PropertySearchRequest,
+        candidate_count: Optional[int] = None
+    ) -> List[ScoreRecord]:
+        """
+        Distilled local ranker in place of (or in front of) the LLM:
+        local - local scores only; gate - the LLM reranks only when the local
+        order is not confident; head - the LLM rescores just the local top few
+        """
+        mode = local_rerank_service.mode
+        page_size = search_request.page_size
+        top_candidates = hybrid_records[:candidate_count or page_size * 2]
+        
+        with stage_timer("local_rerank"):
+            scored, separation = local_rerank_service.rerank(search_request.query, top_candidates, page_size)
+            local_records = self._combine_hybrid_and_ai_scores(scored)
+            for record in local_records:
+                record.final_score_method = f"local_{record.final_score_method}"
+        
+        llm_available = self.ai_rerank_service.openai_client is not None and not openai_chat_breaker.is_open
+        llm_reason = local_rerank_service.needs_llm(search_request.query, separation) if mode == "gate" else None
+        if mode == "local" or not llm_available or (mode == "gate" and llm_reason is None):
+            LOCAL_RERANK_DECISIONS.inc(mode=mode, decision="local_only")
+            return local_records
+        
+        # Hand the LLM the same inputs as an ordinary rerank
+        llm_records = local_records[:settings.LOCAL_RERANK_LLM_HEAD] if mode == "head" else top_candidates
+        for record in llm_records:
+            record.score = record.hybrid_base_score
+        LOCAL_RERANK_DECISIONS.inc(mode=mode, decision="llm_head" if mode == "head" else llm_reason)
+        
+        ai_ranked_records = await self.ai_rerank_service._intelligent_rerank_with_batching(
+            llm_records, search_request.query
+        )
+        final_records = self._combine_hybrid_and_ai_scores(ai_ranked_records)
+        if mode == "head":
+            # The locally ranked tail follows the LLM-scored head
+            final_records += local_records[settings.LOCAL_RERANK_LLM_HEAD:]
+        return final_records
+    
+    async def stream_hybrid_search(self, search_request: PropertySearchRequest) -> AsyncIterator[str]:
+        """
+        Progressive hybrid search as Server-Sent Events:
+        the vector-ranked first page as soon as it is hydrated, then order/score
+        updates once BM25 hybrid scoring and AI re-ranking finish
+        """
+        current_pipeline.set("hybrid")
+        start_time = time.time()
+        page_size = search_request.page_size
+        sent_listings = set()
+        
+        def event(payload: Dict[str, Any]) -> str:
+            payload['elapsed_ms'] = round((time.time() - start_time) * 1000, 1)
+            return f"data: {json.dumps(payload, default=str)}\n\n"
+        
+        def page_update(stage: str, records: List[ScoreRecord]) -> str:
+            page = attach_scores(records[:page_size])
+            new_properties = [prop for prop in page if str(prop.listing_number) not in sent_listings]
+            sent_listings.update(str(prop.listing_number) for prop in new_properties)
+            return event({
+                'type': 'update',
+                'stage': stage,
+                'order': [
+                    {'listing_number': str(prop.listing_number), 'searchScore': round(prop.searchScore, 1)}
+                    for prop in page
+                ],
+                'properties': [prop.model_dump(mode='json') for prop in new_properties]
+            })
+        
+        try:
+            yield event({'type': 'start', 'searchTerm': search_request.query})
+            
+            # Stage 1: vector ranking - hydrate just the first page so it can go out immediately
+            vector_results = await self.vector_service.search_similar_properties(
+                query=search_request.query,
+                top_k=min(page_size * 6, 60),
+                filter_dict=None
+            )
+            if not vector_results:
+                yield event({'type': 'complete', 'totalResults': 0})
+                return
+            
+            vector_scores = {str(prop_id): score for prop_id, score, _ in vector_results}
+            first_ids = [int(prop_id) for prop_id, _, _ in vector_results[:page_size]]
+            first_page = await self.property_service.get_properties_batch(first_ids)
+            first_page.sort(key=lambda prop: vector_scores.get(str(prop.listing_number), 0), reverse=True)
+            
+            first_records = []
+            for prop in first_page:
+                record = ScoreRecord(prop, round(vector_scores.get(str(prop.listing_number), 0) * 100, 1))
+                record.vector_score = vector_scores.get(str(prop.listing_number), 0)
+                first_records.append(record)
+            sent_listings.update(record.listing_id for record in first_records)
+            yield event({
+                'type': 'results',
+                'stage': 'vector',
+                'properties': [prop.model_dump(mode='json') for prop in attach_scores(first_records)]
+            })
+            
+            # Stage 2: hydrate the rest of the pool, BM25 + hybrid scoring
+            rest_ids = [int(prop_id) for prop_id, _, _ in vector_results[page_size:]]
+            candidate_properties = first_page + (await self.property_service.get_properties_batch(rest_ids) if rest_ids else [])
+            if not self.corpus_built:
+                await self._build_bm25_corpus()
+            with stage_timer("bm25_scoring"):
+                bm25_scores = self._calculate_bm25_scores(search_request.query, candidate_properties)
+            with stage_timer("scoring"):
+                hybrid_records = self._apply_hybrid_scoring(candidate_properties, vector_scores, bm25_scores)
+            yield page_update('hybrid', hybrid_records)
+            
+            # Stage 3: AI re-ranking
+            if self.ai_rerank_service.openai_client or local_rerank_service.enabled:
+                with stage_timer("rerank"):
+                    final_records = await self._rerank_records(hybrid_records, search_request)
+                yield page_update('rerank', final_records)
+            
+            yield event({'type': 'complete', 'totalResults': len(candidate_properties)})
+            
+        except Exception as e:
+            logger.error(f"Error in stream_hybrid_search: {e}")
+            yield event({'type': 'error', 'message': 'Search failed'})
+    
     async def _build_bm25_corpus(self):
         """Build BM25 corpus from all properties for accurate IDF calculations"""
         
@@ -271,10 +416,10 @@ class BM25HybridService:
         return bm25_scores
     
     def _apply_hybrid_scoring(self, properties: List[Property], vector_scores: Dict[str, float], 
-                            bm25_scores: Dict[str, float]) -> List[Property]:
+                            bm25_scores: Dict[str, float]) -> List[ScoreRecord]:
         """Apply hybrid scoring combining vector and BM25 scores with improved normalization"""
         
-        hybrid_properties = []
+        hybrid_records = []
         
         # Get BM25 score statistics for intelligent scaling
         bm25_vals = list(bm25_scores.values())
@@ -306,42 +451,31 @@ class BM25HybridService:
             # Ensure reasonable bounds
             hybrid_score = min(100, max(10, hybrid_score))
             
-            # Store component scores for analysis
-            prop_copy = prop.model_copy(deep=True)
-            prop_copy.searchScore = hybrid_score
-            
-            # Store detailed component scores
-            setattr(prop_copy, 'vector_score', vector_score)
-            setattr(prop_copy, 'vector_100', vector_100)
-            setattr(prop_copy, 'bm25_score', raw_bm25)
-            setattr(prop_copy, 'bm25_contribution', bm25_contribution)
-            setattr(prop_copy, 'hybrid_base_score', hybrid_score)
+            # Store detailed component scores for analysis
+            record = ScoreRecord(prop, hybrid_score)
+            record.vector_score = vector_score
+            record.vector_100 = vector_100
+            record.bm25_score = raw_bm25
+            record.bm25_contribution = bm25_contribution
+            record.hybrid_base_score = hybrid_score
             
-            hybrid_properties.append(prop_copy)
+            hybrid_records.append(record)
         
         # Sort by hybrid score
-        hybrid_properties.sort(key=lambda x: x.searchScore, reverse=True)
+        hybrid_records.sort(key=lambda x: x.score, reverse=True)
         
-        return hybrid_properties
+        return hybrid_records
     
-    def _combine_hybrid_and_ai_scores(self, ai_properties: List[Property], 
-                                    hybrid_properties: List[Property]) -> List[Property]:
+    def _combine_hybrid_and_ai_scores(self, ai_records: List[ScoreRecord]) -> List[ScoreRecord]:
         """
         NEW AI-CENTRIC SCORING: Let AI lead, with vector+BM25 providing enhancement
         AI has the most sophisticated understanding, so it should be the primary driver
         """
         
-        # Create mapping of hybrid base scores
-        hybrid_base_scores = {}
-        for prop in hybrid_properties:
-            hybrid_base_scores[str(prop.listing_number)] = getattr(prop, 'hybrid_base_score', 50.0)
-        
-        final_properties = []
-        
-        for prop in ai_properties:
-            prop_id = str(prop.listing_number)
-            ai_score = getattr(prop, 'searchScore', 50.0)
-            hybrid_base = hybrid_base_scores.get(prop_id, 50.0)
+        for record in ai_records:
+            # AI re-ranking replaced the score; the hybrid base travels on the same record
+            ai_score = record.score
+            hybrid_base = record.hybrid_base_score if record.hybrid_base_score is not None else 50.0
             
             # NEW AI-DOMINANT SCORING LOGIC
             # Philosophy: AI knows best, use hybrid as enhancement only when it helps
@@ -379,18 +513,13 @@ class BM25HybridService:
             final_score = min(100, max(10, final_score))
             
             # Store final score and components
-            prop_copy = prop.model_copy(deep=True)
-            prop_copy.searchScore = final_score
-            setattr(prop_copy, 'ai_score', ai_score)
-            setattr(prop_copy, 'hybrid_base_score', hybrid_base)
-            setattr(prop_copy, 'final_score_method', self._get_ai_centric_scoring_method(ai_score, hybrid_base))
-            
-            final_properties.append(prop_copy)
+            record.score = final_score
+            record.ai_score = ai_score
+            record.hybrid_base_score = hybrid_base
+            record.final_score_method = self._get_ai_centric_scoring_method(ai_score, hybrid_base)
         
         # Final sort by AI-centric combined score
-        final_properties.sort(key=lambda x: x.searchScore, reverse=True)
-        
-        return final_properties
+        return sorted(ai_records, key=lambda x: x.score, reverse=True)
     
     def _get_ai_centric_scoring_method(self, ai_score: float, hybrid_base: float) -> str:
         """Get description of which AI-centric scoring method was used"""
@@ -5,23 +5,101 @@ Optimized for speed with batch queries and minimal data transfer
 
 import logging
 import asyncio
+import json
 import time
-from typing import List, Optional, Dict, Any, Tuple
-from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
 import numpy as np
 
-from app.models.property import PropertySearchRequest, PropertySearchResponse, Property
+from app.models.property import PropertySearchRequest, PropertySearchResponse, Property, PropertyType
 from app.services.supabase_property_service import SupabasePropertyService
 from app.services.vector_service import VectorService
+from app.services.query_parser import ParsedQuery, parse_query, normalize_query, AMENITY_KEYWORDS
+from app.services.poi_features import get_poi_features
+from app.services.poi_index import poi_gazetteer
+from app.core.config import settings
+from app.core.metrics import stage_timer, current_pipeline
+from app.core.single_flight import SingleFlight
+from app.core.search_cache import search_cache, ranked_list_key
 
 logger = logging.getLogger(__name__)
 
+# Vector candidates per search - the whole pool is ranked once and cached for paging
+CANDIDATE_POOL_SIZE = 100
+HYDRATION_CHUNK_SIZE = 500  # Listing numbers per Supabase fetch when hydrating a batch's candidates
+
+# Module-level so every EnhancedSearchService instance coalesces onto the same in-flight searches
+search_flight = SingleFlight("enhanced_search")
+
+def search_request_key(search_request: PropertySearchRequest) -> Tuple:
+    """Identity of a search for coalescing: normalized query plus everything that shapes the response"""
+    filters = search_request.filters.model_dump(exclude_none=True) if search_request.filters else {}
+    return (
+        normalize_query(search_request.query),
+        json.dumps(filters, sort_keys=True, default=str),
+        search_request.page,
+        search_request.page_size,
+        search_request.sort_by,
+        search_request.sort_order
+    )
+
+def determine_scoring_scenario(median_score: float, std_dev: float, parsed_query: ParsedQuery) -> str:
+    """Determine which of the 4 vector score scenarios applies"""
+    
+    # Quality thresholds adjusted for actual vector score ranges we're seeing  
+    high_quality_threshold = 0.62  # Median vector score > 0.62 (adjusted based on observations)
+    high_variance_threshold = 0.04  # Standard deviation > 0.04 (tighter variance threshold)
+    
+    is_high_quality = median_score > high_quality_threshold
+    is_high_variance = std_dev > high_variance_threshold
+    
+    # Check for impossible combinations (overrides quality assessment)
+    has_impossible = len(parsed_query.impossible_combinations) > 0
+    
+    if has_impossible:
+        return "low_quality_high_variance"  # Impossible queries always low quality
+    elif is_high_quality and not is_high_variance:
+        return "high_quality_low_variance"   # Good simple matches
+    elif is_high_quality and is_high_variance:
+        return "high_quality_high_variance"  # Good specific matches
+    elif not is_high_quality and not is_high_variance:
+        return "low_quality_low_variance"    # Poor simple matches
+    else:
+        return "low_quality_high_variance"   # Poor scattered matches
+
 @dataclass
 class SearchResult:
     """Lightweight search result"""
     property: Property
     final_score: float
 
+# Stable integer codes for property types in the columnar scoring arrays
+PROPERTY_TYPE_CODES = {property_type: code for code, property_type in enumerate(PropertyType)}
+
+# Accepted property type values per type keyword mentioned in the query
+TYPE_MATCHES = {
+    'apartment': ['apartment', 'flat'],
+    'flat': ['apartment', 'flat'],
+    'house': ['house', 'villa'],
+    'townhouse': ['townhouse', 'town house']
+}
+
+# Proximity score factors per distance band (km) to a place named in the query:
+# (band upper bounds, factor per band, factor beyond the last band) - POI_UNLISTED_TARGET_FACTOR when not listed
+WALKING_DISTANCE_BANDS = ([1.0, 1.5, 2.0], [1.4, 1.25, 1.1], 0.7)  # Realistic walking in Cape Town
+NEARBY_DISTANCE_BANDS = ([2.0, 4.0], [1.2, 1.1], 1.0)
+
+@dataclass
+class CandidateColumns:
+    """Columnar view of a candidate set for vectorized scoring"""
+    price: np.ndarray            # float64
+    bedrooms: np.ndarray         # float64, NaN when unparseable
+    type_code: np.ndarray        # int8 index into PROPERTY_TYPE_CODES
+    in_cbd: np.ndarray           # bool
+    has_pois: np.ndarray         # bool
+    vector_score: np.ndarray     # float64 raw vector similarity
+    target_km: Dict[str, np.ndarray] = field(default_factory=dict)  # float32 per named place, inf when not listed
+
 class EnhancedSearchService:
     """High-performance search service optimized for speed"""
     
@@ -30,7 +108,29 @@ class EnhancedSearchService:
         self.vector_service = VectorService()
     
     async def search_properties(self, search_request: PropertySearchRequest) -> PropertySearchResponse:
-        """Optimized main search method"""
+        """Optimized main search method - identical concurrent searches share one execution"""
+        current_pipeline.set("enhanced")
+        results = await search_flight.do(
+            search_request_key(search_request),
+            lambda: self._search_properties(search_request)
+        )
+        if results.searchTerm != search_request.query:
+            # Coalesced onto a differently-cased/spaced copy of this query
+            results = results.model_copy(update={'searchTerm': search_request.query})
+        return results
+    
+    async def _search_properties(self, search_request: PropertySearchRequest) -> PropertySearchResponse:
+        list_key = ranked_list_key(search_request)
+        start_idx = (search_request.page - 1) * search_request.page_size
+        
+        # Pages of an already-ranked search are a cache read
+        cached_page = await search_cache.read_page(list_key, start_idx, search_request.page_size)
+        if cached_page is not None:
+            page_items, total_results = cached_page
+            return self._build_page_response(
+                search_request, list_key, [Property.model_validate(item) for item in page_items], total_results
+            )
+        
         try:
             # Phase 1: Fast vector search
             vector_results = await self._fast_vector_search(search_request)
@@ -42,48 +142,164 @@ class EnhancedSearchService:
             # Phase 2: Batch fetch properties (MAJOR OPTIMIZATION)
             properties = await self._batch_fetch_properties(vector_results, search_request)
             
-            if not properties:
-                logger.info(f"No properties found for query: {search_request.query}")
-                return PropertySearchResponse(
-                    properties=[],
-                    totalResults=0,
-                    searchTerm=search_request.query,
-                    page=search_request.page,
-                    pageSize=search_request.page_size,
-                    totalPages=0,
-                    hasNext=False,
-                    hasPrevious=False
-                )
-            
-            # Phase 3: Fast scoring and ranking
-            scored_properties = self._fast_score_and_rank(properties, vector_results, search_request)
-            
-            # Phase 4: Pagination
-            total_results = len(scored_properties)
-            total_pages = (total_results + search_request.page_size - 1) // search_request.page_size
+            # Phase 3 + 4: score, cache and paginate
+            return self._rank_and_page(search_request, list_key, properties, vector_results)
             
+        except Exception as e:
+            logger.error(f"Fast search failed: {e}")
+            import traceback
+            traceback.print_exc()
+            return await self._fast_fallback_search(search_request)
+    
+    async def search_properties_batch(self, search_requests: List[PropertySearchRequest]) -> List[PropertySearchResponse]:
+        """
+        Run many searches together: cached pages are served directly, the rest share
+        one embedding call, concurrent Pinecone queries and chunked concurrent Supabase
+        fetches of the union of their candidates; each search is then scored independently,
+        and a search whose candidates couldn't be fetched falls back on its own
+        """
+        current_pipeline.set("enhanced_batch")
+        responses: List[Optional[PropertySearchResponse]] = [None] * len(search_requests)
+        list_keys = [ranked_list_key(search_request) for search_request in search_requests]
+        
+        pending = []
+        for position, (search_request, list_key) in enumerate(zip(search_requests, list_keys)):
             start_idx = (search_request.page - 1) * search_request.page_size
-            end_idx = start_idx + search_request.page_size
-            paginated_properties = scored_properties[start_idx:end_idx]
+            cached_page = await search_cache.read_page(list_key, start_idx, search_request.page_size)
+            if cached_page is not None:
+                page_items, total_results = cached_page
+                responses[position] = self._build_page_response(
+                    search_request, list_key, [Property.model_validate(item) for item in page_items], total_results
+                )
+            else:
+                pending.append(position)
+        
+        if pending:
+            # One embedding request and concurrent vector queries for every uncached search
+            batch_vector_results = await self.vector_service.search_similar_properties_batch(
+                [search_requests[position].query for position in pending],
+                top_k=CANDIDATE_POOL_SIZE,
+                filter_dicts=[self._fast_build_filters(search_requests[position].filters) for position in pending]
+            )
+            vector_results_by_position = {
+                position: [(prop_id, score) for prop_id, score, _ in matches]
+                for position, matches in zip(pending, batch_vector_results)
+            }
             
-            logger.info(f"Fast search completed: {len(paginated_properties)} properties returned in optimized pipeline")
+            # The union of all candidates, fetched in concurrent chunks
+            union_ids = sorted({int(prop_id) for matches in vector_results_by_position.values() for prop_id, _ in matches})
+            hydrated, unhydrated_ids = await self._hydrate_candidates(union_ids)
             
+            for position in pending:
+                search_request = search_requests[position]
+                vector_results = vector_results_by_position[position]
+                if not vector_results or any(prop_id in unhydrated_ids for prop_id, _ in vector_results):
+                    responses[position] = await self._fast_fallback_search(search_request)
+                    continue
+                try:
+                    # Scoring writes searchScore onto the properties, so each search ranks its own copies
+                    candidate_ids = {prop_id for prop_id, _ in vector_results}
+                    properties = [prop.model_copy() for prop in hydrated if str(prop.listing_number) in candidate_ids]
+                    properties = self._filter_candidates(properties, search_request)
+                    responses[position] = self._rank_and_page(search_request, list_keys[position], properties, vector_results)
+                except Exception as e:
+                    logger.error(f"Batch search failed for '{search_request.query}': {e}")
+                    responses[position] = await self._fast_fallback_search(search_request)
+        
+        logger.info(f"Batch search completed: {len(search_requests)} searches, {len(search_requests) - len(pending)} from cache")
+        return responses
+    
+    async def _hydrate_candidates(self, listing_numbers: List[int]) -> Tuple[List[Property], Set[str]]:
+        """Fetch candidates in HYDRATION_CHUNK_SIZE chunks concurrently; returns (properties, ids of failed chunks)"""
+        chunks = [listing_numbers[start:start + HYDRATION_CHUNK_SIZE]
+                  for start in range(0, len(listing_numbers), HYDRATION_CHUNK_SIZE)]
+        outcomes = await asyncio.gather(
+            *(self.property_service.get_properties_batch(chunk) for chunk in chunks), return_exceptions=True
+        )
+        
+        hydrated, unhydrated_ids = [], set()
+        for chunk, outcome in zip(chunks, outcomes):
+            # get_properties_batch returns [] on errors - an empty chunk counts as failed
+            if isinstance(outcome, Exception) or not outcome:
+                logger.warning(f"Candidate hydration failed for {len(chunk)} listings: {outcome or 'no rows'}")
+                unhydrated_ids.update(str(listing_number) for listing_number in chunk)
+            else:
+                hydrated.extend(outcome)
+        return hydrated, unhydrated_ids
+    
+    def _rank_and_page(
+        self,
+        search_request: PropertySearchRequest,
+        list_key: str,
+        properties: List[Property],
+        vector_results: List[Tuple[str, float]]
+    ) -> PropertySearchResponse:
+        """Score the whole candidate pool, cache the ranked list and return the requested page"""
+        if not properties:
+            logger.info(f"No properties found for query: {search_request.query}")
             return PropertySearchResponse(
-                properties=paginated_properties,
-                totalResults=total_results,
+                properties=[],
+                totalResults=0,
                 searchTerm=search_request.query,
                 page=search_request.page,
                 pageSize=search_request.page_size,
-                totalPages=total_pages,
-                hasNext=search_request.page < total_pages,
-                hasPrevious=search_request.page > 1
+                totalPages=0,
+                hasNext=False,
+                hasPrevious=False
             )
-            
-        except Exception as e:
-            logger.error(f"Fast search failed: {e}")
-            import traceback
-            traceback.print_exc()
-            return await self._fast_fallback_search(search_request)
+        
+        start_idx = (search_request.page - 1) * search_request.page_size
+        page_end = start_idx + search_request.page_size
+        
+        # Score the whole pool, but select and sort only up to the requested page
+        with stage_timer("scoring"):
+            scores = self._score_candidates(properties, vector_results, search_request)
+            paginated_properties = self._take_ranked(properties, scores, top_k=page_end)[start_idx:]
+        
+        # Cache the full ranked list after responding so later pages skip the pipeline - the full
+        # sort runs in the background store, only the partial top-k selection above is on the request path
+        search_cache.store_in_background(list_key, self._serialize_ranked(list(properties), scores.copy()))
+        
+        logger.info(f"Fast search completed: {len(paginated_properties)} properties returned in optimized pipeline")
+        
+        return self._build_page_response(search_request, list_key, paginated_properties, len(properties))
+    
+    def _serialize_ranked(self, properties: List[Property], scores: np.ndarray) -> Callable[[], List[Dict[str, Any]]]:
+        """Deferred serialization of the whole pool in score order, for the background cache store"""
+        def serialize() -> List[Dict[str, Any]]:
+            return [
+                {**properties[index].model_dump(mode='json'), 'searchScore': float(scores[index])}
+                for index in self._top_k_indices(scores, None)
+            ]
+        return serialize
+    
+    def _build_page_response(
+        self,
+        search_request: PropertySearchRequest,
+        list_key: str,
+        page_properties: List[Property],
+        total_results: int
+    ) -> PropertySearchResponse:
+        """Page of a ranked list, with a cursor to the next page"""
+        page_size = search_request.page_size
+        total_pages = (total_results + page_size - 1) // page_size
+        has_next = search_request.page < total_pages
+        next_offset = search_request.page * page_size
+        
+        if has_next:
+            search_cache.prefetch(list_key, next_offset, page_size)
+        
+        return PropertySearchResponse(
+            properties=page_properties,
+            totalResults=total_results,
+            searchTerm=search_request.query,
+            page=search_request.page,
+            pageSize=page_size,
+            totalPages=total_pages,
+            hasNext=has_next,
+            hasPrevious=search_request.page > 1,
+            nextCursor=search_cache.encode_cursor(list_key, next_offset, page_size) if has_next else None
+        )
     
     async def _fast_vector_search(self, search_request: PropertySearchRequest) -> List[Tuple[str, float]]:
         """Optimized vector search with minimal data"""
@@ -94,7 +310,7 @@ class EnhancedSearchService:
         # Fast vector search
         vector_results = await self.vector_service.search_similar_properties(
             query=query,
-            top_k=min(100, search_request.page_size * 5),  # Reduced candidates for speed
+            top_k=CANDIDATE_POOL_SIZE,  # Fixed pool so every page comes from one ranked list
             filter_dict=self._fast_build_filters(search_request.filters)
         )
         
@@ -131,12 +347,15 @@ class EnhancedSearchService:
         
         # Single batch query instead of N individual queries
         properties = await self.property_service.get_properties_batch(property_ids)
+        properties = self._filter_candidates(properties, search_request)
         
-        # Apply any remaining filters
+        logger.info(f"Batch fetched {len(properties)} properties")
+        return properties
+    
+    def _filter_candidates(self, properties: List[Property], search_request: PropertySearchRequest) -> List[Property]:
+        """Apply any filters Pinecone couldn't"""
         if search_request.filters:
             properties = [p for p in properties if self._fast_filter_check(p, search_request.filters)]
-        
-        logger.info(f"Batch fetched {len(properties)} properties")
         return properties
     
     def _fast_filter_check(self, property_obj: Property, filters) -> bool:
@@ -166,398 +385,160 @@ class EnhancedSearchService:
         self, 
         properties: List[Property], 
         vector_results: List[Tuple[str, float]], 
-        search_request: PropertySearchRequest
+        search_request: PropertySearchRequest,
+        top_k: Optional[int] = None
     ) -> List[Property]:
-        """Hybrid property-retrieval scoring: semantic similarity + property context intelligence"""
+        """Hybrid property-retrieval scoring: semantic similarity + property context intelligence
         
-        # Create lookup for vector scores
-        vector_scores = {prop_id: score for prop_id, score in vector_results}
+        Scores the whole candidate set as NumPy column expressions and returns the
+        top_k properties ordered by score (all of them when top_k is None).
+        """
         
-        if not vector_scores:
+        if not vector_results or not properties:
             return []
         
-        # Analyze query for property retrieval context
-        query_context = self._analyze_property_query_context(search_request.query)
-        
-        # Analyze vector scores for normalization
-        all_vector_scores = [score for _, score in vector_results]
-        min_vector = min(all_vector_scores)
-        max_vector = max(all_vector_scores)
-        vector_range = max_vector - min_vector if max_vector > min_vector else 0.1
-        
-        scored_properties = []
-        
-        for prop in properties:
-            raw_vector_score = vector_scores.get(str(prop.listing_number), 0.5)
-            
-            # Apply property-context aware scoring
-            final_score = self._apply_property_context_scoring(
-                prop, raw_vector_score, all_vector_scores, query_context
-            )
-            
-            # Hard constraints
-            final_score = min(final_score, 100.0)
-            final_score = max(final_score, 15.0)
-            final_score = round(final_score, 1)
-            
-            # Assign score to property  
-            prop.searchScore = final_score
-            scored_properties.append(prop)
-        
-        # Sort by score (highest first)
-        scored_properties.sort(key=lambda x: x.searchScore, reverse=True)
-        
-        return scored_properties
+        scores = self._score_candidates(properties, vector_results, search_request)
+        return self._take_ranked(properties, scores, top_k)
     
-    def _analyze_property_query_context(self, query: str) -> Dict[str, Any]:
-        """Analyze query for property-specific context vs general semantic search"""
-        query_lower = query.lower()
-        
-        context = {
-            'is_property_focused': True,
-            'impossibility_penalty': 0.0,
-            'core_property_terms': [],
-            'unrealistic_combinations': [],
-            'price_constraints': [],
-            'location_terms': []
-        }
-        
-        # Core property terms that should exist in real estate
-        property_terms = {
-            'types': ['apartment', 'house', 'flat', 'townhouse', 'villa', 'property'],
-            'rooms': ['bedroom', 'bathroom', 'bed', 'bath'],
-            'features': ['pool', 'garden', 'garage', 'balcony', 'view', 'parking'],
-            'locations': ['area', 'neighborhood', 'district', 'suburb', 'city', 'cbd', 'centre', 'center'],
-            'descriptors': ['luxury', 'modern', 'spacious', 'furnished', 'unfurnished'],
-            'proximity': ['walking distance', 'close to', 'near', 'uct', 'waterfront', 'v&a'],
-            'price': ['under', 'below', 'over', 'above', 'million', 'rand', 'budget', 'cheap', 'expensive']
-        }
-        
-        # Extract all relevant terms (including price and location terms)
-        property_term_count = 0
-        for category, terms in property_terms.items():
-            for term in terms:
-                if term in query_lower:
-                    context['core_property_terms'].append(term)
-                    property_term_count += 1
-                    
-                    # Categorize for constraint enforcement
-                    if category == 'price':
-                        context['price_constraints'].append(term)
-                    elif category == 'locations' or category == 'proximity':
-                        context['location_terms'].append(term)
-        
-        # Add the full query for constraint parsing
-        context['core_property_terms'].append(query_lower)
-        
-        # Detect impossible/unrealistic property concepts
-        impossible_terms = [
-            'castle', 'moat', 'medieval', 'underwater', 'submarine', 'spaceship',
-            'pyramid', 'temple', 'church', 'cathedral', 'palace', 'fortress',
-            'eiffel tower', 'flying', 'floating', 'underground mansion'
-        ]
-        
-        impossible_count = 0
-        for term in impossible_terms:
-            if term in query_lower:
-                context['unrealistic_combinations'].append(term)
-                impossible_count += 1
-        
-        # Calculate impossibility penalty based on ratio
-        total_terms = len(query_lower.split())
-        if total_terms > 0:
-            impossible_ratio = impossible_count / total_terms
-            property_ratio = property_term_count / total_terms
-            
-            # Strong penalty if query is mostly impossible terms with few property terms
-            if impossible_ratio > 0.3 and property_ratio < 0.3:
-                context['impossibility_penalty'] = 0.6  # 60% penalty
-            elif impossible_ratio > 0.2:
-                context['impossibility_penalty'] = 0.3  # 30% penalty
-            elif impossible_ratio > 0.1:
-                context['impossibility_penalty'] = 0.15  # 15% penalty
-        
-        context['is_property_focused'] = property_ratio > impossible_ratio
+    def _score_candidates(
+        self,
+        properties: List[Property],
+        vector_results: List[Tuple[str, float]],
+        search_request: PropertySearchRequest
+    ) -> np.ndarray:
+        """Final score of every candidate, aligned with properties"""
         
-        return context
-    
-    def _apply_property_context_scoring(
-        self, 
-        prop: Property, 
-        raw_vector_score: float, 
-        all_vector_scores: List[float],
-        query_context: Dict[str, Any]
-    ) -> float:
-        """Apply property-context aware scoring that properly enforces constraints and leverages POI data"""
+        # Parse the query once - every scoring pass below consumes the same ParsedQuery
+        parsed_query = parse_query(search_request.query)
         
-        min_vector = min(all_vector_scores)
-        max_vector = max(all_vector_scores)
+        # Vector score normalization bounds, computed once per search
+        vector_scores = {prop_id: score for prop_id, score in vector_results}
+        all_vector_scores = np.fromiter((score for _, score in vector_results), dtype=np.float64)
+        min_vector = float(all_vector_scores.min())
+        max_vector = float(all_vector_scores.max())
         vector_range = max_vector - min_vector if max_vector > min_vector else 0.1
         
-        # Normalize vector score to 20-100% range (removed artificial 95% cap)
-        normalized_vector = (raw_vector_score - min_vector) / vector_range if vector_range > 0 else 0.5
-        base_score = 20 + (normalized_vector * 80)  # 20% to 100% range
+        columns = self._build_candidate_columns(properties, vector_scores)
         
-        # Apply impossibility penalty - this is key for property retrieval vs semantic similarity
-        if query_context['impossibility_penalty'] > 0:
-            penalty_factor = 1.0 - query_context['impossibility_penalty']
-            base_score *= penalty_factor
-            
-            # Additional penalty for high vector scores on impossible queries
-            if base_score > 70 and query_context['impossibility_penalty'] > 0.3:
-                base_score *= 0.5  # Further 50% reduction
-        
-        # CRITICAL: Apply hard constraint penalties using actual property data
-        base_score = self._apply_hard_constraints(prop, query_context, base_score)
-        
-        # Apply proximity bonuses using actual POI distance data
-        base_score = self._apply_proximity_bonuses(prop, query_context, base_score)
-        
-        # Apply minimal core criteria penalties (bedroom/type mismatches)
-        final_score = self._apply_core_criteria_only(prop, ' '.join(query_context['core_property_terms']), base_score)
-        
-        return final_score
-    
-    def _apply_hard_constraints(self, prop: Property, query_context: Dict[str, Any], current_score: float) -> float:
-        """Apply hard constraints that must be satisfied - price, location, etc."""
-        
-        query_lower = ' '.join(query_context['core_property_terms']).lower()
-        
-        # PRICE CONSTRAINTS - These must be strictly enforced
-        import re
-        
-        # "under X million" or "below X million" patterns
-        price_under_match = re.search(r'(?:under|below|less than)\s+(\d+(?:\.\d+)?)\s*(?:million|mil|m)', query_lower)
-        if price_under_match:
-            price_limit = float(price_under_match.group(1)) * 1000000
-            if prop.price > price_limit:
-                # MAJOR penalty for exceeding price limit
-                current_score *= 0.3  # Reduce to 30% for price violations
-        
-        # "over X million" or "above X million" patterns  
-        price_over_match = re.search(r'(?:over|above|more than)\s+(\d+(?:\.\d+)?)\s*(?:million|mil|m)', query_lower)
-        if price_over_match:
-            price_minimum = float(price_over_match.group(1)) * 1000000
-            if prop.price < price_minimum:
-                current_score *= 0.3  # Major penalty for being under minimum
-        
-        # GEOGRAPHIC CONSTRAINTS - Detect impossible locations
-        impossible_locations = [
-            'johannesburg', 'joburg', 'jozi', 'gauteng',
-            'durban', 'kwazulu', 'natal', 
-            'pretoria', 'tshwane',
-            'bloemfontein', 'free state',
-            'port elizabeth', 'gqeberha', 'eastern cape',
-            'polokwane', 'limpopo',
-            'kimberley', 'northern cape',
-            'nelspruit', 'mbombela', 'mpumalanga',
-            'rustenburg', 'north west',
-            'london', 'new york', 'paris', 'dubai'
-        ]
-        
-        for location in impossible_locations:
-            if location in query_lower:
-                # Heavy penalty for impossible geographic requests
-                current_score *= 0.2  # Reduce to 20% for impossible locations
-                break
+        # Places named in the query resolve to candidate distance columns in one gazetteer lookup
+        columns.target_km = poi_gazetteer.target_distances(properties, parsed_query)
+        final_scores = self._score_candidate_columns(columns, parsed_query, min_vector, vector_range)
         
-        return current_score
+        # Hard constraints
+        return np.round(np.clip(final_scores, 15.0, 100.0), 1)
     
-    def _apply_proximity_bonuses(self, prop: Property, query_context: Dict[str, Any], current_score: float) -> float:
-        """Apply proximity bonuses using actual POI distance data"""
+    def _take_ranked(self, properties: List[Property], scores: np.ndarray, top_k: Optional[int] = None) -> List[Property]:
+        """Properties in score order with searchScore set - only the top_k when given"""
         
-        query_lower = ' '.join(query_context['core_property_terms']).lower()
-        
-        if not prop.points_of_interest:
-            return current_score
-        
-        # UCT proximity detection and scoring
-        if any(term in query_lower for term in ['uct', 'university of cape town', 'university cape town']):
-            uct_pois = [
-                poi for poi in prop.points_of_interest 
-                if 'uct' in poi.name.lower() or 
-                   ('university' in poi.name.lower() and 'cape town' in poi.name.lower()) or
-                   'university of cape town' in poi.name.lower()
-            ]
-            
-            if uct_pois:
-                closest_uct = min(uct_pois, key=lambda x: x.distance)
-                uct_distance = closest_uct.distance
-                
-                # Determine if "walking distance" was specified
-                walking_requested = any(term in query_lower for term in [
-                    'walking distance', 'walk to', 'walkable', 'walking'
-                ])
-                
-                if walking_requested:
-                    # Strict walking distance criteria (realistic walking in Cape Town)
-                    if uct_distance <= 1.0:  # Within 1km = excellent walking distance
-                        current_score *= 1.4  # 40% bonus
-                    elif uct_distance <= 1.5:  # 1-1.5km = good walking distance  
-                        current_score *= 1.25  # 25% bonus
-                    elif uct_distance <= 2.0:  # 1.5-2km = manageable walk
-                        current_score *= 1.1   # 10% bonus
-                    else:  # > 2km = not really walking distance
-                        current_score *= 0.7   # 30% penalty for false claims
-                else:
-                    # Just "close to UCT" without walking specified
-                    if uct_distance <= 2.0:
-                        current_score *= 1.2   # 20% bonus for being close
-                    elif uct_distance <= 4.0:
-                        current_score *= 1.1   # 10% bonus for reasonable distance
-        
-        # V&A Waterfront proximity
-        if any(term in query_lower for term in ['v&a', 'waterfront', 'v and a']):
-            waterfront_pois = [
-                poi for poi in prop.points_of_interest 
-                if 'waterfront' in poi.name.lower() or 'v&a' in poi.name.lower()
-            ]
-            
-            if waterfront_pois:
-                closest_waterfront = min(waterfront_pois, key=lambda x: x.distance)
-                if closest_waterfront.distance <= 2.0:
-                    current_score *= 1.15  # 15% bonus for waterfront proximity
-        
-        # CBD proximity
-        if any(term in query_lower for term in ['cbd', 'city centre', 'city center', 'downtown']):
-            # Properties already in CBD areas should get bonus
-            cbd_areas = ['cape town city centre', 'foreshore', 'city bowl']
-            if any(area in prop.location.neighborhood.lower() for area in cbd_areas):
-                current_score *= 1.1  # 10% bonus for being in CBD
+        scored_properties = []
+        for index in self._top_k_indices(scores, top_k):
+            prop = properties[index]
+            prop.searchScore = float(scores[index])
+            scored_properties.append(prop)
         
-        return current_score
+        return scored_properties
     
-    def _apply_core_criteria_only(self, prop: Property, query_lower: str, base_score: float) -> float:
-        """Apply only essential criteria enforcement - trust the vector for everything else"""
+    def _build_candidate_columns(self, properties: List[Property], vector_scores: Dict[str, float]) -> CandidateColumns:
+        """Turn the candidate set into columnar arrays for vectorized scoring"""
         
-        # Bedroom enforcement - ONLY if explicitly mentioned
-        import re
-        bedroom_match = re.search(r'(\d+)\s*(?:bed|bedroom)', query_lower)
-        if bedroom_match:
-            requested_beds = int(bedroom_match.group(1))
-            try:
-                prop_beds = int(prop.bedrooms) if prop.bedrooms else 0
-                if prop_beds != requested_beds:
-                    # Moderate penalty - the vector should handle most of this
-                    base_score *= 0.7  # 30% penalty for bedroom mismatch
-            except:
-                pass
-        
-        # Property type enforcement - ONLY if explicitly mentioned  
-        type_keywords = ['apartment', 'flat', 'house', 'townhouse']
-        mentioned_type = None
-        for keyword in type_keywords:
-            if keyword in query_lower:
-                mentioned_type = keyword
-                break
+        price, bedrooms, type_code, vector_score = [], [], [], []
+        in_cbd, has_pois = [], []
         
-        if mentioned_type:
-            prop_type = prop.type.value.lower()
-            # Allow some flexibility in type matching
-            type_matches = {
-                'apartment': ['apartment', 'flat'],
-                'flat': ['apartment', 'flat'], 
-                'house': ['house', 'villa'],
-                'townhouse': ['townhouse', 'town house']
-            }
-            
-            expected_types = type_matches.get(mentioned_type, [mentioned_type])
-            if not any(t in prop_type for t in expected_types):
-                # Light penalty - let vector handle semantic similarity
-                base_score *= 0.85  # 15% penalty for type mismatch
-        
-        return base_score
+        for prop in properties:
+            price.append(prop.price)
+            try:
+                bedrooms.append(int(prop.bedrooms) if prop.bedrooms else 0)
+            except (TypeError, ValueError):
+                bedrooms.append(np.nan)
+            type_code.append(PROPERTY_TYPE_CODES.get(prop.type, 0))
+            vector_score.append(vector_scores.get(str(prop.listing_number), 0.5))
+            
+            # Precomputed at ingest - constant-time lookups, no POI scanning
+            poi_features = get_poi_features(prop)
+            in_cbd.append(poi_features.in_cbd)
+            has_pois.append(poi_features.poi_count > 0)
+        
+        return CandidateColumns(
+            price=np.array(price, dtype=np.float64),
+            bedrooms=np.array(bedrooms, dtype=np.float64),
+            type_code=np.array(type_code, dtype=np.int8),
+            in_cbd=np.array(in_cbd, dtype=bool),
+            has_pois=np.array(has_pois, dtype=bool),
+            vector_score=np.array(vector_score, dtype=np.float64)
+        )
     
-    def _analyze_query_intent(self, query: str) -> Dict[str, Any]:
-        """Analyze query to understand user intent and extract specific requirements"""
-        query_lower = query.lower()
-        
-        analysis = {
-            'is_specific': False,
-            'requested_features': [],
-            'proximity_terms': [],
-            'quality_terms': [],
-            'price_constraints': [],
-            'impossible_combinations': []
-        }
-        
-        # Detect specific feature requests
-        feature_keywords = {
-            'pool': ['pool', 'swimming pool'],
-            'garden': ['garden', 'yard', 'outdoor space'],
-            'garage': ['garage', 'parking', 'carport'],
-            'view': ['view', 'sea view', 'ocean view', 'mountain view', 'table mountain'],
-            'balcony': ['balcony', 'terrace', 'patio'],
-            'security': ['security', 'secure', 'gated'],
-            'modern': ['modern', 'contemporary', 'newly renovated'],
-            'luxury': ['luxury', 'luxurious', 'upmarket', 'high-end']
-        }
-        
-        for feature, keywords in feature_keywords.items():
-            if any(keyword in query_lower for keyword in keywords):
-                analysis['requested_features'].append(feature)
-                analysis['is_specific'] = True
+    def _score_candidate_columns(
+        self,
+        columns: CandidateColumns,
+        parsed_query: ParsedQuery,
+        min_vector: float,
+        vector_range: float
+    ) -> np.ndarray:
+        """Property-context scoring rules applied to a whole candidate set at once"""
+        
+        # Normalize vector score to 20-100% range
+        normalized_vector = (columns.vector_score - min_vector) / vector_range
+        scores = 20 + (normalized_vector * 80)
+        
+        # Impossibility penalty
+        if parsed_query.impossibility_penalty > 0:
+            scores *= 1.0 - parsed_query.impossibility_penalty
+            if parsed_query.impossibility_penalty > 0.3:
+                scores = np.where(scores > 70, scores * 0.5, scores)
+        
+        # Hard constraints - price and impossible locations
+        if parsed_query.max_price is not None:
+            scores = np.where(columns.price > parsed_query.max_price, scores * 0.3, scores)
+        if parsed_query.min_price is not None:
+            scores = np.where(columns.price < parsed_query.min_price, scores * 0.3, scores)
+        if parsed_query.impossible_locations:
+            scores *= 0.2
+        
+        # Proximity to places named in the query - listings without POI data stay neutral
+        bounds, factors, beyond = WALKING_DISTANCE_BANDS if parsed_query.walking_requested else NEARBY_DISTANCE_BANDS
+        for target_km in columns.target_km.values():
+            factor = np.select([target_km <= bound for bound in bounds], factors, beyond)
+            factor = np.where(np.isfinite(target_km), factor, settings.POI_UNLISTED_TARGET_FACTOR)
+            scores = np.where(columns.has_pois, scores * factor, scores)
+        
+        if 'cbd' in parsed_query.proximity_targets:
+            scores = np.where(columns.has_pois & columns.in_cbd, scores * 1.1, scores)
+        
+        # Core criteria - bedroom and type mismatches
+        if parsed_query.bedrooms is not None:
+            bedroom_mismatch = ~np.isnan(columns.bedrooms) & (columns.bedrooms != parsed_query.bedrooms)
+            scores = np.where(bedroom_mismatch, scores * 0.7, scores)
+        
+        if parsed_query.mentioned_type:
+            expected_types = TYPE_MATCHES.get(parsed_query.mentioned_type, [parsed_query.mentioned_type])
+            type_ok = np.array(
+                [any(t in property_type.value for t in expected_types) for property_type in PROPERTY_TYPE_CODES],
+                dtype=bool
+            )
+            scores = np.where(type_ok[columns.type_code], scores, scores * 0.85)
         
-        # Detect proximity requirements with distance sensitivity
-        proximity_patterns = {
-            'walking_distance': ['walking distance', 'walk to', 'walkable'],
-            'close_to': ['close to', 'near', 'nearby', 'next to'],
-            'within': ['within', 'less than', 'under']
-        }
+        return scores
+    
+    @staticmethod
+    def _top_k_indices(scores: np.ndarray, top_k: Optional[int]) -> np.ndarray:
+        """Indices of the top_k scores, highest first; ties keep candidate order
+        
+        Always the first top_k of the full ranking, so a page ranked here lines up
+        with the cached ranked list: every candidate tied with the k-th score is
+        kept through the stable sort before cutting to top_k.
+        """
+        
+        if top_k is not None and 0 < top_k < len(scores):
+            kth_score = -np.partition(-scores, top_k - 1)[top_k - 1]
+            selected = np.flatnonzero(scores >= kth_score)
+        else:
+            selected = np.arange(len(scores))
         
-        for prox_type, keywords in proximity_patterns.items():
-            if any(keyword in query_lower for keyword in keywords):
-                analysis['proximity_terms'].append(prox_type)
-                analysis['is_specific'] = True
-        
-        # Detect quality/price terms
-        if any(term in query_lower for term in ['luxury', 'upmarket', 'premium', 'high-end']):
-            analysis['quality_terms'].append('luxury')
-            analysis['is_specific'] = True
-        
-        if any(term in query_lower for term in ['affordable', 'budget', 'cheap', 'under']):
-            analysis['quality_terms'].append('budget')
-            analysis['is_specific'] = True
-        
-        # Detect impossible/conflicting combinations for Cape Town
-        impossible_checks = [
-            (['airport', 'walking'], ['ocean', 'sea view']),  # Airport + ocean view
-            (['eiffel tower', 'paris'], ['cape town']),        # European landmarks
-            (['castle', 'moat'], ['apartment', 'modern']),     # Medieval + modern
-            (['underwater', 'submarine'], ['house', 'apartment']) # Impossible structures
-        ]
-        
-        for combo1, combo2 in impossible_checks:
-            has_combo1 = any(term in query_lower for term in combo1)
-            has_combo2 = any(term in query_lower for term in combo2)
-            if has_combo1 and has_combo2:
-                analysis['impossible_combinations'].append((combo1, combo2))
-        
-        return analysis
-    
-    def _determine_scoring_scenario(self, median_score: float, std_dev: float, query_analysis: Dict) -> str:
+        return selected[np.argsort(-scores[selected], kind='stable')][:top_k]
+    
+    def _determine_scoring_scenario(self, median_score: float, std_dev: float, parsed_query: ParsedQuery) -> str:
         """Determine which of the 4 scenarios applies"""
-        
-        # Quality thresholds adjusted for actual vector score ranges we're seeing  
-        high_quality_threshold = 0.62  # Median vector score > 0.62 (adjusted based on observations)
-        high_variance_threshold = 0.04  # Standard deviation > 0.04 (tighter variance threshold)
-        
-        is_high_quality = median_score > high_quality_threshold
-        is_high_variance = std_dev > high_variance_threshold
-        
-        # Check for impossible combinations (overrides quality assessment)
-        has_impossible = len(query_analysis['impossible_combinations']) > 0
-        
-        if has_impossible:
-            return "low_quality_high_variance"  # Impossible queries always low quality
-        elif is_high_quality and not is_high_variance:
-            return "high_quality_low_variance"   # Good simple matches
-        elif is_high_quality and is_high_variance:
-            return "high_quality_high_variance"  # Good specific matches
-        elif not is_high_quality and not is_high_variance:
-            return "low_quality_low_variance"    # Poor simple matches
-        else:
-            return "low_quality_high_variance"   # Poor scattered matches
+        return determine_scoring_scenario(median_score, std_dev, parsed_query)
     
     def _apply_scenario_scoring(
         self, 
@@ -565,7 +546,7 @@ class EnhancedSearchService:
         raw_vector_score: float, 
         all_vector_scores: List[float],
         scenario: str,
-        query_analysis: Dict
+        parsed_query: ParsedQuery
     ) -> float:
         """Apply scenario-specific scoring logic"""
         
@@ -579,22 +560,22 @@ class EnhancedSearchService:
         if scenario == "high_quality_low_variance":
             # Simple query with good matches - high scores, tight distribution
             base_score = 75 + (normalized_position * 20)  # 75-95%
-            bonus = self._calculate_targeted_bonuses(prop, query_analysis, max_bonus=5)
+            bonus = self._calculate_targeted_bonuses(prop, parsed_query, max_bonus=5)
             
         elif scenario == "high_quality_high_variance":
             # Specific query with good matches - wide distribution, high top scores
             base_score = 40 + (normalized_position * 50)  # 40-90%
-            bonus = self._calculate_targeted_bonuses(prop, query_analysis, max_bonus=15)
+            bonus = self._calculate_targeted_bonuses(prop, parsed_query, max_bonus=15)
             
         elif scenario == "low_quality_low_variance":
             # Simple query, poor matches - low scores, tight distribution
             base_score = 20 + (normalized_position * 15)  # 20-35%
-            bonus = self._calculate_targeted_bonuses(prop, query_analysis, max_bonus=3)
+            bonus = self._calculate_targeted_bonuses(prop, parsed_query, max_bonus=3)
             
         else:  # low_quality_high_variance
             # Impossible/conflicting query - wide distribution, all low scores
             base_score = 15 + (normalized_position * 25)  # 15-40%
-            bonus = self._calculate_targeted_bonuses(prop, query_analysis, max_bonus=5)
+            bonus = self._calculate_targeted_bonuses(prop, parsed_query, max_bonus=5)
         
         # Add small variance for uniqueness
         import random
@@ -609,18 +590,18 @@ class EnhancedSearchService:
         
         return round(final_score, 1)
     
-    def _calculate_targeted_bonuses(self, prop: Property, query_analysis: Dict, max_bonus: float) -> float:
+    def _calculate_targeted_bonuses(self, prop: Property, parsed_query: ParsedQuery, max_bonus: float) -> float:
         """Calculate bonuses ONLY for specifically requested features"""
         bonus = 0.0
-        bonus_per_feature = max_bonus / max(len(query_analysis['requested_features']) + 1, 1)
+        bonus_per_feature = max_bonus / max(len(parsed_query.requested_features) + 1, 1)
         
         # Only award bonuses for explicitly requested features
-        for requested_feature in query_analysis['requested_features']:
+        for requested_feature in parsed_query.requested_features:
             if self._property_has_feature(prop, requested_feature):
                 bonus += bonus_per_feature
         
         # Proximity bonuses only if specifically requested
-        if query_analysis['proximity_terms'] and prop.points_of_interest:
+        if parsed_query.proximity_terms and prop.points_of_interest:
             # Award bonus based on POI richness if proximity was requested
             poi_count = len(prop.points_of_interest)
             if poi_count > 15:
@@ -647,36 +628,23 @@ class EnhancedSearchService:
         keywords = feature_mappings.get(feature, [feature])
         return any(keyword.lower() in ' '.join(prop.features).lower() for keyword in keywords)
     
-    def _enforce_core_criteria(self, prop: Property, query: str, current_score: float) -> float:
+    def _enforce_core_criteria(self, prop: Property, parsed_query: ParsedQuery, current_score: float) -> float:
         """Enforce core criteria - bedroom count and property type must match"""
-        query_lower = query.lower()
         
         # Bedroom enforcement - this is critical
-        import re
-        bedroom_match = re.search(r'(\d+)\s*(?:bed|bedroom)', query_lower)
-        if bedroom_match:
-            requested_beds = int(bedroom_match.group(1))
+        if parsed_query.bedrooms is not None:
             try:
                 prop_beds = int(prop.bedrooms) if prop.bedrooms else 0
-                if prop_beds != requested_beds:
+                if prop_beds != parsed_query.bedrooms:
                     # Major penalty for wrong bedroom count
                     current_score *= 0.4  # Reduce to 40% of original score
             except:
                 pass
         
         # Property type enforcement
-        type_keywords = {
-            'apartment': ['apartment', 'flat', 'unit'],
-            'house': ['house', 'home', 'villa'],
-            'townhouse': ['townhouse', 'town house']
-        }
-        
-        for prop_type, keywords in type_keywords.items():
-            if any(keyword in query_lower for keyword in keywords):
-                if prop.type.value.lower() != prop_type:
-                    # Moderate penalty for wrong property type
-                    current_score *= 0.7  # Reduce to 70% of original score
-                break
+        if parsed_query.type_group and prop.type.value.lower() != parsed_query.type_group:
+            # Moderate penalty for wrong property type
+            current_score *= 0.7  # Reduce to 70% of original score
         
         return current_score
     
@@ -838,6 +806,7 @@ class EnhancedSearchService:
         """Calculate comprehensive scores as true percentages (0-100) with decimal precision"""
         
         scored_results = []
+        parsed_query = parse_query(search_request.query)
         
         for property_obj, vector_score, metadata in filtered_results:
             # Start with vector score as base percentage (0-100)
@@ -845,10 +814,10 @@ class EnhancedSearchService:
             base_score = vector_score * 100
             
             # Quick metadata bonuses (simplified for speed)
-            metadata_bonus = self._calculate_quick_metadata_bonus(property_obj, search_request)
+            metadata_bonus = self._calculate_quick_metadata_bonus(property_obj, parsed_query)
             
             # Quick location bonus (simplified for speed)  
-            location_bonus = self._calculate_quick_location_bonus(property_obj, search_request)
+            location_bonus = self._calculate_quick_location_bonus(property_obj, parsed_query)
             
             # Calculate final score as true percentage
             final_score = base_score + metadata_bonus + location_bonus
@@ -872,85 +841,54 @@ class EnhancedSearchService:
         
         return scored_results
     
-    def _calculate_quick_metadata_bonus(self, property_obj: Property, search_request: PropertySearchRequest) -> float:
+    def _calculate_quick_metadata_bonus(self, property_obj: Property, parsed_query: ParsedQuery) -> float:
         """Fast metadata matching with significant bonuses for good matches"""
         bonus = 0.0
-        query_lower = search_request.query.lower()
         
         # Bedroom matching (worth up to +25%)
-        if any(word in query_lower for word in ['bedroom', 'bed', 'br']):
-            import re
-            bedroom_match = re.search(r'(\d+)\s*(?:bed|bedroom|br)', query_lower)
-            if bedroom_match:
-                requested_beds = int(bedroom_match.group(1))
-                try:
-                    prop_beds = int(property_obj.bedrooms) if property_obj.bedrooms else 0
-                    if prop_beds == requested_beds:
-                        bonus += 25.0  # Perfect bedroom match
-                    elif abs(prop_beds - requested_beds) == 1:
-                        bonus += 15.0  # Close match
-                except:
-                    pass
+        if parsed_query.bedrooms is not None:
+            try:
+                prop_beds = int(property_obj.bedrooms) if property_obj.bedrooms else 0
+                if prop_beds == parsed_query.bedrooms:
+                    bonus += 25.0  # Perfect bedroom match
+                elif abs(prop_beds - parsed_query.bedrooms) == 1:
+                    bonus += 15.0  # Close match
+            except:
+                pass
         
         # Property type matching (worth up to +20%)
-        type_keywords = {
-            'apartment': ['apartment', 'flat', 'unit'],
-            'house': ['house', 'home', 'villa'],
-            'townhouse': ['townhouse', 'town house']
-        }
-        
-        for prop_type, keywords in type_keywords.items():
-            if any(keyword in query_lower for keyword in keywords):
-                if property_obj.type.value.lower() == prop_type:
-                    bonus += 20.0
-                break
+        if parsed_query.type_group and property_obj.type.value.lower() == parsed_query.type_group:
+            bonus += 20.0
         
         # Price range matching (worth up to +15%)
-        if 'under' in query_lower or 'below' in query_lower:
-            import re
-            price_match = re.search(r'(?:under|below)\s+(?:r\s*)?(\d+(?:\.\d+)?)\s*(?:million|mil|m)', query_lower)
-            if price_match:
-                try:
-                    price_limit = float(price_match.group(1)) * 1000000
-                    if property_obj.price <= price_limit:
-                        bonus += 15.0  # Within price range
-                    elif property_obj.price <= price_limit * 1.2:  # Within 20%
-                        bonus += 8.0
-                except:
-                    pass
+        if parsed_query.max_price is not None:
+            if property_obj.price <= parsed_query.max_price:
+                bonus += 15.0  # Within price range
+            elif property_obj.price <= parsed_query.max_price * 1.2:  # Within 20%
+                bonus += 8.0
         
         # Feature matching (worth up to +10% total)
-        feature_keywords = ['pool', 'garden', 'garage', 'parking', 'security', 'view']
-        for keyword in feature_keywords:
-            if keyword in query_lower:
-                if property_obj.features and any(keyword.lower() in f.lower() for f in property_obj.features):
+        for keyword in AMENITY_KEYWORDS:
+            if keyword in parsed_query.terms:
+                if property_obj.features and any(keyword in f.lower() for f in property_obj.features):
                     bonus += 2.0  # +2% per matching feature
         
         return min(bonus, 30.0)  # Cap metadata bonus at +30%
     
-    def _calculate_quick_location_bonus(self, property_obj: Property, search_request: PropertySearchRequest) -> float:
+    def _calculate_quick_location_bonus(self, property_obj: Property, parsed_query: ParsedQuery) -> float:
         """Fast location scoring with bonuses for area matches"""
         bonus = 0.0
-        query_lower = search_request.query.lower()
         
         # Specific location mentions (worth up to +15%)
-        location_keywords = [
-            'clifton', 'camps bay', 'bantry bay', 'sea point', 'newlands', 
-            'claremont', 'rondebosch', 'constantia', 'southern suburbs', 
-            'northern suburbs', 'city bowl', 'atlantic seaboard'
-        ]
-        
         prop_location = f"{property_obj.location.neighborhood} {property_obj.location.city}".lower()
         
-        for location in location_keywords:
-            if location in query_lower:
-                if location in prop_location or any(word in prop_location for word in location.split()):
-                    bonus += 15.0  # Perfect location match
-                    break
+        for location in parsed_query.locations:
+            if location in prop_location or any(word in prop_location for word in location.split()):
+                bonus += 15.0  # Perfect location match
+                break
         
         # Proximity keywords (worth up to +10%)
-        proximity_keywords = ['near', 'close to', 'walking distance']
-        if any(keyword in query_lower for keyword in proximity_keywords):
+        if parsed_query.has_any(['near', 'close to', 'walking distance']):
             # Simple bonus if property has good POI coverage
             if property_obj.points_of_interest and len(property_obj.points_of_interest) > 10:
                 bonus += 10.0
@@ -0,0 +1,186 @@
+"""
+Explanation Prefetch for PropMatch
+Bounded background worker pool that generates explanations for the top results
+of each search before the user opens them, so the click is an explanation
+cache hit. Work is deduplicated against the cache and the queue, capped by a
+per-minute token budget and a fixed number of workers, and the oldest jobs are
+dropped when searches arrive faster than explanations can be generated.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from app.core.circuit_breaker import openai_chat_breaker
+from app.core.config import settings
+from app.core.llm_accounting import finish_request, usage_scope
+from app.core.metrics import metrics_registry
+from app.core.redis_cache import explanation_cache
+from app.models.property import Property
+from app.services.explanation_service import build_property_data, explanation_service
+
+logger = logging.getLogger(__name__)
+
+ACCOUNTING_ENDPOINT = "background explanation_prefetch"
+INITIAL_TOKENS_PER_EXPLANATION = 1500  # Budget estimate until real usage has been seen
+
+PREFETCH_JOBS = metrics_registry.counter(
+    "propmatch_explanation_prefetch_jobs_total",
+    "Explanation prefetch jobs by outcome (generated, already_cached, dropped_stale, expired, over_budget, "
+    "circuit_open, failed)",
+    ["outcome"]
+)
+
+
+@dataclass
+class PrefetchJob:
+    search_query: str
+    listing_number: str
+    property_data: Dict[str, Any]
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+class ExplanationPrefetcher:
+    """
+    Newest searches are served first: jobs are taken from the tail of a bounded
+    deque, so when it overflows the oldest (stalest) searches fall off the head
+    """
+
+    def __init__(self):
+        self._queue: Deque[PrefetchJob] = deque()
+        self._keys: Set[Tuple[str, str]] = set()  # Queued or in flight
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+        self._in_flight = 0
+        self._spent: Deque[Tuple[float, int]] = deque()  # (time, tokens) over the last minute
+        self._tokens_per_explanation = float(INITIAL_TOKENS_PER_EXPLANATION)
+        self._reserved = 0.0  # Estimated tokens of explanations in flight
+
+    @property
+    def enabled(self) -> bool:
+        return settings.EXPLANATION_PREFETCH_ENABLED
+
+    def schedule(self, search_query: str, properties: List[Property]):
+        """Queue the top results of a finished search - returns immediately"""
+        if not self.enabled or not explanation_service.openai_client:
+            return
+        self._ensure_workers()
+
+        # Reversed so the best result is taken first
+        for prop in reversed(properties[:settings.EXPLANATION_PREFETCH_TOP_N]):
+            key = (search_query.strip().lower(), str(prop.listing_number))
+            if key in self._keys:
+                continue
+            if len(self._queue) >= settings.EXPLANATION_PREFETCH_QUEUE_SIZE:
+                stale = self._queue.popleft()
+                self._keys.discard((stale.search_query.strip().lower(), stale.listing_number))
+                PREFETCH_JOBS.inc(outcome="dropped_stale")
+            self._keys.add(key)
+            self._queue.append(PrefetchJob(search_query, str(prop.listing_number), build_property_data(prop)))
+        self._wakeup.set()
+
+    def _ensure_workers(self):
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        for _ in range(settings.EXPLANATION_PREFETCH_WORKERS - len(self._workers)):
+            # A fresh context, so workers never inherit the scheduling request's usage ledger
+            self._workers.append(asyncio.create_task(self._worker(), context=contextvars.Context()))
+
+    async def _worker(self):
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            job = self._queue.pop()
+            self._in_flight += 1
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                PREFETCH_JOBS.inc(outcome="failed")
+                logger.warning(f"Explanation prefetch failed for property {job.listing_number}: {e}")
+            finally:
+                self._in_flight -= 1
+                self._keys.discard((job.search_query.strip().lower(), job.listing_number))
+
+    async def _run(self, job: PrefetchJob):
+        if time.monotonic() - job.queued_at > settings.EXPLANATION_PREFETCH_MAX_AGE_SECONDS:
+            PREFETCH_JOBS.inc(outcome="expired")
+            return
+        if openai_chat_breaker.is_open:
+            PREFETCH_JOBS.inc(outcome="circuit_open")
+            return
+        if await explanation_cache.has_explanation(job.search_query, job.listing_number):
+            PREFETCH_JOBS.inc(outcome="already_cached")
+            return
+        # In-flight work holds its estimate, so concurrent workers can't overrun the budget together
+        estimate = self._tokens_per_explanation
+        if self._tokens_last_minute() + self._reserved + estimate > settings.EXPLANATION_PREFETCH_TOKENS_PER_MINUTE:
+            PREFETCH_JOBS.inc(outcome="over_budget")
+            return
+
+        self._reserved += estimate
+        try:
+            with usage_scope(ACCOUNTING_ENDPOINT) as usage:
+                try:
+                    written = await explanation_service.pregenerate_explanation(
+                        job.search_query, job.listing_number, job.property_data
+                    )
+                finally:
+                    finish_request(usage, ACCOUNTING_ENDPOINT)
+        finally:
+            self._reserved -= estimate
+
+        totals = usage.totals()
+        tokens = totals['promptTokens'] + totals['completionTokens']
+        if tokens:
+            self._spent.append((time.monotonic(), tokens))
+            # Running estimate of what the next explanation will cost the budget
+            self._tokens_per_explanation = 0.8 * self._tokens_per_explanation + 0.2 * tokens
+        PREFETCH_JOBS.inc(outcome="generated" if written else "already_cached")
+
+    def _tokens_last_minute(self) -> int:
+        cutoff = time.monotonic() - 60
+        while self._spent and self._spent[0][0] < cutoff:
+            self._spent.popleft()
+        return sum(tokens for _, tokens in self._spent)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'workers': len([worker for worker in self._workers if not worker.done()]),
+            'queued': len(self._queue),
+            'in_flight': self._in_flight,
+            'tokens_last_minute': self._tokens_last_minute(),
+            'token_budget_per_minute': settings.EXPLANATION_PREFETCH_TOKENS_PER_MINUTE,
+            'explanation_cache_hit_rate': round(
+                explanation_cache.cache_hits / max(explanation_cache.cache_hits + explanation_cache.cache_misses, 1), 3
+            )
+        }
+
+    async def stop(self):
+        """Cancel the workers and drop queued work - called on application shutdown"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue.clear()
+        self._keys.clear()
+
+
+# Global prefetcher - one queue and budget for the whole process
+explanation_prefetcher = ExplanationPrefetcher()
+
+metrics_registry.gauge(
+    "propmatch_explanation_prefetch_queue",
+    "Explanation prefetch jobs waiting (queued) and being generated (in_flight)",
+    ["state"],
+    lambda: [(("queued",), len(explanation_prefetcher._queue)), (("in_flight",), explanation_prefetcher._in_flight)]
+)
@@ -3,9 +3,13 @@ AI Property Explanation Service
 Generates structured explanations for property matches with streaming support
 """
 
+import asyncio
+import contextvars
 import logging
 import json
-from typing import Dict, Any, List, Optional, AsyncGenerator
+import random
+import time
+from typing import Dict, Any, List, Optional, AsyncGenerator, Set
 from pydantic import BaseModel
 
 from langchain_openai import ChatOpenAI
@@ -17,10 +21,30 @@ from langsmith import traceable
 
 from app.core.config import settings
 from app.core.redis_cache import explanation_cache
+from app.core.metrics import metrics_registry, stage_timer, current_pipeline
+from app.core.llm_accounting import finish_request, record_llm_call, usage_scope
+from app.core.circuit_breaker import openai_chat_breaker
+from app.core.clients import http_timeout, openai_chat_http_client
 from app.models.property import Property
+from app.services.score_record import ScoreRecord
+from app.services.semantic_explanation_cache import SemanticMatch, semantic_explanation_cache
 
 logger = logging.getLogger(__name__)
 
+AUDIT_ACCOUNTING_ENDPOINT = "background explanation_semantic_audit"
+MAX_CONCURRENT_AUDITS = 2
+
+EXPLANATION_PREFILL = metrics_registry.counter(
+    "propmatch_explanation_prefill_total",
+    "Explanations written by the rerank call (written, kept_existing, invalid)",
+    ["outcome"]
+)
+EXPLANATION_CACHE_HITS = metrics_registry.counter(
+    "propmatch_explanation_cache_hits_total",
+    "Explanations served from cache by what wrote them (explanation, rerank, prefetch)",
+    ["source"]
+)
+
 class ExplanationPoint(BaseModel):
     """Individual explanation point (positive or negative)"""
     point: str
@@ -37,12 +61,77 @@ class PropertyExplanation(BaseModel):
     overall_summary: str
     cached: bool = False
 
+def build_property_data(property_obj: Property) -> Dict[str, Any]:
+    """Property fields the explanation prompt uses, as a plain dict"""
+    property_data = {
+        # Core identification
+        "id": getattr(property_obj, 'id', None),
+        "listing_number": getattr(property_obj, 'listing_number', None),
+        "url": getattr(property_obj, 'url', None),
+        
+        # Basic information
+        "title": getattr(property_obj, 'title', ''),
+        "description": getattr(property_obj, 'description', ''),
+        "price": getattr(property_obj, 'price', 0),
+        "currency": getattr(property_obj, 'currency', 'ZAR'),
+        "type": str(getattr(property_obj, 'type', 'APARTMENT')),
+        "status": str(getattr(property_obj, 'status', 'FOR_SALE')),
+        
+        # Specifications
+        "bedrooms": getattr(property_obj, 'bedrooms', 0),
+        "bathrooms": getattr(property_obj, 'bathrooms', 0),
+        "area": getattr(property_obj, 'area', 0),
+        "areaUnit": getattr(property_obj, 'areaUnit', 'm²'),
+        "garages": getattr(property_obj, 'garages', None),
+        "parking": getattr(property_obj, 'parking', None),
+        
+        # Features
+        "features": getattr(property_obj, 'features', []) or [],
+        "garden": getattr(property_obj, 'garden', None),
+        "pools": getattr(property_obj, 'pools', None),
+        "security": getattr(property_obj, 'security', None),
+        
+        # Location
+        "location": {},
+        
+        # Points of interest
+        "points_of_interest": [],
+        
+        # Search score if available
+        "searchScore": getattr(property_obj, 'searchScore', 0)
+    }
+    
+    # Handle location object
+    if hasattr(property_obj, 'location') and property_obj.location:
+        loc = property_obj.location
+        property_data["location"] = {
+            "address": getattr(loc, 'address', ''),
+            "neighborhood": getattr(loc, 'neighborhood', ''),
+            "city": getattr(loc, 'city', ''),
+            "postalCode": getattr(loc, 'postalCode', None),
+            "country": getattr(loc, 'country', 'South Africa')
+        }
+    
+    # Handle points of interest
+    if hasattr(property_obj, 'points_of_interest') and property_obj.points_of_interest:
+        for poi in property_obj.points_of_interest:
+            poi_data = {
+                "name": getattr(poi, 'name', ''),
+                "category": getattr(poi, 'category', ''),
+                "distance": getattr(poi, 'distance', 0.0),
+                "distance_str": getattr(poi, 'distance_str', '')
+            }
+            property_data["points_of_interest"].append(poi_data)
+    
+    return property_data
+
 class PropertyExplanationService:
     """Service for generating AI property match explanations"""
     
     def __init__(self):
         self.openai_client = None
         self.streaming_llm = None
+        self._audits: Set[asyncio.Task] = set()
         self._initialize_openai()
         
     def _initialize_openai(self):
@@ -57,7 +146,10 @@ class PropertyExplanationService:
                 model="gpt-3.5-turbo",
                 temperature=0.3,
                 openai_api_key=settings.OPENAI_API_KEY,
-                max_tokens=800
+                openai_api_base=settings.OPENAI_BASE_URL,
+                max_tokens=800,
+                request_timeout=http_timeout(settings.OPENAI_CHAT_READ_TIMEOUT_SECONDS),
+                http_async_client=openai_chat_http_client()
             )
             
             # Streaming LLM for real-time responses
@@ -65,8 +157,12 @@ class PropertyExplanationService:
                 model="gpt-3.5-turbo",
                 temperature=0.3,
                 openai_api_key=settings.OPENAI_API_KEY,
+                openai_api_base=settings.OPENAI_BASE_URL,
                 max_tokens=800,
-                streaming=True
+                streaming=True,
+                stream_usage=True,
+                request_timeout=http_timeout(settings.OPENAI_CHAT_READ_TIMEOUT_SECONDS),
+                http_async_client=openai_chat_http_client()
             )
             
             logger.info("OpenAI LangChain clients initialized for explanation service")
@@ -76,6 +172,9 @@ class PropertyExplanationService:
             self.openai_client = None
             self.streaming_llm = None
     
+    def _model_name(self) -> str:
+        return self.openai_client.model_name if self.openai_client else "gpt-3.5-turbo"
+    
     def _build_explanation_prompt(self, search_query: str, property_data: Dict[str, Any]) -> str:
         """Build comprehensive prompt for property explanation generation"""
         
@@ -163,43 +262,31 @@ Respond ONLY with the JSON structure above."""
         property_data: Dict[str, Any]
     ) -> PropertyExplanation:
         """Generate cached explanation for property match"""
+        current_pipeline.set("explanation")
         
         # Check cache first
         cached_explanation = await explanation_cache.get_explanation(search_query, listing_number)
         if cached_explanation and cached_explanation.get('explanation'):
             logger.info(f"Returning cached explanation for property {listing_number}")
+            record_llm_call("chat", self._model_name(), "explanation", cache="hit")
+            EXPLANATION_CACHE_HITS.inc(source=cached_explanation.get('source', "explanation"))
             explanation_data = cached_explanation['explanation']
             explanation_data['cached'] = True
             return PropertyExplanation(**explanation_data)
         
+        # A near-duplicate query already explained for this listing
+        semantic = await semantic_explanation_cache.lookup(search_query, listing_number)
+        if semantic.entry:
+            return PropertyExplanation(**self._reuse_semantic_match(
+                search_query, listing_number, property_data, semantic, "explanation"
+            ))
+        
         # Generate new explanation
         if not self.openai_client:
             raise Exception("OpenAI client not initialized")
         
         try:
-            prompt = self._build_explanation_prompt(search_query, property_data)
-            
-            # Generate explanation using LangChain
-            response = await self.openai_client.ainvoke([HumanMessage(content=prompt)])
-            
-            # Parse JSON response
-            response_text = response.content.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text.replace('```json', '').replace('```', '').strip()
-            
-            parsed_response = json.loads(response_text)
-            
-            # Create structured explanation
-            explanation = PropertyExplanation(
-                search_query=search_query,
-                listing_number=listing_number,
-                property_title=property_data.get('title', 'Property'),
-                match_score=self._safe_float(property_data.get('searchScore')),
-                positive_points=[ExplanationPoint(**point) for point in parsed_response.get('positive_points', [])],
-                negative_points=[ExplanationPoint(**point) for point in parsed_response.get('negative_points', [])],
-                overall_summary=parsed_response.get('overall_summary', ''),
-                cached=False
-            )
+            explanation = await self._generate(search_query, listing_number, property_data, "explanation")
             
             # Cache the explanation
             await explanation_cache.set_explanation(
@@ -207,6 +294,7 @@ Respond ONLY with the JSON structure above."""
                 listing_number, 
                 explanation.model_dump()
             )
+            await semantic_explanation_cache.remember(search_query, listing_number, semantic.embedding)
             
             logger.info(f"Generated and cached new explanation for property {listing_number}")
             return explanation
@@ -218,6 +306,168 @@ Respond ONLY with the JSON structure above."""
             logger.error(f"Error generating explanation: {e}")
             raise Exception(f"Failed to generate explanation: {e}")
     
+    async def _generate(
+        self,
+        search_query: str,
+        listing_number: str,
+        property_data: Dict[str, Any],
+        purpose: str
+    ) -> PropertyExplanation:
+        """One uncached LLM explanation - callers decide what to do with the cache"""
+        prompt = self._build_explanation_prompt(search_query, property_data)
+        
+        # Generate explanation using LangChain
+        with stage_timer("llm") as llm_timer, openai_chat_breaker.guard():
+            response = await self.openai_client.ainvoke([HumanMessage(content=prompt)])
+        usage = getattr(response, 'usage_metadata', None) or {}
+        record_llm_call("chat", self.openai_client.model_name, purpose,
+                        usage.get('input_tokens'), usage.get('output_tokens'), latency_ms=llm_timer.elapsed * 1000)
+        
+        # Parse JSON response
+        response_text = response.content.strip()
+        if response_text.startswith('```json'):
+            response_text = response_text.replace('```json', '').replace('```', '').strip()
+        
+        parsed_response = json.loads(response_text)
+        
+        # Create structured explanation
+        return PropertyExplanation(
+            search_query=search_query,
+            listing_number=listing_number,
+            property_title=property_data.get('title', 'Property'),
+            match_score=self._safe_float(property_data.get('searchScore')),
+            positive_points=[ExplanationPoint(**point) for point in parsed_response.get('positive_points', [])],
+            negative_points=[ExplanationPoint(**point) for point in parsed_response.get('negative_points', [])],
+            overall_summary=parsed_response.get('overall_summary', ''),
+            cached=False
+        )
+    
+    async def pregenerate_explanation(self, search_query: str, listing_number: str, property_data: Dict[str, Any]) -> bool:
+        """
+        Generate and cache an explanation ahead of the click (explanation
+        prefetch) - never replaces a cached one. Returns whether it was written.
+        """
+        if not self.openai_client:
+            return False
+        current_pipeline.set("explanation_prefetch")
+        semantic = await semantic_explanation_cache.lookup(search_query, listing_number)
+        if semantic.entry:
+            return False  # The click will reuse the near-duplicate's explanation
+        explanation = await self._generate(search_query, listing_number, property_data, "explanation_prefetch")
+        written = await explanation_cache.set_explanation(
+            search_query, listing_number, explanation.model_dump(), source="prefetch", overwrite=False
+        )
+        if written:
+            await semantic_explanation_cache.remember(search_query, listing_number, semantic.embedding)
+        return written
+    
+    def _reuse_semantic_match(
+        self,
+        search_query: str,
+        listing_number: str,
+        property_data: Dict[str, Any],
+        semantic: SemanticMatch,
+        purpose: str
+    ) -> Dict[str, Any]:
+        """Serve a near-duplicate query's explanation, sometimes auditing it in the background"""
+        record_llm_call("chat", self._model_name(), purpose, cache="semantic")
+        reused = semantic.entry['explanation']
+        self._maybe_audit_reuse(search_query, listing_number, property_data, reused, semantic)
+        return {**reused, 'search_query': search_query, 'cached': True}
+    
+    def _maybe_audit_reuse(
+        self,
+        search_query: str,
+        listing_number: str,
+        property_data: Dict[str, Any],
+        reused: Dict[str, Any],
+        semantic: SemanticMatch
+    ):
+        if (
+            not self.openai_client
+            or random.random() >= settings.SEMANTIC_EXPLANATION_AUDIT_RATE
+            or len(self._audits) >= MAX_CONCURRENT_AUDITS
+            or openai_chat_breaker.is_open
+        ):
+            return
+        # A fresh context, so the audit's calls never land on the serving request's usage ledger
+        task = asyncio.create_task(
+            self._audit_reuse(search_query, listing_number, property_data, reused, semantic),
+            context=contextvars.Context()
+        )
+        self._audits.add(task)
+        task.add_done_callback(self._audits.discard)
+    
+    async def _audit_reuse(
+        self,
+        search_query: str,
+        listing_number: str,
+        property_data: Dict[str, Any],
+        reused: Dict[str, Any],
+        semantic: SemanticMatch
+    ):
+        """Generate the explanation the reuse stood in for and compare - it is cached, so the call isn't wasted"""
+        current_pipeline.set("explanation_audit")
+        with usage_scope(AUDIT_ACCOUNTING_ENDPOINT) as usage:
+            try:
+                fresh = await self._generate(search_query, listing_number, property_data, "explanation_audit")
+                if await explanation_cache.set_explanation(
+                    search_query, listing_number, fresh.model_dump(), overwrite=False
+                ):
+                    await semantic_explanation_cache.remember(search_query, listing_number, semantic.embedding)
+                await semantic_explanation_cache.audit(reused, fresh.model_dump(), semantic.similarity)
+            except Exception as e:
+                logger.warning(f"Semantic reuse audit failed for property {listing_number}: {e}")
+        finish_request(usage, AUDIT_ACCOUNTING_ENDPOINT)
+    
+    async def cache_rerank_rationales(self, search_query: str, records: List[ScoreRecord]) -> int:
+        """
+        Write the rationales the rerank call returned for the top
+        RERANK_EXPLANATIONS_TOP_N ranked records into the explanation cache, so
+        opening those explanations is a cache hit. Explanations already cached
+        are kept. Returns the number written.
+        """
+        if not settings.RERANK_EXPLANATIONS_ENABLED:
+            return 0
+        
+        explanations = {}
+        with stage_timer("explanation_prefill"):
+            for record in records[:settings.RERANK_EXPLANATIONS_TOP_N]:
+                if not record.rationale:
+                    continue
+                try:
+                    explanation = PropertyExplanation(
+                        search_query=search_query,
+                        listing_number=record.listing_id,
+                        property_title=record.property.title,
+                        match_score=self._safe_float(record.score),
+                        positive_points=[ExplanationPoint(**point) for point in record.rationale.get('positive_points', [])],
+                        negative_points=[ExplanationPoint(**point) for point in record.rationale.get('negative_points', [])],
+                        overall_summary=record.rationale.get('overall_summary', '')
+                    )
+                except (TypeError, ValueError, AttributeError) as e:
+                    logger.warning(f"Skipping malformed rerank rationale for property {record.listing_id}: {e}")
+                    EXPLANATION_PREFILL.inc(outcome="invalid")
+                    continue
+                
+                if not explanation.overall_summary or not explanation.positive_points:
+                    EXPLANATION_PREFILL.inc(outcome="invalid")
+                    continue
+                
+                explanations[record.listing_id] = explanation.model_dump()
+            
+            # One pipelined write for the whole page head
+            results = await explanation_cache.set_explanations(
+                search_query, explanations, source="rerank", overwrite=False
+            ) if explanations else {}
+        
+        written = sum(results.values())
+        EXPLANATION_PREFILL.inc(written, outcome="written")
+        EXPLANATION_PREFILL.inc(len(results) - written, outcome="kept_existing")
+        if written:
+            logger.info(f"📝 Pre-filled {written} explanations from the rerank call")
+        return written
+    
     @traceable
     async def stream_explanation(
         self, 
@@ -226,11 +476,14 @@ Respond ONLY with the JSON structure above."""
         property_data: Dict[str, Any]
     ) -> AsyncGenerator[str, None]:
         """Stream explanation generation in real-time"""
+        current_pipeline.set("explanation")
         
         # Check cache first - if found, yield the full cached response
         cached_explanation = await explanation_cache.get_explanation(search_query, listing_number)
         if cached_explanation and cached_explanation.get('explanation'):
             logger.info(f"Streaming cached explanation for property {listing_number}")
+            record_llm_call("chat", self._model_name(), "explanation_stream", cache="hit")
+            EXPLANATION_CACHE_HITS.inc(source=cached_explanation.get('source', "explanation"))
             explanation_data = cached_explanation['explanation']
             explanation_data['cached'] = True
             
@@ -240,6 +493,17 @@ Respond ONLY with the JSON structure above."""
             yield "data: [DONE]\n\n"
             return
         
+        # A near-duplicate query already explained for this listing - served like a cached one
+        semantic = await semantic_explanation_cache.lookup(search_query, listing_number)
+        if semantic.entry:
+            explanation_data = self._reuse_semantic_match(
+                search_query, listing_number, property_data, semantic, "explanation_stream"
+            )
+            yield f"data: {json.dumps({'type': 'cached', 'cached': True})}\n\n"
+            yield f"data: {json.dumps({'type': 'complete', 'explanation': explanation_data})}\n\n"
+            yield "data: [DONE]\n\n"
+            return
+        
         # Generate streaming explanation
         if not self.streaming_llm:
             raise Exception("Streaming LLM not initialized")
@@ -252,13 +516,21 @@ Respond ONLY with the JSON structure above."""
             
             # Collect full response while streaming
             full_response = ""
+            usage = {}
+            stream_start = time.perf_counter()
             
-            # Stream from LangChain
-            async for chunk in self.streaming_llm.astream([HumanMessage(content=prompt)]):
-                if chunk.content:
-                    full_response += chunk.content
-                    # Stream each chunk
-                    yield f"data: {json.dumps({'type': 'chunk', 'content': chunk.content})}\n\n"
+            # Stream from LangChain - the final chunk carries token usage (stream_usage)
+            with openai_chat_breaker.guard():
+                async for chunk in self.streaming_llm.astream([HumanMessage(content=prompt)]):
+                    if chunk.usage_metadata:
+                        usage = chunk.usage_metadata
+                    if chunk.content:
+                        full_response += chunk.content
+                        # Stream each chunk
+                        yield f"data: {json.dumps({'type': 'chunk', 'content': chunk.content})}\n\n"
+            record_llm_call("chat", self.streaming_llm.model_name, "explanation_stream",
+                            usage.get('input_tokens'), usage.get('output_tokens'),
+                            latency_ms=(time.perf_counter() - stream_start) * 1000)
             
             # Parse and structure the complete response
             response_text = full_response.strip()
@@ -288,6 +560,7 @@ Respond ONLY with the JSON structure above."""
                 listing_number, 
                 explanation.model_dump()
             )
+            await semantic_explanation_cache.remember(search_query, listing_number, semantic.embedding)
             
             # End stream
             yield "data: [DONE]\n\n"
@@ -0,0 +1,124 @@
+"""
+Local Rerank Service for PropMatch
+Applies the linear ranker distilled from logged LLM rerank scores
+(scripts/train_local_ranker.py) on CPU. It predicts the score the LLM would
+have given each candidate, so its output drops into the same hybrid + AI
+blending, and decides whether the LLM is still needed for a query
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import metrics_registry
+from app.services.query_parser import ParsedQuery, parse_query
+from app.services.rerank_features import FEATURE_NAMES, FEATURE_VERSION, extract_features
+from app.services.score_record import ScoreRecord
+
+logger = logging.getLogger(__name__)
+
+LOCAL_RERANK_DECISIONS = metrics_registry.counter(
+    "propmatch_local_rerank_decisions_total",
+    "Local ranker outcomes by mode and decision (local_only, llm_low_confidence, llm_risky_query, llm_head)",
+    ["mode", "decision"]
+)
+
+LOCAL_RERANK_MODES = ("off", "local", "gate", "head")
+
+
+class LocalRerankService:
+    """Distilled CPU ranker - loads its model artifact on first use"""
+
+    def __init__(self, model_path: Optional[str] = None):
+        self.model_path = model_path or settings.LOCAL_RANKER_PATH
+        self.model: Optional[Dict[str, Any]] = None
+        self._loaded = False
+
+    @property
+    def mode(self) -> str:
+        mode = settings.LOCAL_RERANK_MODE.lower()
+        return mode if mode in LOCAL_RERANK_MODES else "off"
+
+    @property
+    def enabled(self) -> bool:
+        """A mode is configured and a compatible model is loaded"""
+        return self.mode != "off" and self._load() is not None
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        if self._loaded:
+            return self.model
+        self._loaded = True
+        path = Path(self.model_path)
+        if not path.exists():
+            logger.warning(f"Local ranker model not found at {path} - LLM rerank stays in use")
+            return None
+        try:
+            artifact = json.loads(path.read_text(encoding='utf-8'))
+            if artifact.get('feature_version') != FEATURE_VERSION or tuple(artifact['feature_names']) != FEATURE_NAMES:
+                logger.warning(f"Local ranker at {path} was trained on other features - retrain it")
+                return None
+            self.model = {
+                **artifact,
+                'mean': np.asarray(artifact['mean'], dtype=np.float64),
+                'scale': np.asarray(artifact['scale'], dtype=np.float64),
+                'weights': np.asarray(artifact['weights'], dtype=np.float64)
+            }
+            logger.info(f"🧮 Local ranker loaded from {path} ({artifact.get('training_rows', 0)} training rows, "
+                        f"held-out RMSE {artifact.get('rmse', 0):.1f})")
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to load local ranker from {path}: {e}")
+            self.model = None
+        return self.model
+
+    def predict(self, parsed: ParsedQuery, records: List[ScoreRecord]) -> np.ndarray:
+        """Predicted LLM score (10-100) per record"""
+        model = self._load()
+        features = np.array([extract_features(parsed, record) for record in records], dtype=np.float64)
+        predictions = ((features - model['mean']) / model['scale']) @ model['weights'] + model['bias']
+        return np.clip(predictions, 10.0, 100.0)
+
+    def rerank(self, query: str, records: List[ScoreRecord], page_size: int) -> Tuple[List[ScoreRecord], float]:
+        """
+        Scores records with the predicted LLM score, as an AI rerank would, and
+        returns them sorted with the page's separation from the rest of the pool
+        in units of the model's held-out RMSE
+        """
+        if not records:
+            return records, float('inf')
+        predictions = self.predict(parse_query(query), records)
+        for record, prediction in zip(records, predictions):
+            record.score = float(prediction)
+
+        ordered = np.sort(predictions)[::-1]
+        top, rest = ordered[:page_size], ordered[page_size:]
+        separation = float(top.mean() - rest.mean()) / max(self.model['rmse'], 1e-6) if len(rest) else float('inf')
+        return sorted(records, key=lambda record: record.score, reverse=True), separation
+
+    def needs_llm(self, query: str, separation: float) -> Optional[str]:
+        """Why a gated query still goes to the LLM, or None when the local order stands"""
+        parsed = parse_query(query)
+        # Impossible and unrealistic queries are where the LLM earns its cost - the ranker saw few of them
+        if parsed.impossibility_penalty or parsed.impossible_locations or parsed.unrealistic_terms \
+                or parsed.impossible_combinations:
+            return "llm_risky_query"
+        if separation < settings.LOCAL_RERANK_CONFIDENT_MARGIN:
+            return "llm_low_confidence"
+        return None
+
+    def summary(self) -> Dict[str, Any]:
+        model = self._load() if self.mode != "off" else self.model
+        return {
+            'mode': self.mode,
+            'loaded': model is not None,
+            'trained_at': model.get('trained_at') if model else None,
+            'training_rows': model.get('training_rows') if model else None,
+            'rmse': model.get('rmse') if model else None
+        }
+
+
+# Global local rerank service instance
+local_rerank_service = LocalRerankService()
@@ -0,0 +1,106 @@
+"""
+POI Feature Builder for PropMatch
+Turns a listing's points_of_interest into a fixed feature table once, at ingest,
+so search scoring and rerank prompts read numeric columns instead of scanning POIs
+"""
+
+from typing import Dict, List, Optional
+
+from app.models.property import PointOfInterest, PoiFeatures
+
+# Named landmarks with their POI name matchers
+LANDMARK_MATCHERS = {
+    'uct': lambda name: 'uct' in name or ('university' in name and 'cape town' in name),
+    'waterfront': lambda name: 'waterfront' in name or 'v&a' in name,
+    'cbd': lambda name: 'cbd' in name or 'city centre' in name or 'foreshore' in name
+}
+
+# Neighbourhoods that count as being in the CBD
+CBD_AREAS = ['cape town city centre', 'foreshore', 'city bowl']
+
+# Distance bands (km) - realistic walking in Cape Town is 800m
+WALKING_DISTANCE_KM = 0.8
+SHORT_DRIVE_KM = 3.0
+ACCESSIBLE_KM = 10.0
+
+# Prompt context categories with Cape Town specific landmarks, checked in order
+CONTEXT_CATEGORIES = [
+    ('major_shopping', ['cavendish square', 'canal walk', 'v&a waterfront', 'tyger valley', 'century city',
+                        'kenilworth centre', 'blue route mall', 'bayside mall']),
+    ('local_shopping', ['spar', 'pick n pay', 'woolworths', 'checkers', 'market', 'centre', 'plaza']),
+    ('education', ['school', 'university', 'uct', 'college', 'academy', 'campus', 'stellenbosch']),
+    ('transport', ['station', 'airport', 'taxi', 'bus', 'train', 'transport', 'myciti']),
+    ('health', ['hospital', 'clinic', 'medical', 'doctor', 'health', 'groote schuur', 'red cross']),
+    ('beaches_waterfront', ['beach', 'promenade', 'waterfront', 'seapoint', 'camps bay', 'clifton', 'muizenberg']),
+    ('entertainment', ['restaurant', 'bar', 'cafe', 'park', 'gym', 'pool', 'theatre', 'museum'])
+]
+
+MAX_CONTEXT_POIS = 20  # POIs considered for prompt context
+
+
+def build_poi_features(points_of_interest: Optional[List[PointOfInterest]], neighborhood: str = "") -> PoiFeatures:
+    """Build the precomputed POI feature table for one listing"""
+
+    neighborhood_lower = (neighborhood or "").lower()
+    features = PoiFeatures(in_cbd=any(area in neighborhood_lower for area in CBD_AREAS))
+
+    if not points_of_interest:
+        return features
+
+    nearest_by_category: Dict[str, float] = {}
+    landmark_km: Dict[str, float] = {}
+
+    for poi in points_of_interest:
+        category = poi.category.lower()
+        if category not in nearest_by_category or poi.distance < nearest_by_category[category]:
+            nearest_by_category[category] = poi.distance
+
+        name = poi.name.lower()
+        for landmark, matches in LANDMARK_MATCHERS.items():
+            if matches(name) and (landmark not in landmark_km or poi.distance < landmark_km[landmark]):
+                landmark_km[landmark] = poi.distance
+
+    context: Dict[str, List[str]] = {key: [] for key, _ in CONTEXT_CATEGORIES}
+    within_walking: List[str] = []
+    short_drive: List[str] = []
+    accessible: List[str] = []
+
+    for poi in points_of_interest[:MAX_CONTEXT_POIS]:
+        name = poi.name.lower()
+        poi_str = f"{poi.name} ({poi.distance:.1f}km)"
+
+        for key, keywords in CONTEXT_CATEGORIES:
+            if any(keyword in name for keyword in keywords):
+                context[key].append(poi_str)
+                break
+
+        if poi.distance <= WALKING_DISTANCE_KM:
+            within_walking.append(poi_str)
+        elif poi.distance <= SHORT_DRIVE_KM:
+            short_drive.append(poi_str)
+        elif poi.distance <= ACCESSIBLE_KM:
+            accessible.append(poi_str)
+
+    context['within_walking'] = within_walking
+    context['short_drive'] = short_drive
+    context['accessible'] = accessible
+
+    return PoiFeatures(
+        poi_count=len(points_of_interest),
+        nearest_by_category={category: round(distance, 2) for category, distance in nearest_by_category.items()},
+        uct_km=landmark_km.get('uct'),
+        waterfront_km=landmark_km.get('waterfront'),
+        cbd_km=landmark_km.get('cbd'),
+        in_cbd=features.in_cbd,
+        within_walking_count=len(within_walking),
+        short_drive_count=len(short_drive),
+        accessible_count=len(accessible),
+        nearby_context={key: items for key, items in context.items() if items}
+    )
+
+
+def get_poi_features(prop) -> PoiFeatures:
+    """Return a property's precomputed POI features, building them if it was ingested without"""
+    if prop.poi_features is None:
+        prop.poi_features = build_poi_features(prop.points_of_interest, prop.location.neighborhood)
+    return prop.poi_features
@@ -0,0 +1,307 @@
+"""
+POI Gazetteer Index for PropMatch
+Indexes every named point of interest across all listings so a query that names
+a school, station, mall or landmark resolves to per-candidate distances in one lookup
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import AbstractSet, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.property import Property
+from app.services.poi_features import LANDMARK_MATCHERS, get_poi_features
+from app.services.query_parser import KeywordAutomaton, ParsedQuery, PROXIMITY_TARGETS, normalize_query
+
+logger = logging.getLogger(__name__)
+
+# Landmarks scored from each listing's PoiFeatures - their aliases still resolve in the gazetteer so the
+# words are claimed before shorter POI names (CBD is scored by area instead)
+GAZETTEER_LANDMARKS = ('uct', 'waterfront')
+
+MIN_POI_NAME_LENGTH = 5  # Shorter names ("Spar", "Park") are too ambiguous to match in free text
+
+
+def landmark_distances(properties: Sequence[Property], landmark: str) -> np.ndarray:
+    """Nearest distance (km) from each listing to a landmark, from its PoiFeatures (uct_km, waterfront_km)"""
+    column = f"{landmark}_km"
+    return np.fromiter(
+        (np.inf if (km := getattr(get_poi_features(prop), column)) is None else km for prop in properties),
+        dtype=np.float32, count=len(properties)
+    )
+
+
+@lru_cache(maxsize=65536)
+def poi_key(name: str) -> str:
+    """Normalized POI name - memoized, the same names recur across listings and searches"""
+    return normalize_query(name)
+
+
+def listing_poi_distances(properties: Sequence[Property], names: AbstractSet[str]) -> np.ndarray:
+    """Nearest distance (km) from each listing to one of its own POIs with these normalized names, inf when none"""
+    return np.fromiter(
+        (min((poi.distance for poi in prop.points_of_interest or [] if poi_key(poi.name) in names), default=np.inf)
+         for prop in properties),
+        dtype=np.float32, count=len(properties)
+    )
+
+
+def _mentions(text: str, name: str) -> bool:
+    """Whether name occurs in text as whole words"""
+    start = text.find(name)
+    while start != -1:
+        end = start + len(name)
+        if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+            return True
+        start = text.find(name, start + 1)
+    return False
+
+
+@dataclass(frozen=True)
+class PoiTarget:
+    """A place named in a query, resolved to gazetteer POI ids"""
+    name: str
+    poi_ids: Tuple[int, ...]
+    is_landmark: bool = False
+
+
+class PoiIndex:
+    """Gazetteer plus sparse listing-to-POI distance matrix
+
+    Distances are stored column-wise per POI: listing rows as sorted int32 and
+    kilometres as float16, so a lookup for a candidate set is a searchsorted per POI.
+    """
+
+    def __init__(
+        self,
+        listing_rows: Dict[str, int],
+        poi_names: List[str],
+        column_ptr: np.ndarray,
+        column_rows: np.ndarray,
+        column_km: np.ndarray
+    ):
+        self.listing_rows = listing_rows
+        self.poi_names = poi_names
+        self.column_ptr = column_ptr
+        self.column_rows = column_rows
+        self.column_km = column_km
+        self.built_at = time.time()
+
+        self._aliases: Dict[str, PoiTarget] = {}
+        poi_ids_by_name = {name: poi_id for poi_id, name in enumerate(poi_names)}
+        for name, poi_id in poi_ids_by_name.items():
+            if len(name) >= MIN_POI_NAME_LENGTH:
+                self._aliases[name] = PoiTarget(name=name, poi_ids=(poi_id,))
+
+        # Landmark aliases override same-named POIs so "waterfront" means every V&A Waterfront POI
+        for landmark in GAZETTEER_LANDMARKS:
+            matches = LANDMARK_MATCHERS[landmark]
+            landmark_ids = tuple(poi_id for poi_id, name in enumerate(poi_names) if matches(name))
+            if landmark_ids:
+                for alias in PROXIMITY_TARGETS[landmark]:
+                    self._aliases[alias] = PoiTarget(name=landmark, poi_ids=landmark_ids, is_landmark=True)
+
+        self._automaton = KeywordAutomaton(self._aliases)
+
+    @classmethod
+    def from_properties(cls, properties: Sequence[Property]) -> "PoiIndex":
+        """Build the gazetteer and distance matrix from listings' points_of_interest"""
+
+        listing_rows: Dict[str, int] = {}
+        poi_ids: Dict[str, int] = {}
+        nearest: List[Dict[int, float]] = []
+
+        for prop in properties:
+            if prop.listing_number is None:
+                continue
+            row = listing_rows.setdefault(str(prop.listing_number), len(listing_rows))
+            for poi in prop.points_of_interest or []:
+                name = normalize_query(poi.name)
+                poi_id = poi_ids.setdefault(name, len(poi_ids))
+                if poi_id == len(nearest):
+                    nearest.append({})
+                current = nearest[poi_id].get(row)
+                if current is None or poi.distance < current:
+                    nearest[poi_id][row] = poi.distance
+
+        column_ptr = np.zeros(len(nearest) + 1, dtype=np.int64)
+        column_ptr[1:] = np.cumsum([len(rows) for rows in nearest])
+        column_rows = np.empty(column_ptr[-1], dtype=np.int32)
+        column_km = np.empty(column_ptr[-1], dtype=np.float16)
+        for poi_id, rows in enumerate(nearest):
+            start, end = column_ptr[poi_id], column_ptr[poi_id + 1]
+            ordered_rows = sorted(rows)
+            column_rows[start:end] = ordered_rows
+            column_km[start:end] = [rows[row] for row in ordered_rows]
+
+        return cls(listing_rows, list(poi_ids), column_ptr, column_rows, column_km)
+
+    def save(self, path: str) -> Path:
+        """Write the index as one .npz artifact"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        listing_numbers = sorted(self.listing_rows, key=self.listing_rows.get)
+        with path.open('wb') as artifact:
+            np.savez_compressed(
+                artifact,
+                listing_numbers=np.array(listing_numbers, dtype=np.str_),
+                poi_names=np.array(self.poi_names, dtype=np.str_),
+                column_ptr=self.column_ptr,
+                column_rows=self.column_rows,
+                column_km=self.column_km,
+                built_at=np.array(self.built_at)
+            )
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "PoiIndex":
+        """Read an index written by save()"""
+        with np.load(path) as artifact:
+            index = cls(
+                {str(listing_number): row for row, listing_number in enumerate(artifact['listing_numbers'])},
+                [str(name) for name in artifact['poi_names']],
+                artifact['column_ptr'],
+                artifact['column_rows'],
+                artifact['column_km']
+            )
+            index.built_at = float(artifact['built_at'])
+        return index
+
+    def rows_for(self, listing_numbers: Sequence[str]) -> np.ndarray:
+        """Matrix rows for the candidates, -1 for listings indexed after the build"""
+        return np.fromiter(
+            (self.listing_rows.get(listing_number, -1) for listing_number in listing_numbers),
+            dtype=np.int32, count=len(listing_numbers)
+        )
+
+    def resolve(self, parsed_query: ParsedQuery) -> Tuple[PoiTarget, ...]:
+        """Places named in the query, longest whole-word match first-come
+
+        Landmarks resolve whenever mentioned; other POI names need a proximity cue
+        ("near", "close to", "walking distance") so a POI called "Gardens" doesn't
+        turn "house with gardens" into a distance query.
+        """
+        text = parsed_query.text
+        has_cue = bool(parsed_query.proximity_terms or parsed_query.walking_requested)
+
+        matches = []
+        for start, alias in self._automaton.iter_matches(text):
+            end = start + len(alias)
+            if (start > 0 and text[start - 1].isalnum()) or (end < len(text) and text[end].isalnum()):
+                continue
+            matches.append((start, end, alias))
+        matches.sort(key=lambda match: (match[0], match[0] - match[1]))
+
+        targets: Dict[str, PoiTarget] = {}
+        covered_until = 0
+        for start, end, alias in matches:
+            if start < covered_until:
+                continue
+            target = self._aliases[alias]
+            if target.is_landmark or has_cue:
+                targets.setdefault(target.name, target)
+                covered_until = end
+
+        return tuple(targets.values())
+
+    def distances(self, target: PoiTarget, rows: np.ndarray) -> np.ndarray:
+        """Nearest distance (km) from each candidate row to the target, inf when not listed"""
+        nearest = np.full(len(rows), np.inf, dtype=np.float32)
+        for poi_id in target.poi_ids:
+            start, end = self.column_ptr[poi_id], self.column_ptr[poi_id + 1]
+            column_rows = self.column_rows[start:end]
+            positions = np.searchsorted(column_rows, rows)
+            positions[positions >= len(column_rows)] = 0
+            hit = column_rows[positions] == rows if len(column_rows) else np.zeros(len(rows), dtype=bool)
+            if hit.any():
+                km = self.column_km[start:end][positions].astype(np.float32)
+                nearest = np.where(hit, np.minimum(nearest, km), nearest)
+        return nearest
+
+
+class PoiGazetteer:
+    """Holds the corpus-wide POI index, built by scripts/build_poi_gazetteer.py and loaded at startup"""
+
+    def __init__(self):
+        self.index: Optional[PoiIndex] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.index is not None
+
+    def load(self, path: Optional[str] = None) -> bool:
+        """Load the gazetteer artifact - until one loads, named places resolve from the candidates' own POIs"""
+        path = path or settings.POI_GAZETTEER_PATH
+        try:
+            self.index = PoiIndex.load(path)
+        except FileNotFoundError:
+            logger.warning(f"POI gazetteer not found at {path} - run scripts/build_poi_gazetteer.py; "
+                           f"scoring proximity from candidates' own POIs until then")
+            return False
+        except Exception as e:
+            logger.warning(f"POI gazetteer at {path} could not be loaded, scoring from candidates' own POIs: {e}")
+            return False
+        logger.info(f"🗺️ POI gazetteer loaded: {len(self.index.poi_names)} POIs across "
+                    f"{len(self.index.listing_rows)} listings")
+        return True
+
+    def target_distances(self, properties: Sequence[Property], parsed_query: ParsedQuery) -> Dict[str, np.ndarray]:
+        """Distance column per place named in the query, aligned with properties
+
+        The gazetteer only widens coverage: without it, or for candidates newer than
+        its build, distances come from each listing's own POIs.
+        """
+
+        if not (parsed_query.proximity_targets or parsed_query.proximity_terms or parsed_query.walking_requested):
+            return {}
+
+        # Landmarks are read from each listing's precomputed POI features - no gazetteer needed
+        columns = {
+            landmark: landmark_distances(properties, landmark)
+            for landmark in parsed_query.proximity_targets if landmark in GAZETTEER_LANDMARKS
+        }
+
+        index = self.index
+        if index is None:
+            for name in self._resolve_from_listings(properties, parsed_query):
+                if not any(LANDMARK_MATCHERS[landmark](name) for landmark in columns):
+                    columns[name] = listing_poi_distances(properties, {name})
+            return columns
+
+        rows = index.rows_for([str(prop.listing_number) for prop in properties])
+        unindexed = np.flatnonzero(rows < 0)
+        for target in index.resolve(parsed_query):
+            if target.is_landmark:
+                columns.setdefault(target.name, landmark_distances(properties, target.name))
+            elif not any(LANDMARK_MATCHERS[landmark](target.name) for landmark in columns):
+                # A POI named after a landmark already scored ("V&A Waterfront") would count the place twice
+                distances = index.distances(target, rows)
+                if len(unindexed):
+                    # Scraped after the build - fall back to those listings' own POIs
+                    names = {index.poi_names[poi_id] for poi_id in target.poi_ids}
+                    distances[unindexed] = listing_poi_distances([properties[row] for row in unindexed], names)
+                columns[target.name] = distances
+        return columns
+
+    @staticmethod
+    def _resolve_from_listings(properties: Sequence[Property], parsed_query: ParsedQuery) -> List[str]:
+        """Named places without the gazetteer: the candidates' own POI names that the query mentions
+
+        Same rules as PoiIndex.resolve - a proximity cue is required, and a name inside a longer
+        matched name ("Gardens" in "Gardens Centre") doesn't count separately.
+        """
+        if not (parsed_query.proximity_terms or parsed_query.walking_requested):
+            return []
+        text = parsed_query.text
+        names = {poi_key(poi.name) for prop in properties for poi in prop.points_of_interest or []}
+        matched = [name for name in names if len(name) >= MIN_POI_NAME_LENGTH and _mentions(text, name)]
+        return sorted(name for name in matched if not any(name != other and name in other for other in matched))
+
+
+# Global gazetteer instance
+poi_gazetteer = PoiGazetteer()
@@ -0,0 +1,322 @@
+"""
+Query Understanding for PropMatch
+Compiles every keyword table used by search scoring into a single multi-pattern
+automaton at import time and parses each query once into a typed ParsedQuery
+"""
+
+import re
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton that reports every keyword occurring in a text in one pass"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[str, ...]] = [()]
+
+        for keyword in keywords:
+            self._insert(keyword)
+        self._build_failure_links()
+
+    def _insert(self, keyword: str):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        if keyword not in self._output[state]:
+            self._output[state] = self._output[state] + (keyword,)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                candidate = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = candidate if candidate != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yield (start_index, keyword) for every keyword occurrence, including overlaps"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword in output[state]:
+                yield index - len(keyword) + 1, keyword
+
+    def find_all(self, text: str) -> FrozenSet[str]:
+        """Return the set of keywords that occur anywhere in text (substring semantics)"""
+        return frozenset(keyword for _, keyword in self.iter_matches(text))
+
+
+# Keyword tables - every substring test the scoring code used to run on its own
+PROPERTY_TERMS = {
+    'types': ['apartment', 'house', 'flat', 'townhouse', 'villa', 'property'],
+    'rooms': ['bedroom', 'bathroom', 'bed', 'bath'],
+    'features': ['pool', 'garden', 'garage', 'balcony', 'view', 'parking'],
+    'locations': ['area', 'neighborhood', 'district', 'suburb', 'city', 'cbd', 'centre', 'center'],
+    'descriptors': ['luxury', 'modern', 'spacious', 'furnished', 'unfurnished'],
+    'proximity': ['walking distance', 'close to', 'near', 'uct', 'waterfront', 'v&a'],
+    'price': ['under', 'below', 'over', 'above', 'million', 'rand', 'budget', 'cheap', 'expensive']
+}
+
+UNREALISTIC_TERMS = [
+    'castle', 'moat', 'medieval', 'underwater', 'submarine', 'spaceship',
+    'pyramid', 'temple', 'church', 'cathedral', 'palace', 'fortress',
+    'eiffel tower', 'flying', 'floating', 'underground mansion'
+]
+
+IMPOSSIBLE_LOCATIONS = [
+    'johannesburg', 'joburg', 'jozi', 'gauteng',
+    'durban', 'kwazulu', 'natal',
+    'pretoria', 'tshwane',
+    'bloemfontein', 'free state',
+    'port elizabeth', 'gqeberha', 'eastern cape',
+    'polokwane', 'limpopo',
+    'kimberley', 'northern cape',
+    'nelspruit', 'mbombela', 'mpumalanga',
+    'rustenburg', 'north west',
+    'london', 'new york', 'paris', 'dubai'
+]
+
+LOCATION_KEYWORDS = [
+    'clifton', 'camps bay', 'bantry bay', 'sea point', 'newlands',
+    'claremont', 'rondebosch', 'constantia', 'southern suburbs',
+    'northern suburbs', 'city bowl', 'atlantic seaboard'
+]
+
+# Named landmarks the scoring layer knows how to measure distance to
+PROXIMITY_TARGETS = {
+    'uct': ['uct', 'university of cape town', 'university cape town'],
+    'waterfront': ['v&a', 'waterfront', 'v and a'],
+    'cbd': ['cbd', 'city centre', 'city center', 'downtown']
+}
+
+WALKING_TERMS = ['walking distance', 'walk to', 'walkable', 'walking']
+
+# Ordered: the first keyword found decides the mentioned type
+TYPE_KEYWORDS = ['apartment', 'flat', 'house', 'townhouse']
+
+TYPE_GROUPS = {
+    'apartment': ['apartment', 'flat', 'unit'],
+    'house': ['house', 'home', 'villa'],
+    'townhouse': ['townhouse', 'town house']
+}
+
+FEATURE_KEYWORDS = {
+    'pool': ['pool', 'swimming pool'],
+    'garden': ['garden', 'yard', 'outdoor space'],
+    'garage': ['garage', 'parking', 'carport'],
+    'view': ['view', 'sea view', 'ocean view', 'mountain view', 'table mountain'],
+    'balcony': ['balcony', 'terrace', 'patio'],
+    'security': ['security', 'secure', 'gated'],
+    'modern': ['modern', 'contemporary', 'newly renovated'],
+    'luxury': ['luxury', 'luxurious', 'upmarket', 'high-end']
+}
+
+AMENITY_KEYWORDS = ['pool', 'garden', 'garage', 'parking', 'security', 'view']
+
+PROXIMITY_PATTERNS = {
+    'walking_distance': ['walking distance', 'walk to', 'walkable'],
+    'close_to': ['close to', 'near', 'nearby', 'next to'],
+    'within': ['within', 'less than', 'under']
+}
+
+QUALITY_TERMS = {
+    'luxury': ['luxury', 'upmarket', 'premium', 'high-end'],
+    'budget': ['affordable', 'budget', 'cheap', 'under']
+}
+
+BEDROOM_WORDS = ['bedroom', 'bed', 'br']
+
+# Conflicting combinations for Cape Town (either side must match)
+IMPOSSIBLE_COMBINATIONS = [
+    (('airport', 'walking'), ('ocean', 'sea view')),         # Airport + ocean view
+    (('eiffel tower', 'paris'), ('cape town',)),              # European landmarks
+    (('castle', 'moat'), ('apartment', 'modern')),            # Medieval + modern
+    (('underwater', 'submarine'), ('house', 'apartment'))     # Impossible structures
+]
+
+
+def _all_keywords() -> List[str]:
+    keywords = []
+    for terms in PROPERTY_TERMS.values():
+        keywords.extend(terms)
+    for table in (PROXIMITY_TARGETS, TYPE_GROUPS, FEATURE_KEYWORDS, PROXIMITY_PATTERNS, QUALITY_TERMS):
+        for terms in table.values():
+            keywords.extend(terms)
+    for combo1, combo2 in IMPOSSIBLE_COMBINATIONS:
+        keywords.extend(combo1)
+        keywords.extend(combo2)
+    keywords.extend(UNREALISTIC_TERMS)
+    keywords.extend(IMPOSSIBLE_LOCATIONS)
+    keywords.extend(LOCATION_KEYWORDS)
+    keywords.extend(WALKING_TERMS)
+    keywords.extend(TYPE_KEYWORDS)
+    keywords.extend(AMENITY_KEYWORDS)
+    keywords.extend(BEDROOM_WORDS)
+    return sorted(set(keywords))
+
+
+# Built once at import - every request reuses the same automaton and regexes
+_KEYWORD_AUTOMATON = KeywordAutomaton(_all_keywords())
+_MAX_PRICE_PATTERN = re.compile(r'(?:under|below|less than)\s+(?:r\s*)?(\d+(?:\.\d+)?)\s*(?:million|mil|m)')
+_MIN_PRICE_PATTERN = re.compile(r'(?:over|above|more than)\s+(?:r\s*)?(\d+(?:\.\d+)?)\s*(?:million|mil|m)')
+_BEDROOM_PATTERN = re.compile(r'(\d+)\s*(?:bedroom|bed|br)')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+@dataclass(frozen=True)
+class ParsedQuery:
+    """Everything the scoring layer needs to know about a query, computed once per request"""
+    text: str
+    word_count: int
+    terms: FrozenSet[str]
+
+    # Hard constraints
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    bedrooms: Optional[int] = None
+    mentioned_type: Optional[str] = None   # First of TYPE_KEYWORDS found in the query
+    type_group: Optional[str] = None       # apartment / house / townhouse via TYPE_GROUPS
+
+    # Location and proximity
+    locations: Tuple[str, ...] = ()
+    impossible_locations: Tuple[str, ...] = ()
+    proximity_targets: Tuple[str, ...] = ()
+    walking_requested: bool = False
+
+    # Intent
+    requested_features: Tuple[str, ...] = ()
+    proximity_terms: Tuple[str, ...] = ()
+    quality_terms: Tuple[str, ...] = ()
+    property_terms: Tuple[str, ...] = ()
+    price_terms: Tuple[str, ...] = ()
+    location_terms: Tuple[str, ...] = ()
+
+    # Impossibility flags
+    unrealistic_terms: Tuple[str, ...] = ()
+    impossible_combinations: Tuple[Tuple[Tuple[str, ...], Tuple[str, ...]], ...] = ()
+    impossibility_penalty: float = 0.0
+    is_property_focused: bool = True
+
+    def has_any(self, keywords: Iterable[str]) -> bool:
+        """True if any of the keywords occurs in the query"""
+        return any(keyword in self.terms for keyword in keywords)
+
+    @property
+    def is_specific(self) -> bool:
+        return bool(self.requested_features or self.proximity_terms or self.quality_terms)
+
+
+def normalize_query(query: str) -> str:
+    """Normalize query text so equivalent queries share one parse"""
+    return _WHITESPACE_PATTERN.sub(' ', (query or '').lower()).strip()
+
+
+def parse_query(query: str) -> ParsedQuery:
+    """Parse a raw query; results are memoized by normalized query text"""
+    return _parse_normalized(normalize_query(query))
+
+
+@lru_cache(maxsize=2048)
+def _parse_normalized(text: str) -> ParsedQuery:
+    terms = _KEYWORD_AUTOMATON.find_all(text)
+
+    def present(keywords: Iterable[str]) -> Tuple[str, ...]:
+        return tuple(keyword for keyword in keywords if keyword in terms)
+
+    # Price bounds
+    max_price_match = _MAX_PRICE_PATTERN.search(text)
+    min_price_match = _MIN_PRICE_PATTERN.search(text)
+    max_price = float(max_price_match.group(1)) * 1000000 if max_price_match else None
+    min_price = float(min_price_match.group(1)) * 1000000 if min_price_match else None
+
+    # Bedrooms
+    bedroom_match = _BEDROOM_PATTERN.search(text)
+    bedrooms = int(bedroom_match.group(1)) if bedroom_match else None
+
+    # Property type
+    mentioned_type = next((keyword for keyword in TYPE_KEYWORDS if keyword in terms), None)
+    type_group = next(
+        (group for group, keywords in TYPE_GROUPS.items() if any(k in terms for k in keywords)),
+        None
+    )
+
+    # Property term extraction, categorized for constraint enforcement
+    property_terms, price_terms, location_terms = [], [], []
+    for category, keywords in PROPERTY_TERMS.items():
+        for keyword in present(keywords):
+            property_terms.append(keyword)
+            if category == 'price':
+                price_terms.append(keyword)
+            elif category in ('locations', 'proximity'):
+                location_terms.append(keyword)
+
+    # Impossibility penalty based on the ratio of unrealistic to property terms
+    unrealistic_terms = present(UNREALISTIC_TERMS)
+    impossibility_penalty = 0.0
+    is_property_focused = True
+    word_count = len(text.split())
+    if word_count > 0:
+        impossible_ratio = len(unrealistic_terms) / word_count
+        property_ratio = len(property_terms) / word_count
+
+        # Strong penalty if query is mostly impossible terms with few property terms
+        if impossible_ratio > 0.3 and property_ratio < 0.3:
+            impossibility_penalty = 0.6
+        elif impossible_ratio > 0.2:
+            impossibility_penalty = 0.3
+        elif impossible_ratio > 0.1:
+            impossibility_penalty = 0.15
+
+        is_property_focused = property_ratio > impossible_ratio
+
+    impossible_combinations = tuple(
+        (combo1, combo2) for combo1, combo2 in IMPOSSIBLE_COMBINATIONS
+        if present(combo1) and present(combo2)
+    )
+
+    quality_terms = tuple(quality for quality, keywords in QUALITY_TERMS.items() if present(keywords))
+
+    return ParsedQuery(
+        text=text,
+        word_count=word_count,
+        terms=terms,
+        min_price=min_price,
+        max_price=max_price,
+        bedrooms=bedrooms,
+        mentioned_type=mentioned_type,
+        type_group=type_group,
+        locations=present(LOCATION_KEYWORDS),
+        impossible_locations=present(IMPOSSIBLE_LOCATIONS),
+        proximity_targets=tuple(target for target, keywords in PROXIMITY_TARGETS.items() if present(keywords)),
+        walking_requested=bool(present(WALKING_TERMS)),
+        requested_features=tuple(feature for feature, keywords in FEATURE_KEYWORDS.items() if present(keywords)),
+        proximity_terms=tuple(kind for kind, keywords in PROXIMITY_PATTERNS.items() if present(keywords)),
+        quality_terms=quality_terms,
+        property_terms=tuple(property_terms),
+        price_terms=tuple(price_terms),
+        location_terms=tuple(location_terms),
+        unrealistic_terms=unrealistic_terms,
+        impossible_combinations=impossible_combinations,
+        impossibility_penalty=impossibility_penalty,
+        is_property_focused=is_property_focused
+    )
@@ -0,0 +1,183 @@
+"""
+Rerank Features for PropMatch
+Fixed query x listing feature vector shared by the rerank feature log (training
+data for the local ranker) and LocalRerankService, so the ranker is always
+served the exact features it was trained on
+"""
+
+import json
+import logging
+import math
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from app.core.config import settings
+from app.services.poi_features import get_poi_features
+from app.services.query_parser import FEATURE_KEYWORDS, TYPE_GROUPS, ParsedQuery, parse_query
+from app.services.score_record import ScoreRecord
+
+logger = logging.getLogger(__name__)
+
+# Order is the model's column order - append only, and bump FEATURE_VERSION when it changes
+FEATURE_NAMES = (
+    'vector_score',
+    'bm25_norm',
+    'hybrid_base',
+    'has_price_constraint',
+    'price_over_max',
+    'price_under_min',
+    'has_bedroom_constraint',
+    'bedroom_match',
+    'bedroom_gap',
+    'type_match',
+    'type_mismatch',
+    'requested_feature_count',
+    'feature_coverage',
+    'location_requested',
+    'location_match',
+    'landmark_requested',
+    'landmark_proximity',
+    'walking_requested',
+    'walkable_pois',
+    'impossibility_penalty',
+    'impossible_location',
+    'unrealistic_terms',
+    'query_specific',
+    'query_length',
+)
+FEATURE_VERSION = 1
+
+LANDMARK_RANGE_KM = 10.0  # Landmark distance beyond which proximity is worth nothing
+
+
+def _listing_text(record: ScoreRecord) -> str:
+    prop = record.property
+    location = prop.location
+    return " ".join([
+        prop.title, prop.description, " ".join(prop.features),
+        location.address, location.neighborhood, location.city, prop.suburb or ""
+    ]).lower()
+
+
+def extract_features(parsed: ParsedQuery, record: ScoreRecord) -> List[float]:
+    """Feature vector for one candidate, in FEATURE_NAMES order - needs the hybrid component scores"""
+    prop = record.property
+    text = _listing_text(record)
+    price = float(prop.price or 0)
+
+    price_over_max = min(1.0, max(0.0, (price - parsed.max_price) / parsed.max_price)) if parsed.max_price else 0.0
+    price_under_min = min(1.0, max(0.0, (parsed.min_price - price) / parsed.min_price)) if parsed.min_price else 0.0
+
+    bedroom_gap = min(3.0, abs(float(prop.bedrooms) - parsed.bedrooms)) / 3 if parsed.bedrooms is not None else 0.0
+
+    property_type = prop.type.value if hasattr(prop.type, 'value') else str(prop.type)
+    type_keywords = TYPE_GROUPS.get(parsed.type_group, []) if parsed.type_group else []
+    type_match = 1.0 if type_keywords and (property_type == parsed.type_group or property_type in type_keywords) else 0.0
+
+    requested = parsed.requested_features
+    covered = sum(
+        1 for feature in requested
+        if any(keyword in text for keyword in FEATURE_KEYWORDS.get(feature, [feature]))
+    )
+
+    poi = get_poi_features(prop)
+    landmark_km = [
+        distance for distance in (getattr(poi, f"{target}_km", None) for target in parsed.proximity_targets)
+        if distance is not None
+    ]
+
+    return [
+        float(record.vector_score or 0.0),
+        float(record.bm25_contribution or 0.0) / 20,
+        float(record.hybrid_base_score or 0.0) / 100,
+        1.0 if parsed.max_price or parsed.min_price else 0.0,
+        price_over_max,
+        price_under_min,
+        1.0 if parsed.bedrooms is not None else 0.0,
+        1.0 if parsed.bedrooms is not None and bedroom_gap == 0 else 0.0,
+        bedroom_gap,
+        type_match,
+        1.0 if type_keywords and not type_match else 0.0,
+        min(len(requested), 5) / 5,
+        covered / len(requested) if requested else 0.0,
+        1.0 if parsed.locations else 0.0,
+        1.0 if any(location in text for location in parsed.locations) else 0.0,
+        1.0 if parsed.proximity_targets else 0.0,
+        max(0.0, 1 - min(landmark_km) / LANDMARK_RANGE_KM) if landmark_km else 0.0,
+        1.0 if parsed.walking_requested else 0.0,
+        min(poi.within_walking_count, 10) / 10 if parsed.walking_requested else 0.0,
+        parsed.impossibility_penalty,
+        1.0 if parsed.impossible_locations else 0.0,
+        1.0 if parsed.unrealistic_terms else 0.0,
+        1.0 if parsed.is_specific else 0.0,
+        math.log1p(parsed.word_count) / 3,
+    ]
+
+
+class RerankFeatureLog:
+    """
+    Appends (features, AI score) rows for every LLM-scored candidate to a JSONL
+    file when RERANK_FEATURE_LOG_PATH is set - the training set for
+    scripts/train_local_ranker.py. Only candidates the LLM actually scored are
+    logged, never fallback scores.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.RERANK_FEATURE_LOG_PATH)
+
+    def record(self, query: str, records: List[ScoreRecord], ai_scores: Dict[int, float], model: str):
+        """`ai_scores` maps a record's index in `records` to the raw LLM score"""
+        if not self.enabled or not ai_scores or random.random() >= settings.RERANK_FEATURE_LOG_SAMPLE_RATE:
+            return
+
+        # Logging must never cost a rerank its result
+        try:
+            parsed = parse_query(query)
+            logged_at = time.time()
+            rows = []
+            for index, record in enumerate(records):
+                if index not in ai_scores or record.hybrid_base_score is None:
+                    continue
+                rows.append(json.dumps({
+                    'version': FEATURE_VERSION,
+                    'query': parsed.text,
+                    'listing_id': record.listing_id,
+                    'features': extract_features(parsed, record),
+                    'ai_score': float(ai_scores[index]),
+                    'model': model,
+                    'logged_at': logged_at
+                }))
+            if not rows:
+                return
+
+            path = Path(settings.RERANK_FEATURE_LOG_PATH)
+            with self._lock:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with path.open('a', encoding='utf-8') as handle:
+                    handle.write("\n".join(rows) + "\n")
+        except Exception as e:
+            logger.warning(f"Rerank feature log write failed: {e}")
+
+
+def load_feature_log(path: str) -> List[Dict[str, Any]]:
+    """Rows of a rerank feature log matching the current FEATURE_VERSION"""
+    rows = []
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if row.get('version') == FEATURE_VERSION:
+                rows.append(row)
+    return rows
+
+
+# Global feature log instance
+rerank_feature_log = RerankFeatureLog()
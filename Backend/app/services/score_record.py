@@ -0,0 +1,57 @@
+"""
+Score Records for PropMatch ranking pipelines
+Carries per-candidate scores through hybrid and AI scoring while the Property
+objects stay shared and read-only; scores are attached only to the final page
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.models.property import Property
+
+# Component scores copied onto the served Property as dynamic attributes
+COMPONENT_FIELDS = (
+    'vector_score', 'vector_100', 'bm25_score', 'bm25_contribution',
+    'hybrid_base_score', 'ai_score', 'final_score_method'
+)
+
+
+class ScoreRecord:
+    """Listing id plus component scores for one candidate - the Property is referenced, never copied"""
+
+    __slots__ = ('property', 'listing_id', 'score', 'rationale') + COMPONENT_FIELDS
+
+    def __init__(self, prop: Property, score: float = 50.0):
+        self.property = prop
+        self.listing_id = str(prop.listing_number)
+        self.score = score
+        self.vector_score: Optional[float] = None
+        self.vector_100: Optional[float] = None
+        self.bm25_score: Optional[float] = None
+        self.bm25_contribution: Optional[float] = None
+        self.hybrid_base_score: Optional[float] = None
+        self.ai_score: Optional[float] = None
+        self.final_score_method: Optional[str] = None
+        # Short explanation returned alongside the AI score (RERANK_EXPLANATIONS_ENABLED) - never served
+        self.rationale: Optional[Dict[str, Any]] = None
+
+    def reset_to_hybrid(self):
+        """Drop everything AI scoring wrote, so the record reads as hybrid-scored only"""
+        self.score = self.hybrid_base_score
+        self.ai_score = None
+        self.final_score_method = None
+        self.rationale = None
+
+    def to_property(self) -> Property:
+        """Shallow copy of the shared Property carrying this record's scores"""
+        prop = self.property.model_copy()
+        prop.searchScore = self.score
+        for name in COMPONENT_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                setattr(prop, name, value)
+        return prop
+
+
+def attach_scores(records: Iterable[ScoreRecord]) -> List[Property]:
+    """Materialize the final page - the only point where Property objects are copied"""
+    return [record.to_property() for record in records]
@@ -0,0 +1,216 @@
+"""
+Latency-Budget Search Orchestrator for PropMatch
+Runs the vector -> BM25 hybrid -> AI rerank pipeline against a per-request
+deadline, skipping or trimming the rerank stage when the vector scores or the
+remaining budget say it isn't worth it, and records every decision
+"""
+
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.core.circuit_breaker import openai_chat_breaker
+from app.core.config import settings
+from app.core.metrics import LatencyWindow, metrics_registry, stage_timer, current_pipeline
+from app.core.llm_accounting import usage_scope
+from app.models.property import PropertySearchRequest, PropertySearchResponse
+from app.services.bm25_hybrid_service import BM25HybridService
+from app.services.enhanced_search_service import determine_scoring_scenario
+from app.services.query_parser import parse_query
+from app.services.score_record import ScoreRecord, attach_scores
+
+logger = logging.getLogger(__name__)
+
+ORCHESTRATOR_DECISIONS = metrics_registry.counter(
+    "propmatch_orchestrator_decisions_total",
+    "Adaptive pipeline decisions by stage and action (run, skip, trim, timeout)",
+    ["stage", "action"]
+)
+
+# Top-page vector scores this many std devs above the rest of the pool - rerank can't change the page
+CONFIDENT_SEPARATION = 1.5
+RESPONSE_RESERVE_MS = 50  # Left for slicing, score attachment and serialization
+BUDGET_PERCENTILE = 90  # Stage estimates are a high percentile so budgets stay conservative
+MAX_CANDIDATE_POOL = 100
+
+
+class SearchOrchestrator:
+    """Adaptive hybrid search: each stage decides how much work fits in what's left of the deadline"""
+
+    def __init__(self, hybrid_service: BM25HybridService):
+        self.hybrid_service = hybrid_service
+        # Rerank batches run sequentially, so per-batch latency is what scales with candidate count
+        self.rerank_batch_latency = LatencyWindow(seed_ms=2000)
+
+    async def search(self, search_request: PropertySearchRequest, deadline_ms: Optional[int] = None) -> PropertySearchResponse:
+        with usage_scope() as usage:
+            response = await self._search(search_request, deadline_ms)
+        response.metadata['llmUsage'] = usage.totals()
+        return response
+
+    async def _search(self, search_request: PropertySearchRequest, deadline_ms: Optional[int]) -> PropertySearchResponse:
+        current_pipeline.set("adaptive")
+        deadline_ms = deadline_ms or settings.SEARCH_DEADLINE_MS
+        start_time = time.perf_counter()
+        stages: Dict[str, float] = {}
+        decisions: List[Dict[str, Any]] = []
+
+        def elapsed_ms() -> float:
+            return (time.perf_counter() - start_time) * 1000
+
+        def decide(stage: str, action: str, reason: str, **detail):
+            ORCHESTRATOR_DECISIONS.inc(stage=stage, action=action)
+            decisions.append({
+                'stage': stage, 'action': action, 'reason': reason,
+                'atMs': round(elapsed_ms(), 1), **detail
+            })
+
+        service = self.hybrid_service
+        page_size = search_request.page_size
+        offset = (search_request.page - 1) * page_size
+        pool_size = min(max(page_size * 6, offset + page_size), MAX_CANDIDATE_POOL)
+
+        # Stage 1: vector candidates, hydrated in one batch
+        with stage_timer("vector_search") as vector_timer:
+            vector_results = await service.vector_service.search_similar_properties(
+                query=search_request.query, top_k=pool_size, filter_dict=None
+            )
+            candidates = await service.property_service.get_properties_batch(
+                [int(prop_id) for prop_id, _, _ in vector_results]
+            ) if vector_results else []
+        stages['vector_search_ms'] = vector_timer.elapsed_ms
+
+        if not candidates:
+            decide('rerank', 'skip', 'no_candidates')
+            return self._build_response(search_request, [], stages, decisions, deadline_ms, elapsed_ms(), None)
+
+        vector_scores = {str(prop_id): score for prop_id, score, _ in vector_results}
+
+        # Stage 2: BM25 + hybrid scoring - cheap and local, always runs
+        if not service.corpus_built:
+            await service._build_bm25_corpus()
+        with stage_timer("scoring") as hybrid_timer:
+            bm25_scores = service._calculate_bm25_scores(search_request.query, candidates)
+            records = service._apply_hybrid_scoring(candidates, vector_scores, bm25_scores)
+        stages['hybrid_scoring_ms'] = hybrid_timer.elapsed_ms
+
+        score_stats = self._score_stats(records, search_request, page_size)
+
+        # Stage 3: AI rerank, if it is useful and fits
+        with stage_timer("rerank") as rerank_timer:
+            records = await self._adaptive_rerank(records, search_request, score_stats, deadline_ms, elapsed_ms, decide)
+        stages['ai_rerank_ms'] = rerank_timer.elapsed_ms
+
+        return self._build_response(search_request, records, stages, decisions, deadline_ms, elapsed_ms(), score_stats)
+
+    def _score_stats(self, records: List[ScoreRecord], search_request: PropertySearchRequest, page_size: int) -> Dict[str, Any]:
+        """Vector score distribution, the scoring scenario and how far the top page stands apart"""
+        vector_values = np.array([record.vector_score or 0.0 for record in records], dtype=np.float32)
+        median_score = float(np.median(vector_values))
+        std_dev = float(np.std(vector_values))
+        scenario = determine_scoring_scenario(median_score, std_dev, parse_query(search_request.query))
+
+        # Records are in hybrid order; compare the page the user sees against the rest of the pool
+        top, rest = vector_values[:page_size], vector_values[page_size:]
+        separation = (float(top.mean()) - float(rest.mean())) / std_dev if len(rest) and std_dev > 0 else 0.0
+
+        return {
+            'median': round(median_score, 4),
+            'stdDev': round(std_dev, 4),
+            'scenario': scenario,
+            'separation': round(separation, 2)
+        }
+
+    async def _adaptive_rerank(self, records, search_request, score_stats, deadline_ms, elapsed_ms, decide) -> List[ScoreRecord]:
+        rerank_service = self.hybrid_service.ai_rerank_service
+        if not rerank_service.openai_client:
+            decide('rerank', 'skip', 'ai_unavailable')
+            return records
+
+        if openai_chat_breaker.is_open:
+            decide('rerank', 'skip', 'circuit_open')
+            return records
+
+        if score_stats['scenario'] == "high_quality_high_variance" and score_stats['separation'] >= CONFIDENT_SEPARATION:
+            decide('rerank', 'skip', 'confident_vector_separation', separation=score_stats['separation'])
+            return records
+
+        batch_size = rerank_service.max_context_properties
+        requested = min(len(records), search_request.page_size * 2)
+        per_batch_ms = self.rerank_batch_latency.percentile(BUDGET_PERCENTILE)
+        remaining_ms = deadline_ms - elapsed_ms() - RESPONSE_RESERVE_MS
+        affordable_batches = int(remaining_ms // per_batch_ms) if remaining_ms > 0 else 0
+        needed_batches = math.ceil(requested / batch_size)
+
+        if affordable_batches == 0:
+            decide('rerank', 'skip', 'budget_exhausted',
+                   remainingMs=round(remaining_ms, 1), estimatedBatchMs=round(per_batch_ms, 1))
+            return records
+
+        candidate_count = requested
+        if affordable_batches < needed_batches:
+            candidate_count = affordable_batches * batch_size
+            decide('rerank', 'trim', 'budget_tight', candidates=candidate_count, requested=requested,
+                   remainingMs=round(remaining_ms, 1), estimatedBatchMs=round(per_batch_ms, 1))
+        else:
+            decide('rerank', 'run', 'within_budget', candidates=candidate_count,
+                   remainingMs=round(remaining_ms, 1), estimatedBatchMs=round(per_batch_ms, 1))
+
+        rerank_start = time.perf_counter()
+        batches = math.ceil(candidate_count / batch_size)
+        try:
+            reranked = await asyncio.wait_for(
+                self.hybrid_service._rerank_records(records, search_request, candidate_count=candidate_count),
+                timeout=max(remaining_ms, 0) / 1000
+            )
+        except asyncio.TimeoutError:
+            self.rerank_batch_latency.observe((time.perf_counter() - rerank_start) * 1000 / batches)
+            # Rerank scores records in place - put the hybrid scores back, with no AI fields, before serving them
+            for record in records:
+                record.reset_to_hybrid()
+            records.sort(key=lambda record: record.score, reverse=True)
+            decide('rerank', 'timeout', 'llm_overran_deadline')
+            return records
+
+        self.rerank_batch_latency.observe((time.perf_counter() - rerank_start) * 1000 / batches)
+        # Candidates past the reranked head keep their hybrid order behind it
+        reranked_ids = {record.listing_id for record in reranked}
+        return reranked + [record for record in records if record.listing_id not in reranked_ids]
+
+    def _build_response(
+        self,
+        search_request: PropertySearchRequest,
+        records: List[ScoreRecord],
+        stages: Dict[str, float],
+        decisions: List[Dict[str, Any]],
+        deadline_ms: int,
+        total_ms: float,
+        score_stats: Optional[Dict[str, Any]]
+    ) -> PropertySearchResponse:
+        page_size = search_request.page_size
+        offset = (search_request.page - 1) * page_size
+        total_results = len(records)
+        total_pages = (total_results + page_size - 1) // page_size
+
+        return PropertySearchResponse(
+            properties=attach_scores(records[offset:offset + page_size]),
+            searchTerm=search_request.query,
+            totalResults=total_results,
+            page=search_request.page,
+            pageSize=page_size,
+            totalPages=total_pages,
+            hasNext=search_request.page < total_pages,
+            hasPrevious=search_request.page > 1,
+            metadata={
+                'pipeline': 'adaptive',
+                'deadlineMs': deadline_ms,
+                'elapsedMs': round(total_ms, 1),
+                'stages': stages,
+                'scoreStats': score_stats,
+                'decisions': decisions
+            }
+        )
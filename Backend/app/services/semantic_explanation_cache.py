@@ -0,0 +1,196 @@
+"""
+Semantic Explanation Cache for PropMatch
+Near-duplicate reuse on top of the exact (query, listing) explanation cache.
+The query embedding of every cached explanation is kept in a per-listing Redis
+hash, and a new query for that listing reuses the closest one's explanation
+when their cosine similarity clears SEMANTIC_EXPLANATION_THRESHOLD - so "3 bed
+house near UCT" and "three bedroom house close to UCT" share one LLM call.
+A sample of reuses is audited against a freshly generated explanation to
+measure how often reuse served the wrong answer.
+"""
+
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.core.circuit_breaker import openai_embeddings_breaker
+from app.core.clients import get_openai_client, http_timeout
+from app.core.config import settings
+from app.core.llm_accounting import record_llm_call
+from app.core.metrics import metrics_registry, stage_timer
+from app.core.redis_cache import explanation_cache
+
+logger = logging.getLogger(__name__)
+
+QUERY_EMBEDDING_CACHE_SIZE = 512  # A search's explanations share its query embedding
+SIMILARITY_BUCKETS = (0.5, 0.6, 0.7, 0.75, 0.8, 0.85, 0.88, 0.9, 0.92, 0.94, 0.96, 0.98, 1.0)
+
+SEMANTIC_LOOKUPS = metrics_registry.counter(
+    "propmatch_explanation_semantic_lookups_total",
+    "Near-duplicate explanation lookups after an exact cache miss by outcome (hit, miss, no_candidates, error)",
+    ["outcome"]
+)
+SEMANTIC_SIMILARITY = metrics_registry.histogram(
+    "propmatch_explanation_semantic_similarity",
+    "Cosine similarity of the closest cached query for the listing, per lookup",
+    [],
+    SIMILARITY_BUCKETS
+)
+SEMANTIC_AUDITS = metrics_registry.counter(
+    "propmatch_explanation_semantic_audits_total",
+    "Audited reuses by verdict (consistent, false_reuse) - false_reuse when a fresh explanation disagrees",
+    ["verdict"]
+)
+SEMANTIC_AUDIT_SIMILARITY = metrics_registry.histogram(
+    "propmatch_explanation_semantic_audit_similarity",
+    "Query similarity of audited reuses by verdict - where false reuses start is where the threshold belongs",
+    ["verdict"],
+    SIMILARITY_BUCKETS
+)
+
+
+@dataclass
+class SemanticMatch:
+    """Outcome of a near-duplicate lookup - the embedding is kept to remember the query after generating"""
+    embedding: Optional[np.ndarray] = None
+    entry: Optional[Dict[str, Any]] = None
+    similarity: float = 0.0
+    matched_query: Optional[str] = None
+
+
+def explanation_text(explanation: Dict[str, Any]) -> str:
+    """What an explanation says, for comparing two of them"""
+    points = explanation.get('positive_points', []) + explanation.get('negative_points', [])
+    return "\n".join(
+        [explanation.get('overall_summary', '')] + [f"{point.get('point', '')}: {point.get('details', '')}" for point in points]
+    )
+
+
+class SemanticExplanationCache:
+    """Per-listing query embeddings in Redis, compared in-process with one matrix-vector product"""
+
+    def __init__(self):
+        self._query_embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.audits = 0
+        self.false_reuses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.SEMANTIC_EXPLANATION_CACHE_ENABLED and explanation_cache.redis_available
+
+    async def embed(self, text: str, purpose: str = "explanation_query_embedding") -> Optional[np.ndarray]:
+        """Unit-length shortened embedding, or None when OpenAI is unavailable"""
+        client = get_openai_client()
+        if client is None:
+            return None
+        with stage_timer("embed") as embed_timer, openai_embeddings_breaker.guard():
+            response = await client.embeddings.create(
+                model=settings.EMBEDDING_MODEL,
+                input=text,
+                dimensions=settings.SEMANTIC_EXPLANATION_DIMENSIONS,
+                timeout=http_timeout(settings.OPENAI_EMBEDDING_READ_TIMEOUT_SECONDS)
+            )
+        record_llm_call("embedding", settings.EMBEDDING_MODEL, purpose,
+                        response.usage.prompt_tokens if response.usage else 0, latency_ms=embed_timer.elapsed * 1000)
+        vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    async def _query_embedding(self, search_query: str) -> Optional[np.ndarray]:
+        query = search_query.strip().lower()
+        embedding = self._query_embeddings.get(query)
+        if embedding is not None:
+            self._query_embeddings.move_to_end(query)
+            return embedding
+        embedding = await self.embed(query)
+        if embedding is not None:
+            self._query_embeddings[query] = embedding
+            while len(self._query_embeddings) > QUERY_EMBEDDING_CACHE_SIZE:
+                self._query_embeddings.popitem(last=False)
+        return embedding
+
+    async def lookup(self, search_query: str, listing_number: str) -> SemanticMatch:
+        """The listing's explanation for the closest cached query above the threshold, if any"""
+        if not self.enabled:
+            return SemanticMatch()
+        try:
+            embedding = await self._query_embedding(search_query)
+            if embedding is None:
+                return SemanticMatch()
+            vectors = await explanation_cache.get_query_vectors(listing_number)
+        except Exception as e:
+            logger.warning(f"Semantic explanation lookup failed for property {listing_number}: {e}")
+            SEMANTIC_LOOKUPS.inc(outcome="error")
+            return SemanticMatch()
+
+        # Stored vectors of another dimensionality (the setting changed) are skipped
+        candidates = [(key, vector) for key, vector in vectors.items() if len(vector) == embedding.size * 2]
+        if not candidates:
+            SEMANTIC_LOOKUPS.inc(outcome="no_candidates")
+            self.misses += 1
+            return SemanticMatch(embedding)
+
+        matrix = np.frombuffer(b"".join(vector for _, vector in candidates), dtype=np.float16).reshape(len(candidates), -1)
+        similarities = matrix.astype(np.float32) @ embedding
+        best = int(np.argmax(similarities))
+        similarity = float(similarities[best])
+        SEMANTIC_SIMILARITY.observe(similarity)
+
+        entry = None
+        if similarity >= settings.SEMANTIC_EXPLANATION_THRESHOLD:
+            entry = await explanation_cache.get_entry(listing_number, candidates[best][0])
+        if not entry or not entry.get('explanation'):
+            SEMANTIC_LOOKUPS.inc(outcome="miss")
+            self.misses += 1
+            return SemanticMatch(embedding, similarity=similarity)
+
+        SEMANTIC_LOOKUPS.inc(outcome="hit")
+        self.hits += 1
+        matched_query = entry['explanation'].get('search_query')
+        logger.info(f"Semantic cache HIT for property {listing_number}: '{search_query[:50]}' ~ "
+                    f"'{(matched_query or '')[:50]}' ({similarity:.3f})")
+        return SemanticMatch(embedding, entry, similarity, matched_query)
+
+    async def remember(self, search_query: str, listing_number: str, embedding: Optional[np.ndarray]):
+        """Store the query embedding of an explanation just cached under (query, listing)"""
+        if embedding is None or not self.enabled:
+            return
+        await explanation_cache.add_query_vector(search_query, listing_number, embedding.astype(np.float16).tobytes())
+
+    async def audit(self, reused: Dict[str, Any], fresh: Dict[str, Any], similarity: float) -> str:
+        """Compare a reused explanation with one generated for the actual query; returns the verdict"""
+        reused_vector = await self.embed(explanation_text(reused), "explanation_audit_embedding")
+        fresh_vector = await self.embed(explanation_text(fresh), "explanation_audit_embedding")
+        if reused_vector is None or fresh_vector is None:
+            return "skipped"
+        agreement = float(reused_vector @ fresh_vector)
+        verdict = "consistent" if agreement >= settings.SEMANTIC_EXPLANATION_AUDIT_AGREEMENT else "false_reuse"
+
+        self.audits += 1
+        if verdict == "false_reuse":
+            self.false_reuses += 1
+            logger.warning(f"Semantic cache false reuse for property {fresh.get('listing_number')}: "
+                           f"'{fresh.get('search_query', '')[:50]}' got the explanation for "
+                           f"'{reused.get('search_query', '')[:50]}' (query {similarity:.3f}, agreement {agreement:.3f})")
+        SEMANTIC_AUDITS.inc(verdict=verdict)
+        SEMANTIC_AUDIT_SIMILARITY.observe(similarity, verdict=verdict)
+        return verdict
+
+    def summary(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'threshold': settings.SEMANTIC_EXPLANATION_THRESHOLD,
+            'lookups': lookups,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'audits': self.audits,
+            'false_reuse_rate': round(self.false_reuses / self.audits, 3) if self.audits else None
+        }
+
+
+# Global instance
+semantic_explanation_cache = SemanticExplanationCache()
@@ -0,0 +1,195 @@
+"""
+Similar Listings ("More like this") for PropMatch
+Answers from the nightly precomputed neighbour table when it covers the listing,
+otherwise queries Pinecone with the listing's stored vector - never re-embeds
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.circuit_breaker import CircuitOpenError, supabase_breaker
+from app.core.metrics import record_cache_lookup, stage_timer
+from app.models.property import Property, PropertySearchFilters
+from app.services.supabase_property_service import SupabasePropertyService
+from app.services.vector_service import VectorService
+
+logger = logging.getLogger(__name__)
+
+RELOAD_INTERVAL_SECONDS = 3600  # The table is rebuilt nightly - hourly reloads pick it up well within a day
+LIVE_OVERFETCH = 3  # Filtered live queries fetch extra neighbours - index metadata can lag the rows filters are re-checked on
+
+
+def neighbour_filter(filters: Optional[PropertySearchFilters]) -> Optional[Dict[str, Any]]:
+    """Pinecone metadata filter for the similar-listings filters"""
+    if not filters:
+        return None
+
+    pinecone_filter: Dict[str, Any] = {}
+    if filters.property_type:
+        pinecone_filter["property_type"] = {"$eq": filters.property_type.value}
+    if filters.bedrooms:
+        pinecone_filter["bedrooms"] = {"$eq": filters.bedrooms}
+
+    price = {}
+    if filters.min_price:
+        price["$gte"] = filters.min_price
+    if filters.max_price:
+        price["$lte"] = filters.max_price
+    if price:
+        pinecone_filter["price"] = price
+
+    return pinecone_filter or None
+
+
+def matches_filters(property_obj: Property, filters: Optional[PropertySearchFilters]) -> bool:
+    """Check a hydrated neighbour against the filters"""
+    if not filters:
+        return True
+    if filters.property_type and property_obj.type != filters.property_type:
+        return False
+    if filters.min_price and property_obj.price < filters.min_price:
+        return False
+    if filters.max_price and property_obj.price > filters.max_price:
+        return False
+    if filters.bedrooms and int(property_obj.bedrooms or 0) != filters.bedrooms:
+        return False
+    return True
+
+
+class SimilarListingsTable:
+    """In-process copy of the precomputed neighbour table, reloaded in the background"""
+
+    def __init__(self):
+        self.neighbours: Dict[str, List[Tuple[str, float]]] = {}
+        self.loaded_at: Optional[float] = None
+        self._load_task: Optional[asyncio.Task] = None
+
+    def schedule_load(self, property_service: SupabasePropertyService):
+        """Start a background reload when the table is missing or stale"""
+        if self._load_task is not None and not self._load_task.done():
+            return
+        if self.loaded_at is not None and time.time() - self.loaded_at < RELOAD_INTERVAL_SECONDS:
+            return
+        self._load_task = asyncio.create_task(self._reload(property_service))
+
+    async def _reload(self, property_service: SupabasePropertyService):
+        try:
+            start_time = time.time()
+            # The Supabase client is synchronous - page through the table off the event loop
+            self.neighbours = await asyncio.to_thread(self._load, property_service)
+            self.loaded_at = time.time()
+            logger.info(
+                f"🧭 Similar listings table loaded: {len(self.neighbours)} listings "
+                f"in {time.time() - start_time:.1f}s"
+            )
+        except Exception as e:
+            # Keep serving the previous table; retry on the next schedule
+            self.loaded_at = time.time() - RELOAD_INTERVAL_SECONDS + 300
+            logger.warning(f"Similar listings table load failed, using live vector search: {e}")
+
+    @staticmethod
+    def _load(property_service: SupabasePropertyService, page_size: int = 1000) -> Dict[str, List[Tuple[str, float]]]:
+        neighbours = {}
+        offset = 0
+        while True:
+            result = property_service.supabase.table('properties') \
+                .select('listing_number, similar_listings') \
+                .range(offset, offset + page_size - 1) \
+                .execute()
+            rows = result.data or []
+            for row in rows:
+                stored = row.get('similar_listings')
+                if stored:
+                    neighbours[str(row['listing_number'])] = [
+                        (str(entry['listing_number']), float(entry['score'])) for entry in stored
+                    ]
+            if len(rows) < page_size:
+                return neighbours
+            offset += page_size
+
+    def get(self, listing_number: str) -> Optional[List[Tuple[str, float]]]:
+        return self.neighbours.get(listing_number)
+
+
+class SimilarListingsService:
+    """Nearest neighbours of a listing, hydrated and ordered by similarity"""
+
+    def __init__(self):
+        self.property_service = SupabasePropertyService()
+        self._vector_service: Optional[VectorService] = None
+
+    @property
+    def vector_service(self) -> VectorService:
+        # Only the live fallback needs Pinecone - don't connect for table hits
+        if self._vector_service is None:
+            self._vector_service = VectorService()
+        return self._vector_service
+
+    async def find_similar(
+        self,
+        listing_number: str,
+        limit: int = 10,
+        filters: Optional[PropertySearchFilters] = None
+    ) -> Optional[Tuple[List[Property], str]]:
+        """
+        Returns (similar properties, source) where source is 'precomputed' or 'live',
+        or None when the listing is unknown to both the table and the index.
+        Raises CircuitOpenError when only a live query could answer and Pinecone is down,
+        or when Supabase is failing fast and the neighbours can't be hydrated
+        """
+
+        if self.property_service.supabase:
+            similar_listings_table.schedule_load(self.property_service)
+
+        precomputed = similar_listings_table.get(listing_number)
+        stored_properties = None
+        if precomputed is not None:
+            record_cache_lookup("similar_listings", "hit")
+            stored_properties = await self._hydrate(precomputed if filters else precomputed[:limit], filters)
+            # A filter or a large limit can leave the stored top-N short - only then go live
+            if len(stored_properties) >= limit:
+                return stored_properties[:limit], "precomputed"
+        else:
+            record_cache_lookup("similar_listings", "miss")
+
+        top_k = limit * LIVE_OVERFETCH if filters else limit
+        try:
+            matches = await self.vector_service.search_similar_to_listing(
+                listing_number, top_k=top_k, filter_dict=neighbour_filter(filters)
+            )
+        except CircuitOpenError:
+            if stored_properties is None:
+                raise
+            matches = None
+        if matches is None:
+            if stored_properties is not None:
+                return stored_properties, "precomputed"
+            return None
+
+        properties = await self._hydrate([(match_id, score) for match_id, score, _ in matches], filters)
+        return properties[:limit], "live"
+
+    async def _hydrate(
+        self,
+        neighbours: List[Tuple[str, float]],
+        filters: Optional[PropertySearchFilters]
+    ) -> List[Property]:
+        """Fetch neighbours in one batch and return them in similarity order with searchScore set"""
+        scores = dict(neighbours)
+        properties = await self.property_service.get_properties_batch([int(listing) for listing, _ in neighbours])
+        if not properties and neighbours and supabase_breaker.is_open:
+            # get_properties_batch swallows the rejection - surface it so the route answers 503, not an empty list
+            raise CircuitOpenError(supabase_breaker.name, supabase_breaker.retry_in)
+
+        with stage_timer("scoring"):
+            properties = [prop for prop in properties if str(prop.listing_number) in scores and matches_filters(prop, filters)]
+            for prop in properties:
+                prop.searchScore = round(scores[str(prop.listing_number)] * 100, 1)
+            properties.sort(key=lambda prop: scores[str(prop.listing_number)], reverse=True)
+        return properties
+
+
+# Global table instance - shared by every request
+similar_listings_table = SimilarListingsTable()
@@ -3,14 +3,18 @@ Supabase Property Service for PropMatch
 Direct integration with Supabase API for property operations
 """
 
+import asyncio
 import logging
 from typing import List, Optional, Dict, Any
 import json
 import random
 
 from app.core.config import settings
-from app.models.property import Property, PropertySearchFilters, Location, PointOfInterest, PropertyType, PropertyStatus
+from app.models.property import Property, PropertySearchFilters, Location, PointOfInterest, PropertyType, PropertyStatus, PoiFeatures
 from app.db.database import get_supabase_client
+from app.core.metrics import stage_timer
+from app.core.circuit_breaker import supabase_breaker
+from app.services.poi_features import build_poi_features
 
 logger = logging.getLogger(__name__)
 
@@ -67,7 +71,8 @@ class SupabasePropertyService:
                     query = query.eq('transaction_type', transaction_type)
             
             # Apply pagination
-            result = query.range(skip, skip + limit - 1).execute()
+            with supabase_breaker.guard():
+                result = query.range(skip, skip + limit - 1).execute()
             
             if not result.data:
                 return []
@@ -144,7 +149,8 @@ class SupabasePropertyService:
             return None
         
         try:
-            result = self.supabase.table('properties').select("*").eq('listing_number', listing_number).execute()
+            with supabase_breaker.guard():
+                result = self.supabase.table('properties').select("*").eq('listing_number', listing_number).execute()
             
             if not result.data:
                 return None
@@ -163,7 +169,11 @@ class SupabasePropertyService:
         
         try:
             # Single query for all properties - MAJOR PERFORMANCE IMPROVEMENT
-            result = self.supabase.table('properties').select("*").in_('listing_number', listing_numbers).execute()
+            # The Supabase client is synchronous - run it off the event loop so batches can overlap
+            with stage_timer("supabase_fetch"), supabase_breaker.guard():
+                result = await asyncio.to_thread(
+                    self.supabase.table('properties').select("*").in_('listing_number', listing_numbers).execute
+                )
             
             if not result.data:
                 logger.warning(f"No properties found for {len(listing_numbers)} listing numbers")
@@ -171,14 +181,15 @@ class SupabasePropertyService:
             
             # Convert all properties at once
             properties = []
-            for db_prop in result.data:
-                try:
-                    prop = self._convert_supabase_to_pydantic(db_prop)
-                    properties.append(prop)
-                except Exception as e:
-                    listing_num = db_prop.get('listing_number', 'unknown')
-                    logger.warning(f"Error converting property {listing_num}: {e}")
-                    continue
+            with stage_timer("conversion"):
+                for db_prop in result.data:
+                    try:
+                        prop = self._convert_supabase_to_pydantic(db_prop)
+                        properties.append(prop)
+                    except Exception as e:
+                        listing_num = db_prop.get('listing_number', 'unknown')
+                        logger.warning(f"Error converting property {listing_num}: {e}")
+                        continue
             
             logger.info(f"Batch fetched {len(properties)} properties from {len(listing_numbers)} requested")
             return properties
@@ -344,6 +355,17 @@ class SupabasePropertyService:
             except Exception as e:
                 logger.warning(f"Error parsing POI for property {db_property.get('listing_number')}: {e}")
         
+        # POI feature table - use the stored column when the row has been backfilled
+        poi_features = None
+        stored_features = db_property.get('poi_features')
+        if stored_features:
+            try:
+                poi_features = PoiFeatures(**stored_features)
+            except Exception as e:
+                logger.warning(f"Ignoring invalid poi_features for property {db_property.get('listing_number')}: {e}")
+        if poi_features is None:
+            poi_features = build_poi_features(points_of_interest, location.neighborhood)
+        
         # Map property type
         property_type = PropertyType.APARTMENT  # default
         prop_type_str = db_property.get('property_type', '').lower()
@@ -465,5 +487,6 @@ class SupabasePropertyService:
             additional_rooms=db_property.get('additional_rooms'),
             external_features=db_property.get('external_features'),
             building_features=db_property.get('building_features'),
-            points_of_interest=points_of_interest
+            points_of_interest=points_of_interest,
+            poi_features=poi_features
         ) 
\ No newline at end of file
@@ -3,6 +3,7 @@ Vector Search Service for PropMatch
 Handles property embeddings and similarity search using Pinecone
 """
 
+import asyncio
 import logging
 from typing import List, Dict, Any, Optional, Tuple
 import hashlib
@@ -16,6 +17,11 @@ from pinecone import Pinecone as PineconeClient
 
 from app.core.config import settings
 from app.models.property import Property
+from app.core.metrics import stage_timer
+from app.core.circuit_breaker import CircuitOpenError, openai_embeddings_breaker, pinecone_breaker
+from app.core.clients import http_timeout, openai_embeddings_http_client
+from app.core.llm_accounting import estimate_tokens, record_llm_call
+from app.services.poi_features import get_poi_features
 
 logger = logging.getLogger(__name__)
 
@@ -47,12 +53,20 @@ class VectorService:
             self.embeddings = OpenAIEmbeddings(
                 openai_api_key=settings.OPENAI_API_KEY,
                 model=settings.EMBEDDING_MODEL,
-                client=None  # Explicitly set client to None to avoid proxy issues
+                openai_api_base=settings.OPENAI_BASE_URL,
+                request_timeout=http_timeout(settings.OPENAI_EMBEDDING_READ_TIMEOUT_SECONDS),
+                http_client=openai_embeddings_http_client()  # Shared keep-alive pool
             )
             
             # Initialize Pinecone
             self.pinecone_client = PineconeClient(api_key=settings.PINECONE_API_KEY)
             
+            if settings.PINECONE_HOST:
+                self.index = self.pinecone_client.Index(host=settings.PINECONE_HOST)
+                self.initialized = True
+                logger.info(f"Vector service connected to Pinecone host {settings.PINECONE_HOST}")
+                return
+            
             # Check if index exists, create if not
             index_name = settings.PINECONE_INDEX_NAME
             existing_indexes = [index.name for index in self.pinecone_client.list_indexes()]
@@ -128,18 +142,14 @@ class VectorService:
             "status": property_data.status.value if hasattr(property_data.status, 'value') else str(property_data.status)
         }
         
-        # Add points of interest for distance-based filtering
-        if property_data.points_of_interest:
-            # Find closest schools, hospitals, etc.
-            poi_by_category = {}
-            for poi in property_data.points_of_interest:
-                category = poi.category.lower()
-                if category not in poi_by_category or poi.distance < poi_by_category[category]:
-                    poi_by_category[category] = poi.distance
-            
-            # Add closest POI distances to metadata
-            for category, distance in poi_by_category.items():
-                metadata[f"closest_{category}_km"] = round(distance, 2)
+        # Add closest POI distances for distance-based filtering (precomputed at ingest)
+        poi_features = get_poi_features(property_data)
+        for category, distance in poi_features.nearest_by_category.items():
+            metadata[f"closest_{category}_km"] = distance
+        for landmark in ('uct', 'waterfront', 'cbd'):
+            distance = getattr(poi_features, f"{landmark}_km")
+            if distance is not None:
+                metadata[f"closest_{landmark}_km"] = round(distance, 2)
         
         return metadata
     
@@ -155,7 +165,10 @@ class VectorService:
             text_content = self.create_property_text(property_data)
             
             # Generate embedding (using synchronous method)
-            embedding = self.embeddings.embed_query(text_content)
+            with stage_timer("embed") as embed_timer, openai_embeddings_breaker.guard():
+                embedding = self.embeddings.embed_query(text_content)
+            record_llm_call("embedding", settings.EMBEDDING_MODEL, "property_embedding",
+                            estimate_tokens(text_content), latency_ms=embed_timer.elapsed * 1000)
             
             # Create metadata
             metadata = self.create_property_metadata(property_data)
@@ -218,15 +231,19 @@ class VectorService:
         
         try:
             # Create query embedding (using synchronous method)
-            query_embedding = self.embeddings.embed_query(query)
+            with stage_timer("embed") as embed_timer, openai_embeddings_breaker.guard():
+                query_embedding = self.embeddings.embed_query(query)
+            record_llm_call("embedding", settings.EMBEDDING_MODEL, "query_embedding",
+                            estimate_tokens(query), latency_ms=embed_timer.elapsed * 1000)
             
             # Search in Pinecone
-            search_results = self.index.query(
-                vector=query_embedding,
-                top_k=top_k,
-                include_metadata=True,
-                filter=filter_dict
-            )
+            with stage_timer("vector_query"), pinecone_breaker.guard():
+                search_results = self.index.query(
+                    vector=query_embedding,
+                    top_k=top_k,
+                    include_metadata=True,
+                    filter=filter_dict
+                )
             
             # Process results
             results = []
@@ -244,6 +261,121 @@ class VectorService:
             logger.error(f"Vector search failed: {e}")
             return []
     
+    async def search_similar_properties_batch(
+        self,
+        queries: List[str],
+        top_k: int = 50,
+        filter_dicts: Optional[List[Optional[Dict[str, Any]]]] = None
+    ) -> List[List[Tuple[str, float, Dict[str, Any]]]]:
+        """
+        Vector search for many queries: one embedding request for all of them,
+        then the Pinecone queries run concurrently
+        
+        Returns: one (property_id, similarity_score, metadata) list per query, in order
+        """
+        
+        if not self.initialized or not queries:
+            return [[] for _ in queries]
+        
+        filter_dicts = filter_dicts or [None] * len(queries)
+        
+        try:
+            with stage_timer("embed") as embed_timer, openai_embeddings_breaker.guard():
+                # The LangChain embeddings client is synchronous - keep it off the event loop
+                query_embeddings = await asyncio.to_thread(self.embeddings.embed_documents, queries)
+            record_llm_call("embedding", settings.EMBEDDING_MODEL, "query_embedding",
+                            estimate_tokens(*queries), latency_ms=embed_timer.elapsed * 1000, label="batch")
+        except Exception as e:
+            logger.error(f"Batch embedding failed: {e}")
+            return [[] for _ in queries]
+        
+        def query_index(embedding: List[float], filter_dict: Optional[Dict[str, Any]]):
+            with pinecone_breaker.guard():
+                search_results = self.index.query(
+                    vector=embedding,
+                    top_k=top_k,
+                    include_metadata=True,
+                    filter=filter_dict
+                )
+            return [(match.id, float(match.score), match.metadata or {}) for match in search_results.matches]
+        
+        with stage_timer("vector_query"):
+            outcomes = await asyncio.gather(
+                *(asyncio.to_thread(query_index, embedding, filter_dict)
+                  for embedding, filter_dict in zip(query_embeddings, filter_dicts)),
+                return_exceptions=True
+            )
+        
+        results = []
+        for query, outcome in zip(queries, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Vector search failed for '{query}': {outcome}")
+                results.append([])
+            else:
+                results.append(outcome)
+        
+        logger.info(f"Batch vector search ran {len(queries)} queries with one embedding call")
+        return results
+
+    def fetch_listing_vectors(self, property_ids: List[str], batch_size: int = 100) -> Dict[str, List[float]]:
+        """Stored embeddings for listings already in the index, keyed by property ID"""
+
+        if not self.initialized or not property_ids:
+            return {}
+
+        vectors = {}
+        for i in range(0, len(property_ids), batch_size):
+            batch = property_ids[i:i + batch_size]
+            with stage_timer("vector_fetch"), pinecone_breaker.guard():
+                fetched = self.index.fetch(ids=batch)
+            for property_id, vector in fetched.vectors.items():
+                vectors[property_id] = list(vector.values)
+        return vectors
+
+    async def search_similar_to_listing(
+        self,
+        property_id: str,
+        top_k: int = 20,
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> Optional[List[Tuple[str, float, Dict[str, Any]]]]:
+        """
+        Nearest neighbours of a listing using its stored vector - no embedding call
+
+        Returns: (property_id, similarity_score, metadata) tuples without the listing
+        itself, or None when the listing has no vector in the index; raises
+        CircuitOpenError while Pinecone is failing fast
+        """
+
+        if not self.initialized:
+            logger.warning("Vector service not initialized")
+            return None
+
+        try:
+            vectors = await asyncio.to_thread(self.fetch_listing_vectors, [property_id])
+            if property_id not in vectors:
+                return None
+
+            with stage_timer("vector_query"), pinecone_breaker.guard():
+                search_results = await asyncio.to_thread(
+                    self.index.query,
+                    vector=vectors[property_id],
+                    top_k=top_k + 1,  # The listing is its own nearest neighbour
+                    include_metadata=True,
+                    filter=filter_dict
+                )
+
+            results = [
+                (match.id, float(match.score), match.metadata or {})
+                for match in search_results.matches if match.id != property_id
+            ]
+            return results[:top_k]
+
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.error(f"Similar listing search failed for {property_id}: {e}")
+            return None
+
     async def bulk_upsert_properties(self, properties: List[Property], batch_size: int = 100) -> int:
         """
         Bulk upsert multiple properties to vector database
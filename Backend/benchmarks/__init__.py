@@ -0,0 +1 @@
+# Offline performance benchmarks (run from Backend/ with python -m benchmarks.<name>)
@@ -0,0 +1,143 @@
+"""
+Benchmark: Redis value size and encode/decode CPU per cache codec
+
+Builds explanation cache entries (structured like the explanation service's,
+over the fixture corpus and queries) and search cache chunks (10 serialized
+properties each), trains a zstd dictionary on half the queries and measures
+the other half - so the dictionary never saw the queries it is scored on.
+
+Usage (from Backend/):
+    python -m benchmarks.bench_cache_codec
+"""
+
+import json
+import random
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.core.cache_codec import CacheCodec, train_dictionary
+from app.core.search_cache import CHUNK_SIZE
+from app.services.supabase_property_service import SupabasePropertyService
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+LISTINGS_PER_QUERY = 12
+REPEATS = 5
+
+POSITIVE_TEMPLATES = [
+    ("{bedrooms} bedrooms as requested", "The property offers {bedrooms} bedrooms, which matches the size you searched for and leaves room for a home office."),
+    ("Located in {suburb}", "{suburb} is in {city}, the area named in your search, with {poi} about {distance} away."),
+    ("Has a {feature}", "The listing includes a {feature}, one of the features your search asked for."),
+    ("Priced at R{price:,}", "At R{price:,} this {type} sits within the typical range for {suburb}, making it good value for the space."),
+]
+NEGATIVE_TEMPLATES = [
+    ("No {missing} mentioned", "The listing does not mention a {missing}, so you may want to confirm this with the agent."),
+    ("Only {bathrooms} bathroom(s)", "With {bathrooms} bathroom(s) for {bedrooms} bedrooms, mornings could be busy for a larger household."),
+    ("{poi} is {distance} away", "{poi} is {distance} from the property, which may be further than you'd like for daily trips."),
+]
+MISSING_FEATURES = ["pool", "garden", "garage", "sea view", "security estate", "fibre connection"]
+
+
+def _explanation_entry(query: str, prop, rng: random.Random) -> Dict[str, Any]:
+    """One cached explanation as PropertyExplanationCache.set_explanations writes it"""
+    pois = [poi for poi in (prop.points_of_interest or [])] or [None]
+    poi = rng.choice(pois)
+    values = {
+        "bedrooms": prop.bedrooms, "bathrooms": prop.bathrooms, "suburb": prop.location.neighborhood,
+        "city": prop.location.city, "price": int(prop.price), "type": str(prop.type.value if hasattr(prop.type, 'value') else prop.type),
+        "feature": rng.choice(prop.features or ["balcony"]).lower(), "missing": rng.choice(MISSING_FEATURES),
+        "poi": poi.name if poi else "The nearest shops", "distance": poi.distance_str if poi and poi.distance_str else "2km",
+    }
+    positives = rng.sample(POSITIVE_TEMPLATES, rng.randint(2, 4))
+    negatives = rng.sample(NEGATIVE_TEMPLATES, rng.randint(1, 2))
+    explanation = {
+        "search_query": query,
+        "listing_number": str(prop.listing_number),
+        "property_title": prop.title,
+        "match_score": round(rng.uniform(55, 95), 1),
+        "positive_points": [{"point": point.format(**values), "details": details.format(**values)} for point, details in positives],
+        "negative_points": [{"point": point.format(**values), "details": details.format(**values)} for point, details in negatives],
+        "overall_summary": (f"This {values['type']} in {values['suburb']} is a strong match for '{query}'. "
+                            f"It covers most of what you asked for, though the {values['missing']} should be checked."),
+        "cached": False
+    }
+    return {"explanation": explanation, "listing_number": str(prop.listing_number), "cached_at": time.time(), "source": "explanation"}
+
+
+def _legacy_entry(query: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+    """The JSON wrapper written before the codecs: query text and key repeated, placeholder timestamp"""
+    return {
+        "explanation": entry["explanation"], "search_query": query, "listing_number": entry["listing_number"],
+        "cached_at": json.dumps(None), "cache_key": "propmatch:explanation:" + "0" * 32, "source": entry["source"]
+    }
+
+
+def build_corpora() -> Tuple[Dict[str, List[Any]], Dict[str, List[Any]], List[Dict[str, Any]]]:
+    """(train, test) values per cache, plus the test explanations in the legacy wrapper"""
+    rows = json.loads((FIXTURES_DIR / "corpus.json").read_text())
+    queries = [item["query"] for item in json.loads((FIXTURES_DIR / "queries.json").read_text())]
+    converter = SupabasePropertyService.__new__(SupabasePropertyService)
+    properties = [converter._convert_supabase_to_pydantic(row) for row in rows]
+    rng = random.Random(11)
+
+    train: Dict[str, List[Any]] = {"explanation": [], "search": []}
+    test: Dict[str, List[Any]] = {"explanation": [], "search": []}
+    legacy = []
+    for i, query in enumerate(queries):
+        split = train if i % 2 == 0 else test
+        ranked = rng.sample(properties, LISTINGS_PER_QUERY * 3)
+        for prop in ranked[:LISTINGS_PER_QUERY]:
+            entry = _explanation_entry(query, prop, rng)
+            split["explanation"].append(entry)
+            if split is test:
+                legacy.append(_legacy_entry(query, entry))
+        serialized = [prop.model_dump(mode='json') for prop in ranked]
+        split["search"].append({"total": len(serialized), "stored_at": time.time()})
+        for start in range(0, len(serialized), CHUNK_SIZE):
+            split["search"].append(serialized[start:start + CHUNK_SIZE])
+    return train, test, legacy
+
+
+def measure(encode: Callable[[Any], bytes], decode: Callable[[bytes], Any], values: List[Any]) -> Tuple[float, float, float]:
+    """(mean bytes, encode µs, decode µs) per value, best of REPEATS"""
+    encoded = [encode(value) for value in values]
+    encode_s = decode_s = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for value in values:
+            encode(value)
+        encode_s = min(encode_s, time.perf_counter() - start)
+        start = time.perf_counter()
+        for raw in encoded:
+            decode(raw)
+        decode_s = min(decode_s, time.perf_counter() - start)
+    count = len(values)
+    return sum(len(raw) for raw in encoded) / count, encode_s / count * 1e6, decode_s / count * 1e6
+
+
+def main():
+    train, test, legacy = build_corpora()
+
+    print(f"{'cache':>11} | {'format':<24} | {'bytes':>7} | {'vs json':>7} | {'encode µs':>9} | {'decode µs':>9}")
+    for cache in ("explanation", "search"):
+        dictionary = train_dictionary(train[cache])
+        codecs = [
+            ("json", CacheCodec(cache, "json")),
+            ("msgpack", CacheCodec(cache, "msgpack")),
+            ("msgpack-zstd", CacheCodec(cache, "msgpack-zstd")),
+            ("msgpack-zstd-dict", CacheCodec(cache, "msgpack-zstd", {dictionary.dict_id(): dictionary}, dictionary.dict_id())),
+        ]
+        rows = []
+        if cache == "explanation":
+            legacy_codec = CacheCodec(cache, "json")
+            rows.append(("json, old wrapper", measure(legacy_codec.encode, legacy_codec.decode, legacy)))
+        for name, codec in codecs:
+            rows.append((name, measure(codec.encode, codec.decode, test[cache])))
+
+        json_bytes = dict(rows)["json"][0]
+        for name, (size, encode_us, decode_us) in rows:
+            print(f"{cache:>11} | {name:<24} | {size:>7.0f} | {size / json_bytes:>6.0%} | {encode_us:>9.1f} | {decode_us:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
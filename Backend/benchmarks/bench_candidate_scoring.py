@@ -0,0 +1,161 @@
+"""
+Benchmark: per-candidate scalar scoring vs columnar NumPy scoring in EnhancedSearchService
+
+The scalar path below is the scoring loop as it was before it was vectorized,
+kept here as the reference the NumPy scores are checked against.
+
+Usage (from Backend/):
+    python -m benchmarks.bench_candidate_scoring
+"""
+
+import random
+import time
+from typing import Dict
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.property import Property, PropertySearchRequest
+from app.services.enhanced_search_service import (
+    NEARBY_DISTANCE_BANDS, TYPE_MATCHES, WALKING_DISTANCE_BANDS, EnhancedSearchService
+)
+from app.services.poi_features import get_poi_features
+from app.services.poi_index import PoiIndex, poi_gazetteer
+from app.services.query_parser import ParsedQuery, parse_query
+from benchmarks.synthetic import make_properties
+
+QUERIES = [
+    "3 bedroom house walking distance to UCT under 6 million",
+    "2 bedroom apartment close to cavendish square"
+]
+SIZES = [100, 1000, 10000]
+PAGE_SIZE = 20
+
+
+def scalar_context_score(
+    prop: Property,
+    raw_vector_score: float,
+    min_vector: float,
+    vector_range: float,
+    parsed_query: ParsedQuery,
+    target_km: Dict[str, float]
+) -> float:
+    """Property-context scoring for a single candidate - the rules _score_candidate_columns vectorizes"""
+    normalized_vector = (raw_vector_score - min_vector) / vector_range if vector_range > 0 else 0.5
+    score = 20 + (normalized_vector * 80)
+
+    # Impossibility penalty
+    if parsed_query.impossibility_penalty > 0:
+        score *= 1.0 - parsed_query.impossibility_penalty
+        if score > 70 and parsed_query.impossibility_penalty > 0.3:
+            score *= 0.5
+
+    # Hard constraints - price and impossible locations
+    if parsed_query.max_price is not None and prop.price > parsed_query.max_price:
+        score *= 0.3
+    if parsed_query.min_price is not None and prop.price < parsed_query.min_price:
+        score *= 0.3
+    if parsed_query.impossible_locations:
+        score *= 0.2
+
+    # Proximity to places named in the query - listings without POI data stay neutral
+    poi_features = get_poi_features(prop)
+    if poi_features.poi_count:
+        bounds, factors, beyond = WALKING_DISTANCE_BANDS if parsed_query.walking_requested else NEARBY_DISTANCE_BANDS
+        for distance in target_km.values():
+            if not np.isfinite(distance):
+                score *= settings.POI_UNLISTED_TARGET_FACTOR
+                continue
+            score *= next((factor for bound, factor in zip(bounds, factors) if distance <= bound), beyond)
+        if 'cbd' in parsed_query.proximity_targets and poi_features.in_cbd:
+            score *= 1.1
+
+    # Core criteria - bedroom and type mismatches
+    if parsed_query.bedrooms is not None:
+        try:
+            if (int(prop.bedrooms) if prop.bedrooms else 0) != parsed_query.bedrooms:
+                score *= 0.7
+        except (TypeError, ValueError):
+            pass
+    if parsed_query.mentioned_type:
+        expected_types = TYPE_MATCHES.get(parsed_query.mentioned_type, [parsed_query.mentioned_type])
+        if not any(t in prop.type.value.lower() for t in expected_types):
+            score *= 0.85
+
+    return score
+
+
+def scalar_score_and_rank(properties, vector_results, query, per_candidate_bounds=False):
+    """Per-object path: one scoring call per candidate, then a full sort
+
+    With per_candidate_bounds the min/max normalization bounds are recomputed for
+    every candidate, as the scoring loop did before it was vectorized (O(n^2)).
+    """
+    parsed_query = parse_query(query)
+    target_columns = poi_gazetteer.target_distances(properties, parsed_query)
+    vector_scores = dict(vector_results)
+    all_scores = [score for _, score in vector_results]
+    min_vector, max_vector = min(all_scores), max(all_scores)
+    vector_range = max_vector - min_vector if max_vector > min_vector else 0.1
+
+    scored = []
+    for row, prop in enumerate(properties):
+        if per_candidate_bounds:
+            min_vector, max_vector = min(all_scores), max(all_scores)
+            vector_range = max_vector - min_vector if max_vector > min_vector else 0.1
+        score = scalar_context_score(
+            prop, vector_scores.get(str(prop.listing_number), 0.5), min_vector, vector_range, parsed_query,
+            {name: float(column[row]) for name, column in target_columns.items()}
+        )
+        scored.append((round(max(min(score, 100.0), 15.0), 1), prop))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return scored
+
+
+def best_of(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    service = EnhancedSearchService()
+    rng = random.Random(11)
+
+    for query in QUERIES:
+        search_request = PropertySearchRequest(query=query, page=1, page_size=PAGE_SIZE)
+        print(f"Query: {query!r}")
+        print(f"{'candidates':>10} | {'before ms':>10} | {'scalar ms':>10} | {'numpy ms':>10} | {'speedup':>8} | top-{PAGE_SIZE} match")
+
+        for size in SIZES:
+            properties = make_properties(size)
+            # Corpus-wide gazetteer, as the startup load would leave it
+            poi_gazetteer.index = PoiIndex.from_properties(properties)
+            vector_results = [(prop.listing_number, rng.uniform(0.55, 0.75)) for prop in properties]
+            repeats = 5 if size <= 1000 else 2
+
+            before_ms = best_of(
+                lambda: scalar_score_and_rank(properties, vector_results, query, per_candidate_bounds=True),
+                1 if size >= 10000 else repeats
+            )
+            scalar_ms = best_of(lambda: scalar_score_and_rank(properties, vector_results, query), repeats)
+            vector_ms = best_of(
+                lambda: service._fast_score_and_rank(properties, vector_results, search_request, top_k=PAGE_SIZE),
+                repeats
+            )
+
+            scalar_top = [score for score, _ in scalar_score_and_rank(properties, vector_results, query)[:PAGE_SIZE]]
+            vector_top = [prop.searchScore for prop in
+                          service._fast_score_and_rank(properties, vector_results, search_request, top_k=PAGE_SIZE)]
+            matches = np.allclose(scalar_top, vector_top)
+
+            print(f"{size:>10} | {before_ms:>10.2f} | {scalar_ms:>10.2f} | {vector_ms:>10.2f} | "
+                  f"{before_ms / vector_ms:>7.1f}x | {matches}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
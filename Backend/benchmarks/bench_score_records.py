@@ -0,0 +1,103 @@
+"""
+Benchmark: per-stage deep Property copies vs shared properties with ScoreRecords
+
+Replays the hybrid -> AI -> combine scoring stages over synthetic candidates with
+a canned AI ranking and measures allocations with tracemalloc.
+
+Usage (from Backend/):
+    python -m benchmarks.bench_score_records
+"""
+
+import random
+import time
+import tracemalloc
+
+from app.services.ai_rerank_service import AIRerankService
+from app.services.bm25_hybrid_service import BM25HybridService
+from app.services.score_record import attach_scores
+from benchmarks.synthetic import make_properties
+
+SIZES = [60, 500]
+PAGE_SIZE = 10
+
+
+def deep_copy_pipeline(properties, vector_scores, bm25_scores, ai_ranking):
+    """The pipeline as it was: every stage deep-copies each candidate and setattr's its scores"""
+    bm25_max = max(bm25_scores.values())
+    hybrid = []
+    for prop in properties:
+        prop_id = str(prop.listing_number)
+        vector_100 = vector_scores[prop_id] * 100
+        bm25_contribution = min(20, (bm25_scores[prop_id] / bm25_max) * 20)
+        prop_copy = prop.model_copy(deep=True)
+        prop_copy.searchScore = min(100, max(10, vector_100 + bm25_contribution * 0.5))
+        setattr(prop_copy, 'vector_score', vector_scores[prop_id])
+        setattr(prop_copy, 'vector_100', vector_100)
+        setattr(prop_copy, 'bm25_score', bm25_scores[prop_id])
+        setattr(prop_copy, 'bm25_contribution', bm25_contribution)
+        setattr(prop_copy, 'hybrid_base_score', prop_copy.searchScore)
+        hybrid.append(prop_copy)
+    hybrid.sort(key=lambda x: x.searchScore, reverse=True)
+
+    top_candidates = hybrid[:PAGE_SIZE * 2]
+    ai_scores = {item['id']: item['score'] for item in ai_ranking}
+    ai_ranked = []
+    for i, prop in enumerate(top_candidates):
+        prop_copy = prop.model_copy(deep=True)
+        prop_copy.searchScore = float(ai_scores.get(i, prop_copy.searchScore))
+        ai_ranked.append(prop_copy)
+    ai_ranked.sort(key=lambda x: x.searchScore, reverse=True)
+
+    final = []
+    for prop in ai_ranked:
+        prop_copy = prop.model_copy(deep=True)
+        prop_copy.searchScore = 0.6 * prop.searchScore + 0.4 * getattr(prop, 'hybrid_base_score', 50.0)
+        setattr(prop_copy, 'ai_score', prop.searchScore)
+        final.append(prop_copy)
+    final.sort(key=lambda x: x.searchScore, reverse=True)
+    return final[:PAGE_SIZE]
+
+
+def score_record_pipeline(hybrid_service, rerank_service, properties, vector_scores, bm25_scores, ai_ranking):
+    """The pipeline now: ScoreRecords through every stage, shallow copies for the served page only"""
+    hybrid_records = hybrid_service._apply_hybrid_scoring(properties, vector_scores, bm25_scores)
+    ai_ranked = rerank_service._apply_enhanced_ai_scores(hybrid_records[:PAGE_SIZE * 2], ai_ranking)
+    final_records = hybrid_service._combine_hybrid_and_ai_scores(ai_ranked)
+    return attach_scores(final_records[:PAGE_SIZE])
+
+
+def measure(fn):
+    """(peak KiB allocated, ms) for one run"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = (time.perf_counter() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024, elapsed
+
+
+def main():
+    hybrid_service = BM25HybridService()
+    rerank_service = AIRerankService()
+    rng = random.Random(5)
+
+    print(f"{'candidates':>10} | {'deep KiB':>10} | {'records KiB':>11} | {'saved':>6} | {'deep ms':>8} | {'records ms':>10}")
+
+    for size in SIZES:
+        properties = make_properties(size)
+        vector_scores = {str(prop.listing_number): rng.uniform(0.55, 0.75) for prop in properties}
+        bm25_scores = {str(prop.listing_number): rng.uniform(0.0, 8.0) for prop in properties}
+        ai_ranking = [{'id': i, 'score': rng.choice([35, 62, 78, 91])} for i in range(PAGE_SIZE * 2)]
+
+        deep_kib, deep_ms = measure(lambda: deep_copy_pipeline(properties, vector_scores, bm25_scores, ai_ranking))
+        record_kib, record_ms = measure(lambda: score_record_pipeline(
+            hybrid_service, rerank_service, properties, vector_scores, bm25_scores, ai_ranking
+        ))
+
+        print(f"{size:>10} | {deep_kib:>10.1f} | {record_kib:>11.1f} | {1 - record_kib / deep_kib:>5.0%} | "
+              f"{deep_ms:>8.2f} | {record_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Build the frozen search benchmark fixtures
+Writes a synthetic Cape Town listing corpus in Supabase row shape, its precomputed
+embeddings and a golden query set with graded relevance judgments.
+
+The outputs are committed so results stay comparable between commits. Only
+re-run this to change the fixtures on purpose; doing so resets the baseline.
+
+Usage (from Backend/):
+    python -m benchmarks.build_fixtures
+"""
+
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.services.supabase_property_service import SupabasePropertyService
+from app.services.vector_service import VectorService
+from benchmarks.fakes import hash_embed
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+CORPUS_SIZE = 240
+SEED = 2024
+
+# Suburb -> price band (R million), type weights and typical POI distances (km)
+SUBURBS = {
+    'Rondebosch': {
+        'price': (2.0, 9.0), 'types': {'house': 4, 'apartment': 3, 'townhouse': 2},
+        'pois': {'University of Cape Town': 1.0, 'Rondebosch Station': 0.6, 'Cavendish Square': 2.5,
+                 'Rondebosch Boys High School': 0.8, 'Groote Schuur Hospital': 3.0, 'V&A Waterfront': 10.0}
+    },
+    'Observatory': {
+        'price': (1.2, 4.5), 'types': {'apartment': 4, 'house': 3, 'townhouse': 1},
+        'pois': {'University of Cape Town': 2.0, 'Groote Schuur Hospital': 0.9, 'Observatory Station': 0.5,
+                 'Cavendish Square': 5.0, 'V&A Waterfront': 7.0}
+    },
+    'Claremont': {
+        'price': (2.0, 8.0), 'types': {'apartment': 3, 'house': 3, 'townhouse': 2},
+        'pois': {'Cavendish Square': 0.5, 'Claremont Station': 0.4, 'University of Cape Town': 3.0,
+                 'Kirstenbosch Gardens': 4.0, 'Claremont Clinic': 0.8}
+    },
+    'Newlands': {
+        'price': (3.5, 14.0), 'types': {'house': 5, 'townhouse': 2, 'apartment': 1},
+        'pois': {'Kirstenbosch Gardens': 2.5, 'Cavendish Square': 1.6, 'Newlands Station': 0.7,
+                 'University of Cape Town': 2.5, 'Claremont Clinic': 2.0}
+    },
+    'Sea Point': {
+        'price': (1.8, 12.0), 'types': {'apartment': 6, 'house': 1},
+        'pois': {'Sea Point Promenade': 0.3, 'V&A Waterfront': 3.5, 'Pick n Pay Sea Point': 0.4,
+                 'Green Point Park': 1.5, 'Cape Town Station': 4.5}
+    },
+    'Camps Bay': {
+        'price': (8.0, 45.0), 'types': {'house': 4, 'villa': 3, 'apartment': 2},
+        'pois': {'Camps Bay Beach': 0.4, 'V&A Waterfront': 7.0, 'Clifton Beach': 2.0, 'Table Mountain Cableway': 5.0}
+    },
+    'Green Point': {
+        'price': (2.5, 12.0), 'types': {'apartment': 5, 'townhouse': 1},
+        'pois': {'V&A Waterfront': 1.2, 'Green Point Park': 0.5, 'Cape Town Stadium': 0.8,
+                 'Sea Point Promenade': 1.0, 'Cape Town Station': 2.5}
+    },
+    'Cape Town City Centre': {
+        'price': (1.5, 8.0), 'types': {'apartment': 6},
+        'pois': {'V&A Waterfront': 2.0, 'Cape Town Station': 0.6, "Company's Garden": 0.5,
+                 'MyCiti Civic Centre': 0.7, 'Groote Schuur Hospital': 4.0}
+    },
+    'Gardens': {
+        'price': (2.0, 9.0), 'types': {'apartment': 4, 'house': 2, 'townhouse': 1},
+        'pois': {"Company's Garden": 0.6, 'Cape Town Station': 1.8, 'Table Mountain Cableway': 3.0,
+                 'V&A Waterfront': 3.5}
+    },
+    'Constantia': {
+        'price': (6.0, 35.0), 'types': {'house': 5, 'villa': 3, 'townhouse': 1},
+        'pois': {'Constantia Village': 1.0, 'Kirstenbosch Gardens': 5.0, 'Cavendish Square': 7.0,
+                 'Reddam House Constantia': 1.5}
+    },
+    'Durbanville': {
+        'price': (1.5, 7.0), 'types': {'house': 4, 'townhouse': 3, 'apartment': 1},
+        'pois': {'Tyger Valley Centre': 5.0, 'Durbanville Primary School': 0.8, 'Mediclinic Durbanville': 1.2}
+    },
+    'Bellville': {
+        'price': (1.0, 4.5), 'types': {'apartment': 3, 'townhouse': 3, 'house': 3},
+        'pois': {'Tyger Valley Centre': 2.0, 'Bellville Station': 0.6, 'Mediclinic Louis Leipoldt': 1.5}
+    },
+    'Muizenberg': {
+        'price': (1.2, 6.0), 'types': {'house': 3, 'apartment': 3},
+        'pois': {'Muizenberg Beach': 0.4, 'Muizenberg Station': 0.5, 'Blue Route Mall': 6.0}
+    }
+}
+
+POI_CATEGORIES = {
+    'University of Cape Town': 'education', 'Rondebosch Boys High School': 'education',
+    'Reddam House Constantia': 'education', 'Durbanville Primary School': 'education',
+    'Rondebosch Station': 'transport', 'Observatory Station': 'transport', 'Claremont Station': 'transport',
+    'Newlands Station': 'transport', 'Cape Town Station': 'transport', 'MyCiti Civic Centre': 'transport',
+    'Bellville Station': 'transport', 'Muizenberg Station': 'transport',
+    'Cavendish Square': 'shopping', 'V&A Waterfront': 'shopping', 'Pick n Pay Sea Point': 'shopping',
+    'Constantia Village': 'shopping', 'Tyger Valley Centre': 'shopping', 'Blue Route Mall': 'shopping',
+    'Groote Schuur Hospital': 'health', 'Claremont Clinic': 'health', 'Mediclinic Durbanville': 'health',
+    'Mediclinic Louis Leipoldt': 'health',
+}  # Everything else is leisure
+
+FEATURES = ['Pool', 'Garden', 'Garage', 'Balcony', 'Sea View', 'Mountain View', 'Security', 'Parking',
+            'Pet Friendly', 'Fibre', 'Solar Panels', 'Fireplace', 'Braai Area', 'Modern Kitchen']
+
+BEDROOMS_BY_TYPE = {'apartment': [1, 1, 2, 2, 2, 3], 'townhouse': [2, 3, 3], 'house': [2, 3, 3, 4, 4, 5], 'villa': [4, 5, 6]}
+
+# Golden queries: graded by how many of the structured criteria a listing meets
+GOLDEN_QUERIES = [
+    ("3 bedroom house walking distance to UCT", {'types': ['house'], 'bedrooms': 3, 'near': {'University of Cape Town': 1.0}}),
+    ("apartment near the V&A Waterfront", {'types': ['apartment'], 'near': {'V&A Waterfront': 2.0}}),
+    ("2 bedroom apartment in Sea Point under 4 million", {'types': ['apartment'], 'bedrooms': 2, 'suburbs': ['Sea Point'], 'max_price': 4_000_000}),
+    ("family home with garden and pool in Constantia", {'types': ['house', 'villa'], 'features': ['Garden', 'Pool'], 'suburbs': ['Constantia']}),
+    ("affordable flat close to Rondebosch Station", {'types': ['apartment'], 'max_price': 2_500_000, 'near': {'Rondebosch Station': 1.0}}),
+    ("luxury villa in Camps Bay with sea views", {'types': ['villa', 'house'], 'suburbs': ['Camps Bay'], 'features': ['Sea View']}),
+    ("townhouse in Durbanville with security", {'types': ['townhouse'], 'suburbs': ['Durbanville'], 'features': ['Security']}),
+    ("1 bedroom apartment in the city centre", {'types': ['apartment'], 'bedrooms': 1, 'suburbs': ['Cape Town City Centre']}),
+    ("house near Cavendish Square", {'types': ['house'], 'near': {'Cavendish Square': 2.0}}),
+    ("pet friendly house in Observatory", {'types': ['house'], 'suburbs': ['Observatory'], 'features': ['Pet Friendly']}),
+    ("4 bedroom house in Newlands near Kirstenbosch Gardens", {'types': ['house'], 'bedrooms': 4, 'suburbs': ['Newlands'], 'near': {'Kirstenbosch Gardens': 3.0}}),
+    ("apartment walking distance to Muizenberg Beach", {'types': ['apartment'], 'near': {'Muizenberg Beach': 1.0}}),
+    ("3 bedroom townhouse in Bellville near Tyger Valley Centre", {'types': ['townhouse'], 'bedrooms': 3, 'suburbs': ['Bellville'], 'near': {'Tyger Valley Centre': 3.0}}),
+    ("apartment in Green Point with a balcony", {'types': ['apartment'], 'suburbs': ['Green Point'], 'features': ['Balcony']}),
+    ("house over 10 million in Constantia", {'types': ['house', 'villa'], 'suburbs': ['Constantia'], 'min_price': 10_000_000}),
+    ("2 bedroom flat near Groote Schuur Hospital", {'types': ['apartment'], 'bedrooms': 2, 'near': {'Groote Schuur Hospital': 2.0}}),
+    ("apartment close to Cape Town Station", {'types': ['apartment'], 'near': {'Cape Town Station': 1.0}}),
+    ("house with solar panels and fibre in Claremont", {'types': ['house'], 'suburbs': ['Claremont'], 'features': ['Solar Panels', 'Fibre']}),
+    ("cheap 1 bedroom apartment in Observatory", {'types': ['apartment'], 'bedrooms': 1, 'suburbs': ['Observatory'], 'max_price': 2_000_000}),
+    ("5 bedroom house with a pool", {'types': ['house', 'villa'], 'bedrooms': 5, 'features': ['Pool']}),
+]
+
+
+def make_row(rng: random.Random, index: int) -> Dict[str, Any]:
+    """One listing in the shape of a Supabase properties row"""
+    suburb = rng.choice(list(SUBURBS))
+    profile = SUBURBS[suburb]
+    property_type = rng.choices(list(profile['types']), weights=list(profile['types'].values()))[0]
+    bedrooms = rng.choice(BEDROOMS_BY_TYPE[property_type])
+    low, high = profile['price']
+    price = int(round(rng.uniform(low, high) * (0.7 + 0.15 * bedrooms), 2) * 1_000_000 // 10_000 * 10_000)
+    features = sorted(rng.sample(FEATURES, k=rng.randint(2, 6)))
+    if suburb in ('Sea Point', 'Camps Bay', 'Green Point', 'Muizenberg') and rng.random() < 0.6 and 'Sea View' not in features:
+        features.append('Sea View')
+
+    points_of_interest: Dict[str, List[Dict[str, str]]] = {}
+    for name, base_distance in profile['pois'].items():
+        distance = round(base_distance * rng.uniform(0.5, 1.6), 2)
+        category = POI_CATEGORIES.get(name, 'leisure')
+        points_of_interest.setdefault(category, []).append({"name": name, "distance": f"{distance}km"})
+
+    listing_number = 110000 + index
+    type_label = property_type.title()
+    return {
+        "listing_number": listing_number,
+        "title": f"{bedrooms} Bedroom {type_label} for sale in {suburb}",
+        "description": (
+            f"{rng.choice(['Spacious', 'Light-filled', 'Renovated', 'Charming', 'Secure'])} "
+            f"{bedrooms} bedroom {property_type} in {suburb}. "
+            f"Offers {', '.join(f.lower() for f in features[:3])} and easy access to local amenities."
+        ),
+        "price": price,
+        "property_type": property_type,
+        "bedrooms": str(bedrooms),
+        "bathrooms": max(1, bedrooms - rng.choice([0, 1])),
+        "floor_size": f"{rng.randint(35, 90) + bedrooms * rng.randint(20, 45)}m²",
+        "suburb": suburb,
+        "city": "Cape Town",
+        "province": "Western Cape",
+        "street_address": f"{rng.randint(1, 180)} {rng.choice(['Main', 'Kloof', 'Beach', 'Station', 'Church'])} Road",
+        "transaction_type": "for-sale",
+        "listing_date": f"2025-{rng.randint(1, 9):02d}-{rng.randint(1, 28):02d}",
+        "features": features,
+        "images": [f"https://images.example/{listing_number}/{n}.jpg" for n in range(3)],
+        "garden": 'Garden' in features,
+        "pools": 'Pool' in features,
+        "security": 'Security' in features,
+        "pets_allowed": 'Pet Friendly' in features,
+        "points_of_interest": points_of_interest
+    }
+
+
+def grade(row: Dict[str, Any], criteria: Dict[str, Any]) -> int:
+    """0-3 relevance grade from the share of criteria the listing meets"""
+    checks = []
+    if 'types' in criteria:
+        checks.append(row['property_type'] in criteria['types'])
+    if 'bedrooms' in criteria:
+        checks.append(int(row['bedrooms']) == criteria['bedrooms'])
+    if 'suburbs' in criteria:
+        checks.append(row['suburb'] in criteria['suburbs'])
+    if 'max_price' in criteria:
+        checks.append(row['price'] <= criteria['max_price'])
+    if 'min_price' in criteria:
+        checks.append(row['price'] >= criteria['min_price'])
+    for feature in criteria.get('features', []):
+        checks.append(feature in row['features'])
+    poi_distances = {
+        poi['name']: float(poi['distance'].rstrip('km'))
+        for pois in row['points_of_interest'].values() for poi in pois
+    }
+    for name, max_km in criteria.get('near', {}).items():
+        checks.append(poi_distances.get(name, float('inf')) <= max_km)
+
+    share = sum(checks) / len(checks)
+    if share == 1.0:
+        return 3
+    if share >= 0.66:
+        return 2
+    if share >= 0.5:
+        return 1
+    return 0
+
+
+def main():
+    rng = random.Random(SEED)
+    rows = [make_row(rng, index) for index in range(CORPUS_SIZE)]
+
+    # Embed exactly what ingest would embed: the converted listing's search text
+    converter = SupabasePropertyService.__new__(SupabasePropertyService)
+    text_builder = VectorService.__new__(VectorService)
+    embeddings = np.stack([
+        hash_embed(text_builder.create_property_text(converter._convert_supabase_to_pydantic(row)))
+        for row in rows
+    ]).astype(np.float16)
+
+    queries = []
+    for query, criteria in GOLDEN_QUERIES:
+        relevance = {str(row['listing_number']): grade(row, criteria) for row in rows}
+        queries.append({
+            "query": query,
+            "criteria": criteria,
+            "relevance": {listing: score for listing, score in relevance.items() if score > 0}
+        })
+
+    FIXTURES_DIR.mkdir(exist_ok=True)
+    (FIXTURES_DIR / "corpus.json").write_text(json.dumps(rows, indent=1, ensure_ascii=False))
+    (FIXTURES_DIR / "queries.json").write_text(json.dumps(queries, indent=1))
+    np.savez_compressed(
+        FIXTURES_DIR / "embeddings.npz",
+        ids=np.array([str(row['listing_number']) for row in rows]),
+        embeddings=embeddings
+    )
+
+    graded = [sum(1 for g in q['relevance'].values() if g >= 2) for q in queries]
+    print(f"Wrote {len(rows)} listings, {len(queries)} queries "
+          f"(relevant per query: min {min(graded)}, max {max(graded)}) to {FIXTURES_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Deterministic local stand-ins for OpenAI, Pinecone and Supabase
+Each fake mirrors the slice of the client API the services call, with
+configurable injected latency so pipeline timings stay realistic offline
+"""
+
+import asyncio
+import json
+import re
+import time
+import zlib
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+EMBEDDING_DIM = 256
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9&]+")
+_PROPERTY_BLOCK_PATTERN = re.compile(r"^Property (\d+): (.*?)(?=^Property \d+:|\Z)", re.M | re.S)
+_QUERY_PATTERN = re.compile(r'USER QUERY ANALYSIS: "(.*?)"')
+_EXPLAIN_PATTERN = re.compile(r"the (\d+) highest-scoring ones also get a \"why\"")
+_STOPWORDS = {'a', 'an', 'the', 'in', 'on', 'to', 'of', 'with', 'and', 'for', 'near', 'close', 'under', 'over'}
+
+
+@dataclass
+class LatencyProfile:
+    """Injected latency per external call, in milliseconds"""
+    embed_ms: float = 0.0
+    vector_ms: float = 0.0
+    db_ms: float = 0.0
+    llm_ms: float = 0.0
+
+
+LATENCY_PROFILES = {
+    'none': LatencyProfile(),
+    'fast': LatencyProfile(embed_ms=5, vector_ms=5, db_ms=5, llm_ms=50),
+    'production': LatencyProfile(embed_ms=120, vector_ms=60, db_ms=80, llm_ms=1500)
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def hash_embed(text: str) -> np.ndarray:
+    """Signed feature-hashing embedding over unigrams and bigrams, L2-normalized"""
+    tokens = tokenize(text)
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+        digest = zlib.crc32(feature.encode())
+        vector[digest % EMBEDDING_DIM] += 1.0 if (digest >> 16) & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class FakeEmbeddings:
+    """Stands in for langchain OpenAIEmbeddings"""
+
+    def __init__(self, latency: LatencyProfile):
+        self.latency = latency
+        self.calls = 0
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        time.sleep(self.latency.embed_ms / 1000)
+        return hash_embed(text).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        time.sleep(self.latency.embed_ms / 1000)
+        return [hash_embed(text).tolist() for text in texts]
+
+
+class FakePineconeIndex:
+    """Stands in for a Pinecone Index: exact cosine search over the frozen embeddings"""
+
+    def __init__(self, ids: List[str], embeddings: np.ndarray, metadata: Dict[str, Dict[str, Any]], latency: LatencyProfile):
+        self.ids = ids
+        self.embeddings = embeddings.astype(np.float32)
+        self.metadata = metadata
+        self.latency = latency
+
+    def _matches_filter(self, metadata: Dict[str, Any], filter_dict: Optional[Dict[str, Any]]) -> bool:
+        for field_name, condition in (filter_dict or {}).items():
+            value = metadata.get(field_name)
+            for operator, expected in condition.items():
+                if operator == '$eq' and value != expected:
+                    return False
+                if operator == '$in' and value not in expected:
+                    return False
+                if operator == '$gte' and (value is None or value < expected):
+                    return False
+                if operator == '$lte' and (value is None or value > expected):
+                    return False
+        return True
+
+    def query(self, vector, top_k: int = 10, include_metadata: bool = True, filter=None, **kwargs):
+        time.sleep(self.latency.vector_ms / 1000)
+        scores = self.embeddings @ np.asarray(vector, dtype=np.float32)
+        matches = []
+        for index in np.argsort(-scores, kind='stable'):
+            listing_id = self.ids[index]
+            if not self._matches_filter(self.metadata[listing_id], filter):
+                continue
+            matches.append(SimpleNamespace(
+                id=listing_id,
+                score=float(scores[index]),
+                metadata=self.metadata[listing_id] if include_metadata else {}
+            ))
+            if len(matches) == top_k:
+                break
+        return SimpleNamespace(matches=matches)
+
+    def fetch(self, ids: List[str], **kwargs):
+        time.sleep(self.latency.vector_ms / 1000)
+        positions = {listing_id: index for index, listing_id in enumerate(self.ids)}
+        vectors = {
+            listing_id: SimpleNamespace(id=listing_id, values=self.embeddings[positions[listing_id]].tolist(),
+                                        metadata=self.metadata[listing_id])
+            for listing_id in ids if listing_id in positions
+        }
+        return SimpleNamespace(vectors=vectors)
+
+    def describe_index_stats(self):
+        return {'total_vector_count': len(self.ids), 'dimension': EMBEDDING_DIM}
+
+
+class _FakeQuery:
+    """Chainable subset of the supabase-py query builder"""
+
+    def __init__(self, rows: List[Dict[str, Any]], latency: LatencyProfile, count: Optional[str] = None):
+        self._rows = rows
+        self._latency = latency
+        self._count = count
+        self._start, self._end = 0, None
+
+    def _where(self, predicate) -> "_FakeQuery":
+        self._rows = [row for row in self._rows if predicate(row)]
+        return self
+
+    def eq(self, column: str, value):
+        return self._where(lambda row: str(row.get(column)) == str(value))
+
+    def in_(self, column: str, values):
+        wanted = {str(value) for value in values}
+        return self._where(lambda row: str(row.get(column)) in wanted)
+
+    def gte(self, column: str, value):
+        return self._where(lambda row: row.get(column) is not None and float(row[column]) >= float(value))
+
+    def lte(self, column: str, value):
+        return self._where(lambda row: row.get(column) is not None and float(row[column]) <= float(value))
+
+    def ilike(self, column: str, pattern: str):
+        needle = pattern.strip('%').lower()
+        return self._where(lambda row: needle in str(row.get(column) or '').lower())
+
+    def range(self, start: int, end: int):
+        self._start, self._end = start, end + 1
+        return self
+
+    def limit(self, count: int):
+        self._end = self._start + count
+        return self
+
+    def execute(self):
+        time.sleep(self._latency.db_ms / 1000)
+        rows = self._rows[self._start:self._end]
+        return SimpleNamespace(data=[dict(row) for row in rows], count=len(self._rows) if self._count else None)
+
+
+class _FakeTable:
+    def __init__(self, rows: List[Dict[str, Any]], latency: LatencyProfile):
+        self._rows = rows
+        self._latency = latency
+
+    def select(self, columns: str = "*", count: Optional[str] = None):
+        return _FakeQuery(list(self._rows), self._latency, count)
+
+
+class FakeSupabase:
+    """Stands in for the supabase Client over the frozen listing rows"""
+
+    def __init__(self, rows: List[Dict[str, Any]], latency: LatencyProfile):
+        self._rows = rows
+        self._latency = latency
+
+    def table(self, name: str) -> _FakeTable:
+        return _FakeTable(self._rows, self._latency)
+
+
+class FakeChatCompletions:
+    """Scores each property block in a rerank prompt by query-term overlap"""
+
+    def __init__(self, latency: LatencyProfile):
+        self.latency = latency
+        self.calls = 0
+        self.total_tokens = 0
+
+    async def create(self, model: str, messages: List[Dict[str, str]], **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency.llm_ms / 1000)
+
+        prompt = messages[-1]['content']
+        query_match = _QUERY_PATTERN.search(prompt)
+        query_terms = {t for t in tokenize(query_match.group(1) if query_match else '') if t not in _STOPWORDS}
+
+        ranking = []
+        for property_id, block in _PROPERTY_BLOCK_PATTERN.findall(prompt):
+            block_terms = set(tokenize(block.split('🧠')[0]))
+            overlap = len(query_terms & block_terms) / len(query_terms) if query_terms else 0.0
+            jitter = zlib.crc32(block.encode()) % 7
+            ranking.append({"id": int(property_id), "score": round(18 + overlap * 74 + jitter)})
+
+        # RERANK_EXPLANATIONS_ENABLED - a short "why" for the top few, as the prompt asks
+        explain_match = _EXPLAIN_PATTERN.search(prompt)
+        if explain_match:
+            for item in sorted(ranking, key=lambda item: -item['score'])[:int(explain_match.group(1))]:
+                item['why'] = {
+                    "positive_points": [{"point": "Matches the search", "details": f"Listing scored {item['score']}"}],
+                    "negative_points": [],
+                    "overall_summary": f"Property {item['id']} is a good match for the search."
+                }
+
+        content = json.dumps(ranking)
+        usage = SimpleNamespace(
+            prompt_tokens=len(prompt) // 4,
+            completion_tokens=len(content) // 4,
+            total_tokens=len(prompt) // 4 + len(content) // 4
+        )
+        self.total_tokens += usage.total_tokens
+        return SimpleNamespace(
+            usage=usage,
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+        )
+
+
+class FakeAsyncOpenAI:
+    """Stands in for AsyncOpenAI as used by AIRerankService"""
+
+    def __init__(self, latency: LatencyProfile):
+        self.chat = SimpleNamespace(completions=FakeChatCompletions(latency))
@@ -0,0 +1,151 @@
+"""
+Closed-loop load generator for the PropMatch API
+
+Drives /api/v1/search and /api/v1/explanations/stream at fixed concurrency
+levels and reports throughput, p50/p95/p99 latency (and time to first byte
+for streams) plus errors by status. Point the API at the stand-in servers
+(benchmarks.stub_servers) and disable per-IP rate limiting first.
+
+Usage (from Backend/):
+    python -m benchmarks.load_generator --target http://127.0.0.1:8000 --concurrency 1,8,32 --duration 30
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.relevance import percentile
+from benchmarks.run_search_benchmark import current_commit
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+RESULTS_DIR = Path(__file__).parent / "results"
+SCENARIOS = ['search', 'stream']
+USER_AGENT = "propmatch-loadgen/1.0"
+
+
+@dataclass
+class LevelStats:
+    latencies_ms: List[float] = field(default_factory=list)
+    first_byte_ms: List[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        completed = sum(count for status, count in self.statuses.items() if status == 200)
+        result = {
+            'requests': sum(self.statuses.values()),
+            'throughput_rps': round(completed / elapsed, 2) if elapsed else 0.0,
+            'p50_ms': round(percentile(self.latencies_ms, 50), 1),
+            'p95_ms': round(percentile(self.latencies_ms, 95), 1),
+            'p99_ms': round(percentile(self.latencies_ms, 99), 1),
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items(), key=str)}
+        }
+        if self.first_byte_ms:
+            result['ttfb_p50_ms'] = round(percentile(self.first_byte_ms, 50), 1)
+            result['ttfb_p99_ms'] = round(percentile(self.first_byte_ms, 99), 1)
+        return result
+
+
+async def search_request(client: httpx.AsyncClient, query: str, listing_number: str, stats: LevelStats):
+    start = time.perf_counter()
+    response = await client.post("/api/v1/search/", json={"query": query, "page": 1, "page_size": 20})
+    stats.latencies_ms.append((time.perf_counter() - start) * 1000)
+    stats.statuses[response.status_code] += 1
+
+
+async def stream_request(client: httpx.AsyncClient, query: str, listing_number: str, stats: LevelStats):
+    start = time.perf_counter()
+    first_byte: Optional[float] = None
+    async with client.stream(
+        "POST", f"/api/v1/explanations/stream/{listing_number}", json={"search_query": query}
+    ) as response:
+        async for _ in response.aiter_bytes():
+            if first_byte is None:
+                first_byte = time.perf_counter()
+    stats.latencies_ms.append((time.perf_counter() - start) * 1000)
+    if first_byte is not None and response.status_code == 200:
+        stats.first_byte_ms.append((first_byte - start) * 1000)
+    stats.statuses[response.status_code] += 1
+
+
+async def run_level(target: str, scenario: str, concurrency: int, duration: float, workload) -> Dict[str, Any]:
+    """Keep `concurrency` requests in flight for `duration` seconds"""
+    send = search_request if scenario == 'search' else stream_request
+    stats = LevelStats()
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=target, timeout=60.0, limits=limits,
+                                 headers={"User-Agent": USER_AGENT}) as client:
+        async def worker():
+            while time.perf_counter() < deadline:
+                query, listing_number = next(workload)
+                try:
+                    await send(client, query, listing_number, stats)
+                except httpx.HTTPError as e:
+                    stats.statuses[type(e).__name__] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {'concurrency': concurrency, **stats.summary(elapsed)}
+
+
+def build_workload():
+    """Cycle golden queries, pairing each with one of its relevant listings for explanations"""
+    queries = json.loads((FIXTURES_DIR / "queries.json").read_text())
+    pairs = []
+    for golden in queries:
+        relevant = sorted(golden['relevance'], key=golden['relevance'].get, reverse=True)
+        pairs.append((golden['query'], relevant[0] if relevant else "0"))
+    return itertools.cycle(pairs)
+
+
+async def main_async(args):
+    results = {
+        'commit': current_commit(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'target': args.target,
+        'duration_seconds': args.duration,
+        'scenarios': {}
+    }
+    workload = build_workload()
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    for scenario in args.scenarios.split(','):
+        results['scenarios'][scenario] = []
+        for concurrency in levels:
+            level = await run_level(args.target, scenario, concurrency, args.duration, workload)
+            results['scenarios'][scenario].append(level)
+            ttfb = f" | ttfb p50 {level['ttfb_p50_ms']}ms" if 'ttfb_p50_ms' in level else ""
+            print(f"{scenario:>7} c={concurrency:<3} | {level['throughput_rps']:>7} req/s | "
+                  f"p50 {level['p50_ms']}ms p95 {level['p95_ms']}ms p99 {level['p99_ms']}ms{ttfb} | "
+                  f"{level['statuses']}")
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"load-{results['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=1))
+    print(f"Results written to {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fixed-concurrency load generator for the PropMatch API")
+    parser.add_argument('--target', default="http://127.0.0.1:8000")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help="Comma-separated subset of " + ", ".join(SCENARIOS))
+    parser.add_argument('--concurrency', default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds per concurrency level")
+    parser.add_argument('--output', help="Results JSON path (default benchmarks/results/load-<commit>.json)")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Ranking quality and latency statistics for the search benchmark
+"""
+
+import math
+from typing import Dict, List, Sequence
+
+RELEVANT_GRADE = 2  # Grades at or above this count as relevant for recall
+
+
+def ndcg_at_k(ranked_ids: Sequence[str], relevance: Dict[str, int], k: int = 10) -> float:
+    """Normalized discounted cumulative gain with exponential gain (2^grade - 1)"""
+    dcg = sum(
+        (2 ** relevance.get(listing_id, 0) - 1) / math.log2(position + 2)
+        for position, listing_id in enumerate(ranked_ids[:k])
+    )
+    ideal = sorted(relevance.values(), reverse=True)[:k]
+    idcg = sum((2 ** grade - 1) / math.log2(position + 2) for position, grade in enumerate(ideal))
+    return dcg / idcg if idcg else 0.0
+
+
+def recall_at_k(ranked_ids: Sequence[str], relevance: Dict[str, int], k: int) -> float:
+    """Share of relevant listings (grade >= RELEVANT_GRADE) retrieved in the top k"""
+    relevant = {listing_id for listing_id, grade in relevance.items() if grade >= RELEVANT_GRADE}
+    if not relevant:
+        return 0.0
+    return len(relevant.intersection(ranked_ids[:k])) / len(relevant)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile (numpy's default method)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower, upper = math.floor(rank), math.ceil(rank)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
@@ -0,0 +1,247 @@
+"""
+Offline relevance-and-latency benchmark for every search pipeline
+
+Runs EnhancedSearchService, BM25HybridService, AIRerankService and the
+latency-budget SearchOrchestrator against the frozen fixture corpus with
+deterministic local stand-ins for OpenAI, Pinecone and Supabase, and reports
+nDCG@10, recall@20, p50/p95/p99 latency and LLM tokens per query. Results are
+written as JSON keyed by commit so runs can be compared between commits.
+
+Usage (from Backend/):
+    python -m benchmarks.run_search_benchmark
+    python -m benchmarks.run_search_benchmark --latency production --repeats 5
+    python -m benchmarks.run_search_benchmark --compare benchmarks/results/<commit>.json
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import subprocess
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.core.search_cache import search_cache
+from app.models.property import PropertySearchRequest
+from app.services.ai_rerank_service import AIRerankService
+from app.services.bm25_hybrid_service import BM25HybridService
+from app.services.enhanced_search_service import EnhancedSearchService
+from app.services.poi_index import PoiIndex, poi_gazetteer
+from app.services.search_orchestrator import SearchOrchestrator
+from app.services.supabase_property_service import SupabasePropertyService
+from app.services.vector_service import VectorService
+from benchmarks.fakes import (
+    LATENCY_PROFILES, FakeAsyncOpenAI, FakeEmbeddings, FakePineconeIndex, FakeSupabase, LatencyProfile
+)
+from benchmarks.relevance import ndcg_at_k, percentile, recall_at_k
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+RESULTS_DIR = Path(__file__).parent / "results"
+PIPELINES = ['enhanced', 'hybrid', 'ai_rerank', 'adaptive']
+PAGE_SIZE = 20
+NDCG_K = 10
+METRICS = ['ndcg@10', 'recall@20', 'p50_ms', 'p95_ms', 'p99_ms', 'tokens_per_query']
+
+
+class OfflineEnvironment:
+    """Fixture corpus plus the fake clients, wired into real service instances"""
+
+    def __init__(self, latency: LatencyProfile):
+        self.latency = latency
+        self.rows = json.loads((FIXTURES_DIR / "corpus.json").read_text())
+        self.queries = json.loads((FIXTURES_DIR / "queries.json").read_text())
+        frozen = np.load(FIXTURES_DIR / "embeddings.npz")
+        ids = [str(listing_id) for listing_id in frozen['ids']]
+
+        converter = SupabasePropertyService.__new__(SupabasePropertyService)
+        properties = [converter._convert_supabase_to_pydantic(row) for row in self.rows]
+        metadata_builder = VectorService.__new__(VectorService)
+        metadata = {prop.listing_number: metadata_builder.create_property_metadata(prop) for prop in properties}
+
+        self.supabase = FakeSupabase(self.rows, latency)
+        self.embeddings = FakeEmbeddings(latency)
+        self.index = FakePineconeIndex(ids, frozen['embeddings'], metadata, latency)
+        self.openai = FakeAsyncOpenAI(latency)
+        self.deadline_ms = None  # Adaptive pipeline budget - None uses SEARCH_DEADLINE_MS
+
+        # As the startup load of the built artifact would leave it in production
+        poi_gazetteer.index = PoiIndex.from_properties(properties)
+        # Every timed run measures the full pipeline, never a cached page
+        search_cache.redis_client = None
+
+        self.fixture_digest = hashlib.sha256(
+            (FIXTURES_DIR / "corpus.json").read_bytes() + (FIXTURES_DIR / "queries.json").read_bytes()
+        ).hexdigest()[:16]
+
+    def wire_property_service(self, service: SupabasePropertyService) -> SupabasePropertyService:
+        service.supabase = self.supabase
+        return service
+
+    def wire_vector_service(self, service: VectorService) -> VectorService:
+        service.embeddings = self.embeddings
+        service.index = self.index
+        service.initialized = True
+        return service
+
+    def wire_rerank_service(self, service: AIRerankService) -> AIRerankService:
+        self.wire_property_service(service.property_service)
+        self.wire_vector_service(service.vector_service)
+        service.openai_client = self.openai
+        return service
+
+    def build_pipelines(self) -> Dict[str, Any]:
+        # Service constructors log missing credentials - expected offline
+        logging.disable(logging.CRITICAL)
+        try:
+            enhanced = EnhancedSearchService()
+            self.wire_property_service(enhanced.property_service)
+            self.wire_vector_service(enhanced.vector_service)
+
+            hybrid = BM25HybridService()
+            self.wire_property_service(hybrid.property_service)
+            self.wire_vector_service(hybrid.vector_service)
+            self.wire_rerank_service(hybrid.ai_rerank_service)
+
+            ai_rerank = self.wire_rerank_service(AIRerankService())
+            orchestrator = SearchOrchestrator(hybrid)
+        finally:
+            logging.disable(logging.NOTSET)
+
+        async def run_enhanced(request):
+            return (await enhanced.search_properties(request)).properties
+
+        async def run_hybrid(request):
+            properties, _ = await hybrid.hybrid_search_and_rerank(request)
+            return properties
+
+        async def run_ai_rerank(request):
+            properties, _ = await ai_rerank.search_and_rerank(request)
+            return properties
+
+        async def run_adaptive(request):
+            return (await orchestrator.search(request, deadline_ms=self.deadline_ms)).properties
+
+        return {'enhanced': run_enhanced, 'hybrid': run_hybrid, 'ai_rerank': run_ai_rerank, 'adaptive': run_adaptive}
+
+
+async def benchmark_pipeline(env: OfflineEnvironment, run, repeats: int) -> Dict[str, Any]:
+    """Run every golden query `repeats` times through one pipeline"""
+    latencies: List[float] = []
+    ndcgs, recalls, per_query = [], [], {}
+    tokens_before = env.openai.chat.completions.total_tokens
+
+    for golden in env.queries:
+        request = PropertySearchRequest(query=golden['query'], page=1, page_size=PAGE_SIZE)
+        ranked_ids: List[str] = []
+        for repeat in range(repeats):
+            await search_cache.drain()
+            search_cache.clear_local()
+            start = time.perf_counter()
+            properties = await run(request)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if repeat == 0:
+                ranked_ids = [str(prop.listing_number) for prop in properties]
+
+        relevance = golden['relevance']
+        ndcg = ndcg_at_k(ranked_ids, relevance, NDCG_K)
+        recall = recall_at_k(ranked_ids, relevance, PAGE_SIZE)
+        ndcgs.append(ndcg)
+        recalls.append(recall)
+        per_query[golden['query']] = {'ndcg@10': round(ndcg, 4), 'recall@20': round(recall, 4)}
+
+    runs = len(env.queries) * repeats
+    return {
+        'ndcg@10': round(float(np.mean(ndcgs)), 4),
+        'recall@20': round(float(np.mean(recalls)), 4),
+        'p50_ms': round(percentile(latencies, 50), 1),
+        'p95_ms': round(percentile(latencies, 95), 1),
+        'p99_ms': round(percentile(latencies, 99), 1),
+        'tokens_per_query': round((env.openai.chat.completions.total_tokens - tokens_before) / runs, 1),
+        'per_query': per_query
+    }
+
+
+def current_commit() -> str:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               capture_output=True, text=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def print_summary(results: Dict[str, Any], baseline: Dict[str, Any] = None):
+    print(f"commit {results['commit']} | latency {results['latency']} | repeats {results['repeats']}")
+    if baseline:
+        print(f"baseline {baseline['commit']}")
+        if baseline.get('fixture_digest') != results['fixture_digest']:
+            print("⚠️  fixtures differ from the baseline - results are not comparable")
+
+    print(f"{'pipeline':>10} | " + " | ".join(f"{metric:>16}" for metric in METRICS))
+    for name, summary in results['pipelines'].items():
+        cells = []
+        for metric in METRICS:
+            value = summary[metric]
+            previous = (baseline or {}).get('pipelines', {}).get(name, {}).get(metric)
+            cells.append(f"{value:>16}" if previous is None else f"{value:>9} ({value - previous:+.3g})".rjust(16))
+        print(f"{name:>10} | " + " | ".join(cells))
+
+
+async def main_async(args):
+    latency = LatencyProfile(**asdict(LATENCY_PROFILES[args.latency]))
+    for stage in ('embed_ms', 'vector_ms', 'db_ms', 'llm_ms'):
+        override = getattr(args, stage)
+        if override is not None:
+            setattr(latency, stage, override)
+
+    env = OfflineEnvironment(latency)
+    env.deadline_ms = args.deadline_ms
+    pipelines = env.build_pipelines()
+
+    results = {
+        'commit': current_commit(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'latency': args.latency,
+        'latency_ms': asdict(latency),
+        'repeats': args.repeats,
+        'fixture_digest': env.fixture_digest,
+        'pipelines': {}
+    }
+    for name in args.pipelines.split(','):
+        results['pipelines'][name] = await benchmark_pipeline(env, pipelines[name], args.repeats)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{results['commit']}-{args.latency}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=1))
+
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_summary(results, baseline)
+    print(f"Results written to {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline search relevance and latency benchmark")
+    parser.add_argument('--pipelines', default=','.join(PIPELINES), help="Comma-separated subset of " + ", ".join(PIPELINES))
+    parser.add_argument('--latency', default='fast', choices=sorted(LATENCY_PROFILES), help="Injected latency profile")
+    parser.add_argument('--embed-ms', type=float, help="Override embedding latency")
+    parser.add_argument('--vector-ms', type=float, help="Override vector query latency")
+    parser.add_argument('--db-ms', type=float, help="Override Supabase latency")
+    parser.add_argument('--llm-ms', type=float, help="Override LLM latency")
+    parser.add_argument('--deadline-ms', type=int, help="Latency budget for the adaptive pipeline")
+    parser.add_argument('--repeats', type=int, default=3, help="Runs per query for latency percentiles")
+    parser.add_argument('--output', help="Results JSON path (default benchmarks/results/<commit>-<latency>.json)")
+    parser.add_argument('--compare', help="Earlier results JSON to diff against")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
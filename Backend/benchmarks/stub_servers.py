@@ -0,0 +1,440 @@
+"""
+Local stand-in servers for Supabase (PostgREST), Pinecone and OpenAI
+
+Serves the frozen benchmark fixtures over the same HTTP APIs the real clients
+speak, with log-normal latency, token-bucket rate limits (429 + Retry-After)
+and streamed chat completions, so the full app can be load tested offline.
+
+Usage (from Backend/):
+    python -m benchmarks.stub_servers --profile production
+
+Then start the API against them (the command prints these):
+    SUPABASE_URL=http://127.0.0.1:8101 SUPABASE_ANON_KEY=stub.anon.key \\
+    PINECONE_HOST=http://127.0.0.1:8102 PINECONE_API_KEY=stub \\
+    OPENAI_BASE_URL=http://127.0.0.1:8103/v1 OPENAI_API_KEY=stub \\
+    RATE_LIMITING_ENABLED=false uvicorn app.main:app --port 8000
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import math
+import random
+import signal
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.services.supabase_property_service import SupabasePropertyService
+from app.services.vector_service import VectorService
+from benchmarks.fakes import EMBEDDING_DIM, LATENCY_PROFILES, FakeChatCompletions, FakePineconeIndex, hash_embed
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+Z_99 = 2.326  # Standard normal quantile for p99
+
+
+@dataclass
+class LatencyDistribution:
+    """Log-normal latency described by its median and p99 (milliseconds)"""
+    p50_ms: float
+    p99_ms: float
+
+    def sample(self) -> float:
+        if self.p50_ms <= 0:
+            return 0.0
+        sigma = math.log(max(self.p99_ms, self.p50_ms) / self.p50_ms) / Z_99
+        return random.lognormvariate(math.log(self.p50_ms), sigma) / 1000
+
+    async def wait(self):
+        delay = self.sample()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+@dataclass
+class ServiceProfile:
+    latency: LatencyDistribution
+    requests_per_second: float  # 0 disables rate limiting
+    burst: int = 20
+
+
+# Observed-shape defaults: hosted services have long right tails
+STUB_PROFILES: Dict[str, Dict[str, Any]] = {
+    'fast': {
+        'supabase': ServiceProfile(LatencyDistribution(5, 20), 0),
+        'pinecone': ServiceProfile(LatencyDistribution(5, 20), 0),
+        'embeddings': ServiceProfile(LatencyDistribution(10, 40), 0),
+        'chat': ServiceProfile(LatencyDistribution(50, 200), 0),
+        'token_ms': 1.0
+    },
+    'production': {
+        'supabase': ServiceProfile(LatencyDistribution(60, 400), 100),
+        'pinecone': ServiceProfile(LatencyDistribution(45, 250), 100),
+        'embeddings': ServiceProfile(LatencyDistribution(120, 900), 50),
+        'chat': ServiceProfile(LatencyDistribution(450, 3000), 10),
+        'token_ms': 12.0
+    }
+}
+
+
+class TokenBucket:
+    """Requests-per-second limiter; acquire() returns seconds until a token is free, 0 if granted"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def acquire(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+def _rate_limited(retry_after: float, body: Dict[str, Any]) -> JSONResponse:
+    return JSONResponse(body, status_code=429, headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+
+# ---------------------------------------------------------------------------
+# PostgREST (Supabase) stand-in
+# ---------------------------------------------------------------------------
+
+def _parse_filter(raw: str) -> Tuple[str, str]:
+    operator, _, value = raw.partition('.')
+    return operator, value
+
+
+def _row_matches(row: Dict[str, Any], column: str, operator: str, value: str) -> bool:
+    actual = row.get(column)
+    if operator == 'eq':
+        return str(actual) == value
+    if operator == 'neq':
+        return str(actual) != value
+    if operator == 'in':
+        return str(actual) in {item.strip('"') for item in value.strip('()').split(',')}
+    if operator in ('ilike', 'like'):
+        needle = value.replace('*', '%').strip('%')
+        haystack = str(actual or '')
+        return needle.lower() in haystack.lower() if operator == 'ilike' else needle in haystack
+    if actual is None:
+        return False
+    comparisons = {'gt': float.__gt__, 'gte': float.__ge__, 'lt': float.__lt__, 'lte': float.__le__}
+    if operator in comparisons:
+        return comparisons[operator](float(actual), float(value))
+    return True
+
+
+def create_postgrest_app(rows: List[Dict[str, Any]], profile: ServiceProfile) -> FastAPI:
+    app = FastAPI(title="PostgREST stand-in")
+    tables = {'properties': rows}
+    bucket = TokenBucket(profile.requests_per_second, profile.burst)
+    reserved = {'select', 'offset', 'limit', 'order'}
+
+    @app.get("/rest/v1/{table}")
+    async def select(table: str, request: Request):
+        retry_after = bucket.acquire()
+        if retry_after:
+            return _rate_limited(retry_after, {"message": "Too many requests", "code": "429"})
+        await profile.latency.wait()
+
+        matched = tables.get(table, [])
+        for column, raw in request.query_params.multi_items():
+            if column not in reserved:
+                operator, value = _parse_filter(raw)
+                matched = [row for row in matched if _row_matches(row, column, operator, value)]
+
+        order = request.query_params.get('order')
+        if order:
+            column, _, direction = order.partition('.')
+            matched = sorted(matched, key=lambda row: (row.get(column) is None, row.get(column)),
+                             reverse=direction.startswith('desc'))
+
+        total = len(matched)
+        offset = int(request.query_params.get('offset', 0))
+        limit = request.query_params.get('limit')
+        page = matched[offset:offset + int(limit)] if limit else matched[offset:]
+
+        columns = request.query_params.get('select', '*')
+        if columns != '*':
+            wanted = [column.strip() for column in columns.split(',')]
+            page = [{column: row.get(column) for column in wanted} for row in page]
+
+        end = offset + len(page) - 1
+        content_range = f"{offset}-{end}/{total}" if page else f"*/{total}"
+        return JSONResponse(page, headers={"Content-Range": content_range})
+
+    return app
+
+
+# ---------------------------------------------------------------------------
+# Pinecone data-plane stand-in
+# ---------------------------------------------------------------------------
+
+def create_pinecone_app(index: FakePineconeIndex, profile: ServiceProfile) -> FastAPI:
+    app = FastAPI(title="Pinecone stand-in")
+    bucket = TokenBucket(profile.requests_per_second, profile.burst)
+
+    def _vector_payload(listing_id: str, values: List[float], metadata: Dict[str, Any]) -> Dict[str, Any]:
+        return {"id": listing_id, "values": values, "metadata": metadata}
+
+    @app.post("/query")
+    async def query(request: Request):
+        retry_after = bucket.acquire()
+        if retry_after:
+            return _rate_limited(retry_after, {"code": 8, "message": "Request rate limit exceeded"})
+        await profile.latency.wait()
+
+        body = await request.json()
+        result = index.query(
+            body['vector'],
+            top_k=body.get('topK', 10),
+            include_metadata=body.get('includeMetadata', False),
+            filter=body.get('filter')
+        )
+        matches = [
+            {"id": match.id, "score": match.score, "values": [], "metadata": match.metadata or None}
+            for match in result.matches
+        ]
+        return {"matches": matches, "namespace": body.get('namespace', ''), "usage": {"readUnits": 5}}
+
+    @app.get("/vectors/fetch")
+    async def fetch(request: Request):
+        await profile.latency.wait()
+        result = index.fetch(request.query_params.getlist('ids'))
+        vectors = {
+            listing_id: _vector_payload(listing_id, vector.values, vector.metadata)
+            for listing_id, vector in result.vectors.items()
+        }
+        return {"vectors": vectors, "namespace": request.query_params.get('namespace', '')}
+
+    @app.post("/vectors/upsert")
+    async def upsert(request: Request):
+        await profile.latency.wait()
+        vectors = (await request.json()).get('vectors', [])
+        for vector in vectors:
+            values = np.asarray(vector['values'], dtype=np.float32)[None, :]
+            if vector['id'] in index.metadata:
+                index.embeddings[index.ids.index(vector['id'])] = values
+            else:
+                index.ids.append(vector['id'])
+                index.embeddings = np.vstack([index.embeddings, values])
+            index.metadata[vector['id']] = vector.get('metadata', {})
+        return {"upsertedCount": len(vectors)}
+
+    @app.post("/describe_index_stats")
+    async def describe_index_stats():
+        return {
+            "namespaces": {"": {"vectorCount": len(index.ids)}},
+            "dimension": EMBEDDING_DIM,
+            "indexFullness": 0.0,
+            "totalVectorCount": len(index.ids)
+        }
+
+    return app
+
+
+# ---------------------------------------------------------------------------
+# OpenAI-compatible stand-in (embeddings + chat, streaming and non-streaming)
+# ---------------------------------------------------------------------------
+
+_EXPLANATION_SENTENCES = [
+    "This property lines up well with what you asked for.",
+    "The location puts everyday amenities within easy reach.",
+    "Its layout and size suit the household you described.",
+    "The asking price sits comfortably inside your budget.",
+    "Nearby schools, shops and transport add to its appeal.",
+    "Natural light and a practical floor plan make it easy to live in.",
+    "It is worth viewing soon given demand in this area."
+]
+
+
+def _decode_embedding_input(item: Any) -> str:
+    """Embedding input is text, or token ids when the caller tokenized with tiktoken"""
+    if isinstance(item, str):
+        return item
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base").decode(item)
+    except Exception:
+        return " ".join(str(token) for token in item)
+
+
+def _explanation_text(prompt: str) -> str:
+    """Deterministic reply; structured JSON when the prompt asks for the explanation schema"""
+    seed = zlib.crc32(prompt.encode())
+    picks = list(dict.fromkeys(
+        _EXPLANATION_SENTENCES[(seed >> shift) % len(_EXPLANATION_SENTENCES)] for shift in (0, 5, 10, 15)
+    ))
+    if '"positive_points"' not in prompt:
+        return " ".join(picks)
+    return json.dumps({
+        "positive_points": [{"point": sentence.split(' ')[0] + " match", "details": sentence} for sentence in picks[:2]],
+        "negative_points": [{"point": "Worth checking", "details": picks[-1]}],
+        "overall_summary": " ".join(picks[:2])
+    }, indent=2)
+
+
+def create_openai_app(chat_profile: ServiceProfile, embeddings_profile: ServiceProfile, token_ms: float) -> FastAPI:
+    app = FastAPI(title="OpenAI stand-in")
+    chat_bucket = TokenBucket(chat_profile.requests_per_second, chat_profile.burst)
+    embeddings_bucket = TokenBucket(embeddings_profile.requests_per_second, embeddings_profile.burst)
+    reranker = FakeChatCompletions(LATENCY_PROFILES['none'])
+
+    def _error(retry_after: float) -> JSONResponse:
+        return _rate_limited(retry_after, {"error": {
+            "message": "Rate limit reached for requests", "type": "requests", "code": "rate_limit_exceeded"
+        }})
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        retry_after = embeddings_bucket.acquire()
+        if retry_after:
+            return _error(retry_after)
+        await embeddings_profile.latency.wait()
+
+        body = await request.json()
+        inputs = body['input']
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        data = []
+        for position, item in enumerate(inputs):
+            vector = hash_embed(_decode_embedding_input(item))
+            encoded = (base64.b64encode(vector.astype('<f4').tobytes()).decode()
+                       if body.get('encoding_format') == 'base64' else vector.tolist())
+            data.append({"object": "embedding", "index": position, "embedding": encoded})
+        tokens = sum(len(item) if not isinstance(item, str) else len(item) // 4 for item in inputs)
+        return {"object": "list", "data": data, "model": body.get('model'),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        retry_after = chat_bucket.acquire()
+        if retry_after:
+            return _error(retry_after)
+        body = await request.json()
+        model = body.get('model', 'gpt-4o-mini')
+        prompt = body['messages'][-1]['content']
+
+        if 'USER QUERY ANALYSIS' in prompt:
+            content = (await reranker.create(model=model, messages=body['messages'])).choices[0].message.content
+        else:
+            content = _explanation_text(prompt)
+
+        completion_id = f"chatcmpl-stub{zlib.crc32(prompt.encode()):08x}"
+        created = int(time.time())
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                 "total_tokens": len(prompt) // 4 + len(content) // 4}
+
+        if not body.get('stream'):
+            await chat_profile.latency.wait()
+            await asyncio.sleep(token_ms * usage['completion_tokens'] / 1000)
+            return {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage
+            }
+
+        async def stream():
+            def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+                payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                           "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+                return f"data: {json.dumps(payload)}\n\n"
+
+            # Time to first token, then a steady per-token cadence
+            await chat_profile.latency.wait()
+            yield chunk({"role": "assistant", "content": ""})
+            for word in content.split(' '):
+                await asyncio.sleep(token_ms / 1000)
+                yield chunk({"content": word + ' '})
+            yield chunk({}, "stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+class _StubServer(uvicorn.Server):
+    """Several servers share one loop, so signals are handled once for all of them in serve()"""
+
+    def install_signal_handlers(self):
+        pass
+
+
+def load_fixture_index() -> Tuple[List[Dict[str, Any]], FakePineconeIndex]:
+    rows = json.loads((FIXTURES_DIR / "corpus.json").read_text())
+    frozen = np.load(FIXTURES_DIR / "embeddings.npz")
+    converter = SupabasePropertyService.__new__(SupabasePropertyService)
+    metadata_builder = VectorService.__new__(VectorService)
+    metadata = {}
+    for row in rows:
+        prop = converter._convert_supabase_to_pydantic(row)
+        metadata[prop.listing_number] = metadata_builder.create_property_metadata(prop)
+    ids = [str(listing_id) for listing_id in frozen['ids']]
+    return rows, FakePineconeIndex(ids, frozen['embeddings'], metadata, LATENCY_PROFILES['none'])
+
+
+async def serve(args):
+    profile = STUB_PROFILES[args.profile]
+    if args.no_rate_limits:
+        for name in ('supabase', 'pinecone', 'embeddings', 'chat'):
+            profile[name].requests_per_second = 0
+
+    rows, index = load_fixture_index()
+    apps = [
+        (create_postgrest_app(rows, profile['supabase']), args.supabase_port),
+        (create_pinecone_app(index, profile['pinecone']), args.pinecone_port),
+        (create_openai_app(profile['chat'], profile['embeddings'], profile['token_ms']), args.openai_port)
+    ]
+    servers = [
+        _StubServer(uvicorn.Config(app, host=args.host, port=port, log_level="warning"))
+        for app, port in apps
+    ]
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, lambda: [setattr(server, 'should_exit', True) for server in servers])
+
+    print(f"🧪 Stand-in servers ({args.profile} profile) serving {len(rows)} fixture listings")
+    print(f"   SUPABASE_URL=http://{args.host}:{args.supabase_port} SUPABASE_ANON_KEY=stub.anon.key")
+    print(f"   PINECONE_HOST=http://{args.host}:{args.pinecone_port} PINECONE_API_KEY=stub")
+    print(f"   OPENAI_BASE_URL=http://{args.host}:{args.openai_port}/v1 OPENAI_API_KEY=stub")
+    print("   RATE_LIMITING_ENABLED=false")
+    await asyncio.gather(*(server.serve() for server in servers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Supabase/Pinecone/OpenAI stand-ins for load testing")
+    parser.add_argument('--profile', default='production', choices=sorted(STUB_PROFILES))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--supabase-port', type=int, default=8101)
+    parser.add_argument('--pinecone-port', type=int, default=8102)
+    parser.add_argument('--openai-port', type=int, default=8103)
+    parser.add_argument('--no-rate-limits', action='store_true', help="Never answer 429")
+    parser.add_argument('--seed', type=int, default=7, help="Seed for the latency samples")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    asyncio.run(serve(args))
+
+
+if __name__ == "__main__":
+    main()
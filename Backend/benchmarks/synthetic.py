@@ -0,0 +1,63 @@
+"""
+Synthetic listing generator for offline benchmarks
+Produces deterministic Property objects shaped like converted Supabase rows
+"""
+
+import random
+from typing import List
+
+from app.models.property import Property, Location, PointOfInterest, PropertyType, PropertyStatus
+
+SUBURBS = [
+    'Sea Point', 'Camps Bay', 'Rondebosch', 'Claremont', 'Newlands', 'Observatory',
+    'Cape Town City Centre', 'Foreshore', 'Gardens', 'Green Point', 'Durbanville', 'Bellville'
+]
+
+POI_NAMES = {
+    'Education': ['University of Cape Town', 'UCT Upper Campus', 'Rondebosch Boys High', 'Herzlia School'],
+    'Transport': ['Rondebosch Station', 'Claremont Station', 'MyCiti Civic Centre', 'Cape Town Station'],
+    'Shopping': ['V&A Waterfront', 'Cavendish Square', 'Canal Walk', 'Pick n Pay Sea Point'],
+    'Health': ['Groote Schuur Hospital', 'Red Cross Children\'s Hospital', 'Claremont Clinic'],
+    'Leisure': ['Sea Point Promenade', 'Green Point Park', 'Kirstenbosch Gardens']
+}
+
+FEATURES = ['Pool', 'Garden', 'Garage', 'Balcony', 'Sea View', 'Security', 'Parking', 'Pet Friendly', 'Fibre']
+
+
+def make_properties(count: int, seed: int = 7) -> List[Property]:
+    """Build count deterministic synthetic properties"""
+    rng = random.Random(seed)
+    property_types = list(PropertyType)
+    properties = []
+
+    for i in range(count):
+        listing_number = str(100000 + i)
+        pois = []
+        for category, names in POI_NAMES.items():
+            for name in rng.sample(names, k=rng.randint(1, len(names))):
+                distance = round(rng.uniform(0.2, 12.0), 2)
+                pois.append(PointOfInterest(
+                    name=name, category=category, distance=distance, distance_str=f"{distance}km"
+                ))
+
+        suburb = rng.choice(SUBURBS)
+        properties.append(Property(
+            id=listing_number,
+            title=f"Listing {listing_number}",
+            description="Spacious home with modern finishes and great views " * 10,
+            price=rng.randrange(800000, 15000000, 50000),
+            type=rng.choice(property_types),
+            bedrooms=rng.randint(1, 5),
+            bathrooms=rng.choice([1, 1.5, 2, 2.5, 3]),
+            area=rng.randint(40, 400),
+            location=Location(address=f"{i} Main Road", neighborhood=suburb, city="Cape Town"),
+            images=[f"https://images.example/{listing_number}/{n}.jpg" for n in range(12)],
+            features=rng.sample(FEATURES, k=rng.randint(2, 6)),
+            status=PropertyStatus.FOR_SALE,
+            listedDate="2025-06-01",
+            listing_number=listing_number,
+            suburb=suburb,
+            points_of_interest=pois
+        ))
+
+    return properties
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Backfill Precomputed POI Features
+Computes the per-listing POI feature table (nearest distance per category,
+landmark distances, walkability counts, prompt context) and stores it on
+each Supabase row so search and rerank never rescan points_of_interest.
+
+Requires the column once:
+    ALTER TABLE properties ADD COLUMN IF NOT EXISTS poi_features JSONB;
+
+Re-run after scraping new listings or refreshing POIs.
+"""
+
+import sys
+import asyncio
+import time
+from pathlib import Path
+
+# Add the app directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+import logging
+from app.services.supabase_property_service import SupabasePropertyService
+from app.services.poi_features import build_poi_features
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def backfill_poi_features(batch_size: int = 100) -> int:
+    """Recompute and store poi_features for every listing, returns rows updated"""
+
+    service = SupabasePropertyService()
+    properties = await service.get_all_properties_for_vectorization(batch_size=batch_size)
+    logger.info(f"📊 Computing POI features for {len(properties)} properties")
+
+    updated = 0
+    start_time = time.time()
+
+    for prop in properties:
+        # Always rebuild from the POIs - a stored table may predate a POI refresh
+        features = build_poi_features(prop.points_of_interest, prop.location.neighborhood)
+        try:
+            service.supabase.table('properties').update(
+                {'poi_features': features.model_dump()}
+            ).eq('listing_number', prop.listing_number).execute()
+            updated += 1
+        except Exception as e:
+            logger.error(f"❌ Failed to store POI features for {prop.listing_number}: {e}")
+
+        if updated and updated % batch_size == 0:
+            logger.info(f"   ✅ {updated}/{len(properties)} updated")
+
+    logger.info(f"🎉 Backfilled {updated} properties in {time.time() - start_time:.1f}s")
+    return updated
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_poi_features())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Build the POI Gazetteer
+Loads every listing from Supabase, indexes the named points of interest and
+their distances (app/services/poi_index.py) and writes the artifact the API
+loads at startup (POI_GAZETTEER_PATH). Until it exists the API serves searches
+without proximity boosts.
+
+Run nightly after the scrape and POI backfill jobs, then restart the API:
+    python scripts/build_poi_gazetteer.py
+"""
+
+import sys
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+# Add the app directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+import logging
+from app.core.config import settings
+from app.services.poi_index import PoiIndex
+from app.services.supabase_property_service import SupabasePropertyService
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def build_poi_gazetteer(output: str) -> bool:
+    """Index every listing's POIs and write the artifact; False when there was nothing to index"""
+    start_time = time.time()
+    properties = await SupabasePropertyService().get_all_properties_for_vectorization()
+    if not properties:
+        logger.error("❌ No listings loaded from Supabase - gazetteer not written")
+        return False
+
+    index = PoiIndex.from_properties(properties)
+    path = index.save(output)
+    logger.info(f"🎉 POI gazetteer: {len(index.poi_names)} POIs across {len(index.listing_rows)} listings "
+                f"written to {path} in {time.time() - start_time:.1f}s")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the corpus-wide POI gazetteer artifact")
+    parser.add_argument('--output', default=settings.POI_GAZETTEER_PATH, help="Gazetteer artifact path")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(build_poi_gazetteer(args.output)) else 1)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Index Cached Explanations by Listing
+Adds explanation entries written before the per-listing index sets existed to
+their listing's set, so invalidating a listing also removes them. New entries
+are indexed on write; run once after deploying, or let old entries expire.
+"""
+
+import sys
+import asyncio
+import time
+from pathlib import Path
+
+# Add the app directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+import logging
+from app.core.redis_cache import explanation_cache
+from app.core.redis_pool import close_redis
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def index_explanation_cache() -> int:
+    """Add every cached explanation to its listing's index set, returns entries indexed"""
+
+    if not explanation_cache.redis_available:
+        logger.error("❌ Redis is not configured - nothing to index")
+        return 0
+
+    start_time = time.time()
+    try:
+        indexed = await explanation_cache.rebuild_listing_index()
+    finally:
+        await close_redis()
+
+    logger.info(f"🎉 Indexed {indexed} cached explanations in {time.time() - start_time:.1f}s")
+    return indexed
+
+
+if __name__ == "__main__":
+    asyncio.run(index_explanation_cache())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Precompute Similar Listings
+Fetches every listing's stored embedding from Pinecone once, finds each
+listing's top-N nearest neighbours with a blocked cosine-similarity pass and
+stores them on the Supabase row, so /properties/{listing_number}/similar
+answers from a lookup table instead of a vector query. Nothing is re-embedded.
+
+Requires the column once:
+    ALTER TABLE properties ADD COLUMN IF NOT EXISTS similar_listings JSONB;
+
+Run nightly (e.g. cron `0 2 * * *`) after the scrape and vector upsert jobs.
+"""
+
+import sys
+import asyncio
+import argparse
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Add the app directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+import logging
+from app.services.supabase_property_service import SupabasePropertyService
+from app.services.vector_service import VectorService
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 512  # Rows of the similarity matrix held in memory at once
+
+
+def load_listing_numbers(service: SupabasePropertyService, page_size: int = 1000) -> List[str]:
+    """Every listing number in Supabase"""
+    listing_numbers = []
+    offset = 0
+    while True:
+        result = service.supabase.table('properties').select('listing_number') \
+            .range(offset, offset + page_size - 1).execute()
+        rows = result.data or []
+        listing_numbers.extend(str(row['listing_number']) for row in rows)
+        if len(rows) < page_size:
+            return listing_numbers
+        offset += page_size
+
+
+def nearest_neighbours(ids: List[str], vectors: np.ndarray, top_n: int) -> Dict[str, List[Tuple[str, float]]]:
+    """Top-N cosine neighbours per row, excluding the row itself"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.maximum(norms, 1e-12)
+    k = min(top_n, len(ids) - 1)
+    neighbours = {}
+    if k <= 0:
+        return neighbours
+
+    for start in range(0, len(ids), BLOCK_SIZE):
+        block = unit[start:start + BLOCK_SIZE] @ unit.T
+        rows = np.arange(block.shape[0])
+        block[rows, rows + start] = -np.inf
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        for row, candidates in enumerate(top):
+            order = candidates[np.argsort(-block[row, candidates])]
+            neighbours[ids[start + row]] = [(ids[column], float(block[row, column])) for column in order]
+    return neighbours
+
+
+async def precompute_similar_listings(top_n: int = 20) -> int:
+    """Recompute and store similar_listings for every listing, returns rows updated"""
+
+    service = SupabasePropertyService()
+    vector_service = VectorService()
+    if not service.supabase or not vector_service.initialized:
+        logger.error("❌ Supabase and Pinecone must both be configured")
+        return 0
+
+    start_time = time.time()
+    listing_numbers = load_listing_numbers(service)
+    stored = vector_service.fetch_listing_vectors(listing_numbers)
+    ids = [listing for listing in listing_numbers if listing in stored]
+    logger.info(f"📊 Fetched {len(ids)}/{len(listing_numbers)} stored vectors in {time.time() - start_time:.1f}s")
+
+    if len(ids) < 2:
+        logger.warning("Not enough vectors to compute neighbours")
+        return 0
+
+    vectors = np.asarray([stored[listing] for listing in ids], dtype=np.float32)
+    neighbours = nearest_neighbours(ids, vectors, top_n)
+    logger.info(f"🧭 Computed top-{top_n} neighbours for {len(neighbours)} listings")
+
+    updated = 0
+    for listing_number, similar in neighbours.items():
+        payload = [{'listing_number': neighbour, 'score': round(score, 4)} for neighbour, score in similar]
+        try:
+            service.supabase.table('properties').update(
+                {'similar_listings': payload}
+            ).eq('listing_number', int(listing_number)).execute()
+            updated += 1
+        except Exception as e:
+            logger.error(f"❌ Failed to store similar listings for {listing_number}: {e}")
+
+        if updated and updated % 100 == 0:
+            logger.info(f"   ✅ {updated}/{len(neighbours)} updated")
+
+    logger.info(f"🎉 Stored similar listings for {updated} properties in {time.time() - start_time:.1f}s")
+    return updated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute nearest-neighbour listings")
+    parser.add_argument('--top-n', type=int, default=20, help="Neighbours stored per listing")
+    args = parser.parse_args()
+    asyncio.run(precompute_similar_listings(top_n=args.top_n))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Train a Cache Compression Dictionary
+Samples live entries of the explanation or search cache from Redis (any
+format - legacy JSON entries included), trains a zstd dictionary on their
+msgpack encoding and makes it the cache's active dictionary under
+CACHE_DICTIONARY_DIR. The previous dictionary is kept beside it, so entries
+compressed with it still decode until they expire.
+
+    python scripts/train_cache_dictionary.py --cache explanation
+
+Restart the API afterwards to start compressing with the new dictionary.
+Retrain when the explanation prompt or the search result shape changes.
+"""
+
+import sys
+import argparse
+import asyncio
+import random
+import time
+from pathlib import Path
+from typing import Any, List
+
+# Add the app directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+import logging
+import msgpack
+from app.core.cache_codec import CacheCodec, CacheCodecError, get_cache_codec, save_dictionary, train_dictionary
+from app.core.config import settings
+from app.core.redis_pool import close_redis, get_async_redis
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIXES = {
+    "explanation": "propmatch:explanation:",
+    "search": "propmatch:search:",
+}
+
+
+async def sample_cache_values(cache: str, max_samples: int) -> List[Any]:
+    """Decoded values of up to max_samples cache entries, walked with SCAN"""
+    client = get_async_redis()
+    codec = get_cache_codec(cache)
+    keys = []
+    async for key in client.scan_iter(match=f"{CACHE_PREFIXES[cache]}*", count=500):
+        keys.append(key)
+        if len(keys) >= max_samples:
+            break
+
+    samples = []
+    for start in range(0, len(keys), 500):
+        # Explanation listing indexes are sets - MGET returns None for them
+        for raw in await client.mget(keys[start:start + 500]):
+            if not raw:
+                continue
+            try:
+                samples.append(codec.decode(raw))
+            except CacheCodecError:
+                continue
+    return samples
+
+
+async def train_cache_dictionary(cache: str, max_samples: int, size: int, holdout: float) -> int:
+    """Train, evaluate on held-out entries and save; returns the new dictionary id (0 if not trained)"""
+    start_time = time.time()
+    try:
+        samples = await sample_cache_values(cache, max_samples)
+    finally:
+        await close_redis()
+    logger.info(f"📊 Sampled {len(samples)} {cache} cache entries")
+    if len(samples) < 100:
+        logger.error("❌ Not enough cache entries to train a useful dictionary (need at least 100)")
+        return 0
+
+    random.Random(7).shuffle(samples)
+    held_out = samples[:max(1, int(len(samples) * holdout))]
+    dictionary = train_dictionary(samples[len(held_out):], size)
+
+    plain = CacheCodec(cache, "msgpack-zstd", level=settings.CACHE_ZSTD_LEVEL)
+    trained = CacheCodec(cache, "msgpack-zstd", {dictionary.dict_id(): dictionary}, dictionary.dict_id(),
+                         settings.CACHE_ZSTD_LEVEL)
+    msgpack_bytes = sum(len(msgpack.packb(value, use_bin_type=True, default=str)) for value in held_out)
+    plain_bytes = sum(len(plain.encode(value)) for value in held_out)
+    trained_bytes = sum(len(trained.encode(value)) for value in held_out)
+    logger.info(f"   Held-out {len(held_out)} entries: msgpack {msgpack_bytes / len(held_out):.0f} B, "
+                f"zstd {plain_bytes / len(held_out):.0f} B, zstd+dictionary {trained_bytes / len(held_out):.0f} B")
+
+    path = save_dictionary(cache, dictionary)
+    logger.info(f"🎉 Dictionary {dictionary.dict_id()} ({len(dictionary.as_bytes())} bytes) written to {path} "
+                f"in {time.time() - start_time:.1f}s")
+    return dictionary.dict_id()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train a zstd dictionary for a Redis cache's values")
+    parser.add_argument('--cache', choices=sorted(CACHE_PREFIXES), default="explanation", help="Cache to sample")
+    parser.add_argument('--samples', type=int, default=5000, help="Maximum entries sampled")
+    parser.add_argument('--size', type=int, default=16384, help="Dictionary size in bytes")
+    parser.add_argument('--holdout', type=float, default=0.1, help="Share of samples held out for the size report")
+    args = parser.parse_args()
+    asyncio.run(train_cache_dictionary(args.cache, args.samples, args.size, args.holdout))
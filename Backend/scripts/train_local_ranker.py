@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Train the Local Ranker
+Fits a ridge regression from the rerank feature log (RERANK_FEATURE_LOG_PATH)
+to the scores the LLM gave each candidate, evaluates it on held-out queries
+against the LLM's own ordering and writes the model artifact LocalRerankService
+loads (LOCAL_RANKER_PATH) plus an evaluation report.
+
+Collect training data first by running searches with, e.g.:
+    RERANK_FEATURE_LOG_PATH=logs/rerank_features.jsonl
+
+Then:
+    python scripts/train_local_ranker.py --log logs/rerank_features.jsonl
+
+Report metrics are per held-out query, against the LLM's scores for it:
+Spearman and Kendall rank correlation, nDCG@10 with LLM scores as graded
+relevance (the hybrid order is the baseline), top-5 overlap, score error,
+and what share of queries `gate` mode would still send to the LLM.
+"""
+
+import sys
+import argparse
+import json
+import time
+import zlib
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+# Add the app directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+import logging
+from app.core.config import settings
+from app.services.rerank_features import FEATURE_NAMES, FEATURE_VERSION, load_feature_log
+from benchmarks.relevance import ndcg_at_k
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+HYBRID_BASE_COLUMN = FEATURE_NAMES.index('hybrid_base')
+TOP_K_OVERLAP = 5
+
+
+def llm_grade(score: float) -> int:
+    """LLM score -> relevance grade, on the bands the hybrid + AI blending uses"""
+    if score >= 85:
+        return 3
+    if score >= 70:
+        return 2
+    if score >= 50:
+        return 1
+    return 0
+
+
+def group_by_query(rows: List[Dict[str, Any]]) -> Dict[str, Tuple[List[str], np.ndarray, np.ndarray]]:
+    """Per query: listing ids, features and LLM score - repeat scores for a listing are averaged"""
+    grouped: Dict[str, Dict[str, List[Dict[str, Any]]]] = defaultdict(lambda: defaultdict(list))
+    for row in rows:
+        grouped[row['query']][row['listing_id']].append(row)
+
+    queries = {}
+    for query, listings in grouped.items():
+        ids = list(listings)
+        features = np.array([listings[listing][-1]['features'] for listing in ids], dtype=np.float64)
+        scores = np.array([np.mean([row['ai_score'] for row in listings[listing]]) for listing in ids])
+        queries[query] = (ids, features, scores)
+    return queries
+
+
+def is_holdout(query: str, holdout: float) -> bool:
+    """Stable query-level split, so one query's candidates never straddle train and test"""
+    return zlib.crc32(query.encode()) % 1000 < holdout * 1000
+
+
+def fit_ridge(features: np.ndarray, scores: np.ndarray, alpha: float) -> Dict[str, Any]:
+    mean = features.mean(axis=0)
+    scale = features.std(axis=0)
+    scale[scale < 1e-9] = 1.0  # Constant columns contribute nothing instead of dividing by zero
+    standardized = (features - mean) / scale
+    bias = float(scores.mean())
+    gram = standardized.T @ standardized + alpha * np.eye(standardized.shape[1])
+    weights = np.linalg.solve(gram, standardized.T @ (scores - bias))
+    return {'mean': mean, 'scale': scale, 'weights': weights, 'bias': bias}
+
+
+def predict(model: Dict[str, Any], features: np.ndarray) -> np.ndarray:
+    return np.clip(((features - model['mean']) / model['scale']) @ model['weights'] + model['bias'], 10.0, 100.0)
+
+
+def spearman(a: np.ndarray, b: np.ndarray) -> float:
+    if len(a) < 2:
+        return 1.0
+    ranks_a, ranks_b = np.argsort(np.argsort(a)), np.argsort(np.argsort(b))
+    if ranks_a.std() == 0 or ranks_b.std() == 0:
+        return 0.0
+    return float(np.corrcoef(ranks_a, ranks_b)[0, 1])
+
+
+def kendall(a: np.ndarray, b: np.ndarray) -> float:
+    """Tau-a over all pairs the LLM did not tie"""
+    if len(a) < 2:
+        return 1.0
+    upper = np.triu_indices(len(a), k=1)
+    sign_a = np.sign(a[:, None] - a[None, :])[upper]
+    sign_b = np.sign(b[:, None] - b[None, :])[upper]
+    compared = sign_b != 0
+    return float((sign_a[compared] * sign_b[compared]).mean()) if compared.any() else 1.0
+
+
+def evaluate(model: Dict[str, Any], queries: Dict[str, Tuple[List[str], np.ndarray, np.ndarray]],
+             confident_margin: float, page_size: int) -> Dict[str, Any]:
+    """Local vs. LLM ordering on held-out queries, with the hybrid order as the baseline"""
+    per_query = defaultdict(list)
+    errors = []
+    gated = 0
+    predict_seconds = 0.0
+
+    for query, (ids, features, llm_scores) in queries.items():
+        start = time.perf_counter()
+        local_scores = predict(model, features)
+        predict_seconds += time.perf_counter() - start
+        errors.extend(local_scores - llm_scores)
+
+        relevance = {listing: llm_grade(score) for listing, score in zip(ids, llm_scores)}
+        local_order = [ids[i] for i in np.argsort(-local_scores, kind='stable')]
+        hybrid_order = [ids[i] for i in np.argsort(-features[:, HYBRID_BASE_COLUMN], kind='stable')]
+        llm_top = {ids[i] for i in np.argsort(-llm_scores, kind='stable')[:TOP_K_OVERLAP]}
+
+        per_query['spearman'].append(spearman(local_scores, llm_scores))
+        per_query['kendall'].append(kendall(local_scores, llm_scores))
+        per_query['ndcg@10_local'].append(ndcg_at_k(local_order, relevance))
+        per_query['ndcg@10_hybrid'].append(ndcg_at_k(hybrid_order, relevance))
+        per_query[f'top{TOP_K_OVERLAP}_overlap'].append(
+            len(llm_top.intersection(local_order[:TOP_K_OVERLAP])) / min(TOP_K_OVERLAP, len(ids))
+        )
+
+        ordered = np.sort(local_scores)[::-1]
+        top, rest = ordered[:page_size], ordered[page_size:]
+        if len(rest) and (top.mean() - rest.mean()) / max(model['rmse'], 1e-6) < confident_margin:
+            gated += 1
+
+    errors = np.asarray(errors)
+    report = {name: round(float(np.mean(values)), 4) for name, values in per_query.items()}
+    report.update({
+        'queries': len(queries),
+        'candidates': int(len(errors)),
+        'mae': round(float(np.abs(errors).mean()), 2) if len(errors) else None,
+        'rmse': round(float(np.sqrt((errors ** 2).mean())), 2) if len(errors) else None,
+        'gate_llm_share': round(gated / len(queries), 3) if queries else None,
+        'predict_us_per_query': round(predict_seconds / max(len(queries), 1) * 1e6, 1)
+    })
+    return report
+
+
+def train_local_ranker(log_path: str, output_path: str, report_path: str, holdout: float,
+                       alpha: float, page_size: int) -> Dict[str, Any]:
+    rows = load_feature_log(log_path)
+    queries = group_by_query(rows)
+    train = {query: data for query, data in queries.items() if not is_holdout(query, holdout)}
+    test = {query: data for query, data in queries.items() if is_holdout(query, holdout)}
+    logger.info(f"📊 {len(rows)} logged rows (feature v{FEATURE_VERSION}), "
+                f"{len(train)} training / {len(test)} held-out queries")
+    if not train or not test:
+        raise SystemExit("Need logged rerank rows for both training and held-out queries - collect more searches")
+
+    def stack(split):
+        return (np.vstack([features for _, features, _ in split.values()]),
+                np.concatenate([scores for _, _, scores in split.values()]))
+
+    model = fit_ridge(*stack(train), alpha)
+    model['rmse'] = float(np.sqrt(((predict(model, stack(test)[0]) - stack(test)[1]) ** 2).mean()))
+    evaluation = evaluate(model, test, settings.LOCAL_RERANK_CONFIDENT_MARGIN, page_size)
+
+    # Ship a model fitted on everything, keeping the held-out error as its confidence scale
+    final = fit_ridge(*stack(queries), alpha)
+    weights = sorted(zip(FEATURE_NAMES, final['weights'] / final['scale']), key=lambda item: -abs(item[1]))
+    artifact = {
+        'feature_version': FEATURE_VERSION,
+        'feature_names': list(FEATURE_NAMES),
+        'mean': final['mean'].tolist(),
+        'scale': final['scale'].tolist(),
+        'weights': final['weights'].tolist(),
+        'bias': final['bias'],
+        'rmse': round(model['rmse'], 3),
+        'alpha': alpha,
+        'training_rows': len(rows),
+        'training_queries': len(queries),
+        'trained_at': datetime.now(timezone.utc).isoformat()
+    }
+    report = {
+        'log': log_path,
+        'model': output_path,
+        'trained_at': artifact['trained_at'],
+        'holdout': evaluation,
+        'largest_weights': [{'feature': name, 'per_unit': round(float(weight), 3)} for name, weight in weights[:10]]
+    }
+
+    for path, payload in ((output_path, artifact), (report_path, report)):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(payload, indent=2), encoding='utf-8')
+
+    logger.info(f"🧮 Model written to {output_path}, report to {report_path}")
+    logger.info(f"   Held-out vs. LLM: spearman {evaluation['spearman']:.3f}, kendall {evaluation['kendall']:.3f}, "
+                f"nDCG@10 {evaluation['ndcg@10_local']:.3f} (hybrid order {evaluation['ndcg@10_hybrid']:.3f}), "
+                f"top-{TOP_K_OVERLAP} overlap {evaluation[f'top{TOP_K_OVERLAP}_overlap']:.2f}")
+    logger.info(f"   Score RMSE {evaluation['rmse']}, gate mode sends {evaluation['gate_llm_share']:.0%} of queries "
+                f"to the LLM, {evaluation['predict_us_per_query']}µs per query")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the local ranker from logged LLM rerank scores")
+    parser.add_argument('--log', default=settings.RERANK_FEATURE_LOG_PATH or "logs/rerank_features.jsonl",
+                        help="Rerank feature log (JSONL)")
+    parser.add_argument('--output', default=settings.LOCAL_RANKER_PATH, help="Model artifact path")
+    parser.add_argument('--report', default=None, help="Evaluation report path (default: next to the model)")
+    parser.add_argument('--holdout', type=float, default=0.2, help="Share of queries held out for evaluation")
+    parser.add_argument('--alpha', type=float, default=1.0, help="Ridge regularization strength")
+    parser.add_argument('--page-size', type=int, default=settings.DEFAULT_PAGE_SIZE,
+                        help="Page size for the gate-mode confidence estimate")
+    args = parser.parse_args()
+    train_local_ranker(
+        args.log, args.output, args.report or str(Path(args.output).with_suffix('.eval.json')),
+        args.holdout, args.alpha, args.page_size
+    )